@@ -62,16 +62,19 @@ echo "127.0.1.1   ${HOSTNAME_TARGET} ${HOSTNAME_TARGET}.local" >> /etc/hosts
 # 3. Resolve log / video paths from config.json and create them
 LOGGING_PATH=$(jq -r '.LOGGING_PATH' "$CONFIG_JSON")
 VIDEO_PATH=$(jq -r '.VIDEO_PATH'   "$CONFIG_JSON")
+SPOOL_PATH=$(jq -r '.TRANSCODE_SPOOL_PATH' "$CONFIG_JSON")
+ANALYTICS_PATH=$(jq -r '.ANALYTICS_PATH' "$CONFIG_JSON")
+CACHE_PATH=$(jq -r '.CACHE_PATH' "$CONFIG_JSON")
 
 echo " > Creating paths from config.json ..."
-mkdir -p "$LOGGING_PATH" "$VIDEO_PATH"
-chown -R "${RUN_USER}:${RUN_USER}" "$LOGGING_PATH" "$VIDEO_PATH"
-chmod 750 "$LOGGING_PATH" "$VIDEO_PATH"
+mkdir -p "$LOGGING_PATH" "$VIDEO_PATH" "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
+chown -R "${RUN_USER}:${RUN_USER}" "$LOGGING_PATH" "$VIDEO_PATH" "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
+chmod 750 "$LOGGING_PATH" "$VIDEO_PATH" "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
 
 # 4. Copy runtime files (no requirements files)
 echo " > Copying runtime files to ${INSTALL_DIR}/"
 mkdir -p "$INSTALL_DIR"
-cp "${SCRIPT_DIR}"/src/{config.json,logging_setup.py,main.py,hud.py,view.py,upload.py,cam.py,utils.py} "$INSTALL_DIR/"
+cp "${SCRIPT_DIR}"/src/{config.json,logging_setup.py,main.py,hud.py,view.py,upload.py,cam.py,utils.py,storage.py,encoder.py,scheduler.py,framepool.py,detection.py,sources.py,analytics.py,clipindex.py,governor.py,timing.py,config.py,framebus.py,hub.py,events.py,verify.py} "$INSTALL_DIR/"
 
 # 5. Virtual environment + dependency install
 echo " > Creating Python virtual environment ..."
@@ -104,6 +107,7 @@ After=network.target
 User=${RUN_USER}
 WorkingDirectory=${INSTALL_DIR}
 ExecStart=${INSTALL_DIR}/venv/bin/python3 ${INSTALL_DIR}/main.py
+ExecReload=/bin/kill -HUP \$MAINPID
 
 AmbientCapabilities=CAP_NET_BIND_SERVICE
 CapabilityBoundingSet=CAP_NET_BIND_SERVICE
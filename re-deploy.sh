@@ -8,7 +8,16 @@ echo "  > Stopping purr-view.service ..."
 systemctl stop    purr-view.service || true
 
 echo "  > Copying src files ..."
-cp "${SCRIPT_DIR}"/src/{config.json,logging_setup.py,main.py,hud.py,view.py,upload.py,cam.py,utils.py} "${INSTALL_DIR}/"
+cp "${SCRIPT_DIR}"/src/{config.json,logging_setup.py,main.py,hud.py,view.py,upload.py,cam.py,utils.py,storage.py,encoder.py,scheduler.py,framepool.py,detection.py,sources.py,analytics.py,clipindex.py,governor.py,timing.py,config.py,framebus.py,hub.py,events.py,verify.py} "${INSTALL_DIR}/"
+
+echo "  > Creating paths added to config.json ..."
+RUN_USER=$(systemctl show -p User --value purr-view.service)
+SPOOL_PATH=$(jq -r '.TRANSCODE_SPOOL_PATH' "${SCRIPT_DIR}/src/config.json")
+ANALYTICS_PATH=$(jq -r '.ANALYTICS_PATH' "${SCRIPT_DIR}/src/config.json")
+CACHE_PATH=$(jq -r '.CACHE_PATH' "${SCRIPT_DIR}/src/config.json")
+mkdir -p "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
+chown -R "${RUN_USER:-root}:${RUN_USER:-root}" "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
+chmod 750 "$SPOOL_PATH" "$ANALYTICS_PATH" "$CACHE_PATH"
 
 echo "  > Starting purr-view.service ..."
 systemctl start purr-view.service || true
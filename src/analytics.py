@@ -0,0 +1,188 @@
+import os
+import threading
+from datetime import datetime as dt
+from datetime import timedelta
+import numpy as np
+import cv2
+from logging_setup import get_logger
+
+logger = get_logger()
+
+HEATMAP_WIDTH = 64
+HEATMAP_HEIGHT = 36
+HOURS_PER_DAY = 24
+
+EVENT_DTYPE = np.dtype([
+    ("start_ts", "<f8"),
+    ("end_ts", "<f8"),
+    ("peak_motion", "<f4"),
+    ("duration", "<f4"),
+    ("clip", "S64"),   # video name without extension (CAMx_YYYY-MM-DD_HH-MM-SS_ffffff)
+])
+
+
+class AnalyticsStore:
+    """
+    Per-camera motion heatmap and event timeline, kept as plain NumPy files so aggregation is a few array sums:
+        ANALYTICS_PATH/CAMx/heatmap/YYYY-MM-DD.npy         24 x H x W float32, per hour sum of moving fraction of each cell
+        ANALYTICS_PATH/CAMx/heatmap/YYYY-MM-DD.frames.npy  24 int64, per hour number of detection frames
+        ANALYTICS_PATH/CAMx/events.bin                      append-only EVENT_DTYPE records
+    Heatmap is accumulated in RAM and added into the day file (memmap) on hour change or every flush_interval_sec.
+    """
+    def __init__(self, root_path, flush_interval_sec: float = 60.0):
+        self.root_path = str(root_path)
+        self.flush_interval_sec = flush_interval_sec
+        self._accumulators = {}  # cam_name -> {"day", "hour", "heat", "cells", "frames", "last_flush_ts"}
+        self._lock = threading.Lock()
+        os.makedirs(self.root_path, exist_ok=True)
+
+    def _heatmap_dir(self, cam_name):
+        return os.path.join(self.root_path, cam_name, "heatmap")
+
+    def _events_path(self, cam_name):
+        return os.path.join(self.root_path, cam_name, "events.bin")
+
+    def add_motion_mask(self, cam_name, mask, timestamp=None) -> None:
+        """Accumulate binary motion mask (0/255, any resolution) of one detection frame"""
+        now = dt.fromtimestamp(timestamp) if timestamp is not None else dt.now()
+        day = now.strftime("%Y-%m-%d")
+
+        with self._lock:
+            acc = self._accumulators.get(cam_name)
+            if acc is not None and (acc["day"] != day or acc["hour"] != now.hour):
+                self._flush_locked(cam_name, acc)
+                acc["day"], acc["hour"] = day, now.hour
+            if acc is None:
+                acc = self._accumulators[cam_name] = {
+                    "day": day,
+                    "hour": now.hour,
+                    "heat": np.zeros((HEATMAP_HEIGHT, HEATMAP_WIDTH), np.float32),
+                    "cells": None,
+                    "frames": 0,
+                    "last_flush_ts": now.timestamp(),
+                }
+
+            # INTER_AREA -> mean of mask in each cell (0..255)
+            acc["cells"] = cv2.resize(mask, (HEATMAP_WIDTH, HEATMAP_HEIGHT), dst=acc["cells"], interpolation=cv2.INTER_AREA)
+            cv2.accumulate(acc["cells"], acc["heat"])
+            acc["frames"] += 1
+
+            if now.timestamp() - acc["last_flush_ts"] > self.flush_interval_sec:
+                self._flush_locked(cam_name, acc)
+
+    def _open_day(self, cam_name, day, mode):
+        heat_path = os.path.join(self._heatmap_dir(cam_name), f"{day}.npy")
+        frames_path = os.path.join(self._heatmap_dir(cam_name), f"{day}.frames.npy")
+        if mode == "r":
+            if not os.path.exists(heat_path) or not os.path.exists(frames_path):
+                return None, None
+            return np.load(heat_path, mmap_mode="r"), np.load(frames_path, mmap_mode="r")
+
+        if not os.path.exists(heat_path):
+            os.makedirs(self._heatmap_dir(cam_name), exist_ok=True)
+            np.lib.format.open_memmap(heat_path, mode="w+", dtype=np.float32, shape=(HOURS_PER_DAY, HEATMAP_HEIGHT, HEATMAP_WIDTH)).flush()
+            np.lib.format.open_memmap(frames_path, mode="w+", dtype=np.int64, shape=(HOURS_PER_DAY,)).flush()
+        return np.load(heat_path, mmap_mode="r+"), np.load(frames_path, mmap_mode="r+")
+
+    def _flush_locked(self, cam_name, acc):
+        acc["last_flush_ts"] = dt.now().timestamp()
+        if acc["frames"] == 0:
+            return
+        try:
+            heat, frames = self._open_day(cam_name, acc["day"], "r+")
+            heat[acc["hour"]] += acc["heat"] / 255.0
+            frames[acc["hour"]] += acc["frames"]
+            heat.flush()
+            frames.flush()
+            del heat, frames
+        except Exception as e:
+            logger.error(f"[{cam_name}] Failed to store motion heatmap ({repr(e)})")
+        acc["heat"].fill(0)
+        acc["frames"] = 0
+
+    def add_event(self, cam_name, start_ts, end_ts, peak_motion, clip="") -> None:
+        """Append one motion event to camera timeline"""
+        record = np.zeros(1, EVENT_DTYPE)
+        record["start_ts"] = start_ts
+        record["end_ts"] = end_ts
+        record["peak_motion"] = peak_motion
+        record["duration"] = end_ts - start_ts
+        record["clip"] = clip.encode()[:EVENT_DTYPE["clip"].itemsize]
+        try:
+            os.makedirs(os.path.dirname(self._events_path(cam_name)), exist_ok=True)
+            with self._lock, open(self._events_path(cam_name), "ab") as f:
+                f.write(record.tobytes())
+        except Exception as e:
+            logger.error(f"[{cam_name}] Failed to store motion event ({repr(e)})")
+
+    def cameras(self):
+        try:
+            return sorted(name for name in os.listdir(self.root_path) if os.path.isdir(os.path.join(self.root_path, name)))
+        except FileNotFoundError:
+            return []
+
+    def heatmap(self, cam_name, since, until, hour_from=0, hour_to=23):
+        """
+        Fraction of detection frames with motion per cell (H x W, 0..1) over [since, until),
+        counting only hours of day within hour_from..hour_to. Returns (heatmap, frame count).
+        """
+        total = np.zeros((HEATMAP_HEIGHT, HEATMAP_WIDTH), np.float64)
+        total_frames = 0
+        hours = np.zeros(HOURS_PER_DAY, bool)
+        hours[hour_from:hour_to + 1] = True
+
+        day = dt.fromtimestamp(since).replace(hour=0, minute=0, second=0, microsecond=0)
+        while day.timestamp() < until:
+            heat, frames = self._open_day(cam_name, day.strftime("%Y-%m-%d"), "r")
+            if heat is not None:
+                # hour buckets whose start lies in range (partial days at the edges)
+                hour_starts = np.array([(day + timedelta(hours=h)).timestamp() for h in range(HOURS_PER_DAY)])
+                selected = hours & (hour_starts >= since - 3600) & (hour_starts < until)
+                if selected.any():
+                    total += heat[selected].sum(axis=0)
+                    total_frames += int(frames[selected].sum())
+            day += timedelta(days=1)
+
+        if total_frames:
+            total /= total_frames
+        return total, total_frames
+
+    def events(self, cam_name, since, until):
+        """Structured array (EVENT_DTYPE) of events started within [since, until)"""
+        path = self._events_path(cam_name)
+        if not os.path.exists(path):
+            return np.zeros(0, EVENT_DTYPE)
+        with self._lock:
+            events = np.fromfile(path, dtype=EVENT_DTYPE)
+        return events[(events["start_ts"] >= since) & (events["start_ts"] < until)]
+
+    def event_summary(self, cam_name, since, until):
+        """Aggregates over events: counts per hour of day and per day, motion time, peak motion distribution"""
+        events = self.events(cam_name, since, until)
+        hours = np.array([dt.fromtimestamp(ts).hour for ts in events["start_ts"]], dtype=np.int64)
+        days = np.array([dt.fromtimestamp(ts).strftime("%Y-%m-%d") for ts in events["start_ts"]])
+        unique_days, day_counts = np.unique(days, return_counts=True) if len(events) else ([], [])
+        peak_bins = [0, 1, 2, 5, 10, 20, 50, 100]
+        peak_hist, _ = np.histogram(events["peak_motion"], bins=peak_bins)
+
+        return {
+            "cam": cam_name,
+            "since": since,
+            "until": until,
+            "count": int(len(events)),
+            "motion_seconds": float(events["duration"].sum()),
+            "mean_duration": float(events["duration"].mean()) if len(events) else 0.0,
+            "mean_peak_motion": float(events["peak_motion"].mean()) if len(events) else 0.0,
+            "max_peak_motion": float(events["peak_motion"].max()) if len(events) else 0.0,
+            "by_hour": np.bincount(hours, minlength=HOURS_PER_DAY).tolist(),
+            "by_day": {str(day): int(count) for day, count in zip(unique_days, day_counts)},
+            "peak_motion_histogram": {"bins": peak_bins, "counts": peak_hist.tolist()},
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            for cam_name, acc in self._accumulators.items():
+                self._flush_locked(cam_name, acc)
+
+    def close(self) -> None:
+        self.flush()
@@ -0,0 +1,390 @@
+"""
+Offline replay benchmark of the full cam_worker pipeline (capture -> detection -> HUD -> pre-buffer -> recording -> finalisation).
+
+Feeds synthetic moving-object sequences or recorded clips through CameraManager as N virtual cameras,
+without FPS limiter, and writes machine-readable JSON result (frames/s, per-stage latency, peak RSS,
+/dev/shm peak, event finalisation time), so detector/encoder/buffer configurations can be compared.
+
+    python3 bench.py --cams 4 --seconds 60
+    python3 bench.py --source clip.mp4 --set VIDEO_CODEC=PASSTHROUGH --output passthrough.json
+    python3 bench.py --spurious flicker --set VERIFY_ENABLED=true --set VERIFY_ACTION=CANCEL
+
+With --spurious every other motion period shows lamp flicker or IR switch instead of the moving object,
+result then has event precision (real / recorded events) against this ground truth, with and without verification.
+"""
+
+### LOGGING ###
+from logging_setup import get_logger
+logger = get_logger()
+
+### IMPORTS ###
+import os
+os.environ["OPENCV_LOG_LEVEL"] = "ERROR"
+import cv2
+import numpy as np
+import argparse
+import json
+import platform
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import psutil
+from cam import CameraManager, CAMERA_CONFIGS, VIDEO_PATH_IN_RAM
+from storage import StorageManager
+from utils import StageStats
+from sources import FileCapture
+from verify import EventVerifier
+
+### CONF ###
+BENCH_CAM_PREFIX = "BENCH"
+
+DEFAULT_CAMERA_CONFIG = {
+    "FPS": 25,
+    "FRAME_WIDTH": 1280,
+    "FRAME_HEIGHT": 720,
+    "MOTION_DETECTION_THRESHOLD_PERCENT": 0.25,
+    "MOTION_DETECTION_DOWNSCALE": 2.0,
+    "MOTION_DETECTION_FRAME_STEP": 2,
+    "NUMBER_OF_FRAMES_WITH_MOTION": 3,
+    "NUMBER_OF_FRAMES_WITH_NO_MOTION": 65,
+    "PRE_MOTION_SECONDS": 3,
+    "POST_MOTION_SECONDS": 3,
+}
+
+### CAPTURES ###
+
+class SyntheticCapture:
+    """
+    cv2.VideoCapture look-alike producing a textured static scene with a rectangle crossing it
+    for motion_seconds out of every period_seconds (time base is frame index / fps, so runs are repeatable).
+    With spurious ("flicker" or "ir") every odd period has no object, lamp flickers / IR night mode switches
+    on for spurious_seconds instead (no real motion, but enough changed pixels for the detector).
+    """
+    def __init__(self, width, height, fps, period_seconds=12.0, motion_seconds=4.0, seed=0, spurious=None, spurious_seconds=1.0):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.period_seconds = period_seconds
+        self.motion_seconds = motion_seconds
+        self.spurious = spurious
+        self.spurious_seconds = spurious_seconds
+        self.frame_index = 0
+        self.convert_rgb = True
+
+        rng = np.random.default_rng(seed)
+        gradient = np.linspace(40, 200, self.width, dtype=np.float32)[None, :, None]
+        texture = rng.integers(0, 24, (self.height, self.width, 1), dtype=np.uint8).astype(np.float32)
+        self._background = np.clip(gradient + texture, 0, 255).astype(np.uint8).repeat(3, axis=2)
+
+    def period_kind(self, t=None):
+        """Ground truth of period at time t (default: latest frame): "object" or spurious scene"""
+        t = (self.frame_index - 1) / self.fps if t is None else t
+        return self.spurious if self.spurious and int(t // self.period_seconds) % 2 else "object"
+
+    def motion_active(self, t):
+        return self.period_kind(t) == "object" and (t % self.period_seconds) < self.motion_seconds
+
+    def spurious_active(self, t):
+        return self.period_kind(t) != "object" and (t % self.period_seconds) < self.spurious_seconds
+
+    def read(self, image=None):
+        t = self.frame_index / self.fps
+        self.frame_index += 1
+
+        if image is not None and image.shape == self._background.shape:
+            np.copyto(image, self._background)
+            frame = image
+        else:
+            frame = self._background.copy()  # real cameras hand out new array every read
+
+        if self.motion_active(t):
+            box_w, box_h = self.width // 8, self.height // 4
+            progress = (t % self.period_seconds) / self.motion_seconds
+            x = int(progress * (self.width - box_w))
+            y = (self.height - box_h) // 2
+            cv2.rectangle(frame, (x, y), (x + box_w, y + box_h), (20, 20, 230), -1)
+        elif self.spurious_active(t):
+            if self.spurious == "flicker":
+                cv2.convertScaleAbs(frame, frame, 0.6 if int(t * 4) % 2 else 1.0)  # lamp dims 4 times a second
+            else:
+                gray = cv2.convertScaleAbs(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), alpha=0.8, beta=30)  # IR: no color, flat
+                cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, frame)
+
+        if not self.convert_rgb:
+            _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            return True, jpeg.reshape(1, -1)
+        return True, frame
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert_rgb = bool(value)
+        return True
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_BUFFERSIZE: 1,
+            cv2.CAP_PROP_FOURCC: cv2.VideoWriter_fourcc(*"MJPG"),
+        }.get(prop, 0)
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class EventCollector:
+    """Stands in for events.EventBus: keeps motion start/stop of every camera with ground truth of synthetic scene"""
+    def __init__(self, captures):
+        self.captures = captures  # cam name -> SyntheticCapture (empty for recorded clips, no ground truth)
+        self.events = []
+        self._lock = threading.Lock()
+
+    def emit(self, event_type, cam_name, **data):
+        capture = self.captures.get(cam_name)
+        with self._lock:
+            self.events.append((event_type, cam_name, capture.period_kind() if capture is not None else None, data))
+
+    def summary(self):
+        """Recorded events (motion start .. stop), their verdicts and precision against ground truth"""
+        starts = {}
+        results = []  # (ground truth at motion start, verified)
+        with self._lock:
+            for event_type, cam_name, truth, data in self.events:
+                if event_type == "motion_start":
+                    starts[cam_name] = truth
+                elif event_type == "motion_stop" and cam_name in starts:
+                    results.append((starts.pop(cam_name), data.get("verified")))
+
+        kept = [truth for truth, verified in results if verified is not False]
+        real = sum(truth == "object" for truth, _ in results)
+        kept_real = sum(truth == "object" for truth in kept)
+        has_truth = bool(self.captures)
+        return {
+            "triggers": len(results),
+            "real_triggers": real if has_truth else None,
+            "confirmed": len(kept),
+            "rejected": len(results) - len(kept),
+            "unverified": sum(verified is None for _, verified in results),
+            "precision_detector": real / len(results) if has_truth and results else None,
+            "precision": kept_real / len(kept) if has_truth and kept else None,
+            "recall": kept_real / real if has_truth and real else None,
+        }
+
+
+### FUNCTIONS ###
+
+def _parse_overrides(pairs):
+    """KEY=VALUE pairs, values parsed as JSON when possible (numbers, booleans), otherwise kept as strings"""
+    overrides = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[key] = value
+    return overrides
+
+
+def _shm_usage_bytes():
+    """Bytes used by benchmark cameras in RAM video directory"""
+    total = 0
+    try:
+        with os.scandir(VIDEO_PATH_IN_RAM) as it:
+            for entry in it:
+                if entry.name.startswith(BENCH_CAM_PREFIX):
+                    try:
+                        total += entry.stat().st_size
+                    except FileNotFoundError:
+                        pass
+    except FileNotFoundError:
+        pass
+    return total
+
+
+def _cleanup_shm():
+    try:
+        with os.scandir(VIDEO_PATH_IN_RAM) as it:
+            for entry in it:
+                if entry.name.startswith(BENCH_CAM_PREFIX):
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+
+
+def build_camera_configs(args, width, height, fps):
+    base = dict(CAMERA_CONFIGS[0]) if CAMERA_CONFIGS else dict(DEFAULT_CAMERA_CONFIG)
+    base.update(_parse_overrides(args.set))
+    base.update({
+        "DEVICE_PATH": args.source,
+        "FPS": fps,
+        "FPS_LIMITER": 0,   # run as fast as pipeline allows
+        "FRAME_WIDTH": width,
+        "FRAME_HEIGHT": height,
+    })
+    return [{**base, "NAME": f"{BENCH_CAM_PREFIX}{i + 1}"} for i in range(args.cams)]
+
+
+def run_benchmark(args) -> dict:
+    if args.source == "synthetic":
+        width, height, fps = args.width, args.height, args.fps
+        captures = {}
+
+        def capture_factory(cam_config):
+            capture = captures[cam_config["NAME"]] = SyntheticCapture(cam_config["FRAME_WIDTH"], cam_config["FRAME_HEIGHT"], cam_config["FPS"],
+                                                                      args.period, args.motion, spurious=args.spurious, spurious_seconds=args.spurious_seconds)
+            return capture
+    else:
+        probe = FileCapture(args.source)
+        width, height = int(probe.get(cv2.CAP_PROP_FRAME_WIDTH)), int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = probe.get(cv2.CAP_PROP_FPS) or args.fps
+        probe.release()
+        capture_factory = lambda cam_config: FileCapture(args.source)
+        captures = {}
+
+    camera_configs = build_camera_configs(args, width, height, int(round(fps)))  # config FPS is integer
+    work_dir = tempfile.mkdtemp(prefix="purrview-bench-")
+    stop_event = threading.Event()
+    storage = StorageManager(os.path.join(work_dir, "videos"))
+    stage_stats = StageStats()
+
+    camera_manager = CameraManager(
+        stop_event=stop_event,
+        max_concurrent_workers=args.workers,
+        ftp_upload_video=False,
+        save_video_locally=True,
+        storage=storage,
+        camera_configs=camera_configs,
+        capture_factory=capture_factory,
+        skip_detection_seconds=args.warmup
+    )
+    camera_manager.stage_stats = stage_stats
+    event_collector = camera_manager.event_bus = EventCollector(captures)
+    verifier = None
+    if any(cam_config.get("VERIFY_ENABLED", False) for cam_config in camera_configs):
+        verifier = camera_manager.verifier = EventVerifier(args.verify_workers)
+        verifier.start()
+
+    # sample /dev/shm and RSS while running
+    peaks = {"shm_bytes": 0, "rss_bytes": 0}
+    proc = psutil.Process(os.getpid())
+    sampler_stop = threading.Event()
+
+    def sampler():
+        while not sampler_stop.is_set():
+            peaks["shm_bytes"] = max(peaks["shm_bytes"], _shm_usage_bytes())
+            peaks["rss_bytes"] = max(peaks["rss_bytes"], proc.memory_info().rss)
+            sampler_stop.wait(0.1)
+
+    sampler_t = threading.Thread(target=sampler)
+    sampler_t.start()
+    cpu_start = time.process_time()
+
+    try:
+        camera_manager.init_cameras()
+        start = time.monotonic()
+        camera_manager.start_camera_threads()
+        time.sleep(args.seconds)
+        stop_event.set()
+        camera_manager.join_camera_threads()
+        elapsed = time.monotonic() - start
+        camera_manager.shutdown_executor()  # waits for event finalisation
+    finally:
+        stop_event.set()
+        if verifier is not None:
+            verifier.close()
+        sampler_stop.set()
+        sampler_t.join()
+        _cleanup_shm()
+
+    cpu_seconds = time.process_time() - cpu_start
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)  # verification processes (joined by close)
+    verification = event_collector.summary()
+    if verifier is not None:
+        verification["verifier"] = verifier.status()
+        verification["pool_cpu_percent_of_one_core"] = (children_usage.ru_utime + children_usage.ru_stime) / elapsed * 100.0 if elapsed else 0.0
+    clips = storage.list_clips(limit=100000)
+    storage.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    frames = stage_stats.count("capture")
+    stages = stage_stats.summary()
+
+    # without pool every capture allocates new frame
+    pools = [pool for pool in camera_manager.frame_pools if pool is not None]
+    capture_allocations = sum(pool.allocations for pool in pools) if pools else frames
+    return {
+        "timestamp": time.time(),
+        "host": {
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "cpu_count": psutil.cpu_count(logical=True),
+        },
+        "setup": {
+            "source": args.source,
+            "cams": args.cams,
+            "seconds": args.seconds,
+            "warmup_seconds": args.warmup,
+            "resolution": [width, height],
+            "overrides": _parse_overrides(args.set),
+        },
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps_total": frames / elapsed if elapsed else 0.0,
+        "fps_per_camera": frames / elapsed / args.cams if elapsed else 0.0,
+        "cpu_percent_of_one_core": cpu_seconds / elapsed * 100.0 if elapsed else 0.0,
+        "peak_rss_mb": max(peaks["rss_bytes"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024) / (1024**2),
+        "shm_peak_mb": peaks["shm_bytes"] / (1024**2),
+        "capture_buffers": {
+            "pooled": bool(pools),
+            "allocations": capture_allocations,
+            "reuses": sum(pool.reuses for pool in pools),
+            "allocated_mb_per_s": capture_allocations * width * height * 3 / (1024**2) / elapsed if elapsed else 0.0,
+        },
+        "events": {
+            "count": len(clips),
+            "finalise": stages.get("event_finalise"),
+            "video_seconds": sum(clip["duration"] for clip in clips),
+            "video_mb": sum(clip["size"] for clip in clips) / (1024**2),
+            "untagged": sum(not clip["motion"] for clip in clips),
+        },
+        "verification": verification,
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purr View offline pipeline benchmark")
+    parser.add_argument("--source", default="synthetic", help="'synthetic' or path to recorded clip")
+    parser.add_argument("--cams", type=int, default=1, help="number of virtual cameras")
+    parser.add_argument("--seconds", type=float, default=60.0, help="measured run time")
+    parser.add_argument("--warmup", type=float, default=2.0, help="detection warm-up (replaces SKIP_DETECTION_SECONDS)")
+    parser.add_argument("--width", type=int, default=1280, help="synthetic frame width")
+    parser.add_argument("--height", type=int, default=720, help="synthetic frame height")
+    parser.add_argument("--fps", type=int, default=25, help="nominal camera FPS (video FPS, buffer sizes)")
+    parser.add_argument("--period", type=float, default=12.0, help="synthetic motion period (s)")
+    parser.add_argument("--motion", type=float, default=4.0, help="synthetic motion duration within period (s)")
+    parser.add_argument("--spurious", choices=["flicker", "ir"], help="every other synthetic period shows this instead of moving object")
+    parser.add_argument("--spurious-seconds", type=float, default=1.0, help="duration of spurious scene within period (s)")
+    parser.add_argument("--workers", type=int, default=1, help="MAX_CONCURRENT_VIDEO_WRITES_AND_UPLOADS")
+    parser.add_argument("--verify-workers", type=int, default=1, help="VERIFY_WORKERS (cameras with VERIFY_ENABLED)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="camera config override, repeatable")
+    parser.add_argument("--output", help="write JSON result to file (always printed to stdout)")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
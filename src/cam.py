@@ -11,14 +11,25 @@ import threading
 from enum import Enum
 from datetime import datetime as dt
 from datetime import timedelta
-import json
 import time
-import psutil
 import glob
 import math
+import bisect
 from concurrent.futures import ThreadPoolExecutor
 from hud import draw_hud
 from upload import upload_and_cleanup
+from storage import sidecar_path
+from framepool import FramePool
+from detection import DetectionStream, BackgroundModel, BACKGROUND_MATCH_MAX_PERCENT, BACKGROUND_MATCH_THRESHOLD_FACTOR
+from framebus import FrameBusWriter
+from events import EVENT_MOTION_START, EVENT_MOTION_STOP, EVENT_CLIP_READY
+from verify import downscale_frame
+from sources import CaptureSource
+from clipindex import ClipIndexBuilder, refresh_keyframes, CLIP_INDEX_SUFFIX
+from timing import FpsLimiter, CaptureClock, FramePacer
+from utils import process_uptime_seconds
+from config import config, camera_changes, ConfigError, CAMERA_RESTART_KEYS
+from encoder import create_video_writer, encoder_settings, transcode_video, transcode_settings, PASSTHROUGH_CODEC
 
 ### ENUMS ###
 class State(Enum):
@@ -34,15 +45,20 @@ state_string = {
 }
 
 ### CONF ###
-with open(os.path.join(os.path.dirname((os.path.abspath(__file__))), "config.json"), "r") as f:
-    config = json.load(f)
-
 VIDEO_PATH_IN_RAM = "/dev/shm/PurrView/videos"
+BACKGROUND_PATH_IN_RAM = "/dev/shm/PurrView/models"  # background model checkpoints (warm start after reopen/restart)
+WARM_START_SKIP_SECONDS = 0.5  # detection warm-up when background model was restored (instead of SKIP_DETECTION_SECONDS)
+THUMBNAIL_WIDTH = 320
+BURST_JPEG_QUALITY = 90
+REOPEN_INITIAL_DELAY_SECONDS = 2   # full reopen (after source gave up reconnecting in place), doubled on every failure
+REOPEN_MAX_DELAY_SECONDS = 60
+RECORDING_MODE_EVENT = "EVENT"             # record motion events only (pre-buffer in RAM)
+RECORDING_MODE_CONTINUOUS = "CONTINUOUS"   # record fixed-length segments all the time, motion is a tag
+VERIFY_ACTION_TAG = "TAG"        # spurious motion (verify.py) is kept as clip without motion (no upload, expires early)
+VERIFY_ACTION_CANCEL = "CANCEL"  # spurious motion recording is dropped
+VERIFY_REFERENCE_INTERVAL_SECONDS = 1.0  # verification reference (frame before motion) refreshed this often
 
-CAMERA_CONFIGS = [
-    {"NAME": cam_name, **cam_config}
-    for cam_name, cam_config in config.items() if cam_name.startswith("CAM")
-]
+CAMERA_CONFIGS = config.cameras
 
 CAM_COUNT = len(CAMERA_CONFIGS)
 MAX_VIDEO_LENGTH_SECONDS = config["MAX_VIDEO_LENGTH_SECONDS"]
@@ -54,29 +70,62 @@ SHOW_FPS_ON_FRAME = config["SHOW_FPS_ON_FRAME"]
 SHOW_CAM_NAME_ON_FRAME = config["SHOW_CAM_NAME_ON_FRAME"]
 SHOW_TIMESTAMP_ON_FRAME = config["SHOW_TIMESTAMP_ON_FRAME"]
 
-# Calculate post event frames for each camera
-POST_EVENT_FRAMES = []
-for cam_index in range(len(CAMERA_CONFIGS)):
-    if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-        POST_EVENT_FRAMES.append(CAMERA_CONFIGS[cam_index]["POST_MOTION_SECONDS"] * CAMERA_CONFIGS[cam_index]["FPS_LIMITER"])
-    else:
-        POST_EVENT_FRAMES.append(CAMERA_CONFIGS[cam_index]["POST_MOTION_SECONDS"] * CAMERA_CONFIGS[cam_index]["FPS"])
+### FUNCTIONS ###
+def seconds_to_frames(cam_config, key):
+    """Whole number of frames covering cam_config[key] seconds at camera FPS (FPS_LIMITER when set), config values may be floats"""
+    fps = cam_config["FPS_LIMITER"] if cam_config["FPS_LIMITER"] != 0 else cam_config["FPS"]
+    return max(0, int(round(cam_config[key] * fps)))
+
+def subsample(items, step):
+    """Every step-th item, aligned so the latest one is always kept"""
+    items = list(items)
+    return items[len(items) % step::step] if step > 1 else items
 
 ### CAMERA CLASS ###
 class CameraManager:
-    def __init__(self, stop_event, max_concurrent_workers, ftp_upload_video, save_video_locally, video_path):
+    def __init__(self, stop_event, max_concurrent_workers, ftp_upload_video, save_video_locally, storage, transcode_scheduler=None,
+                 camera_configs=None, capture_factory=None, skip_detection_seconds=None, analytics=None):
         self.stop_event = stop_event
         self.ftp_upload_video = ftp_upload_video
         self.save_video_locally = save_video_locally
-        self.video_path = video_path
+        self.storage = storage
+        self.transcode_scheduler = transcode_scheduler  # None = transcode right after recording
+        self.camera_configs = camera_configs if camera_configs is not None else CAMERA_CONFIGS
+        self.cam_count = len(self.camera_configs)
+        self.capture_factory = capture_factory if capture_factory is not None else self.open_source # cam_config -> cap
+        self.skip_detection_seconds = skip_detection_seconds if skip_detection_seconds is not None else SKIP_DETECTION_SECONDS
+        self.stage_stats = None  # optional utils.StageStats, filled by benchmark
+        self.analytics = analytics  # optional analytics.AnalyticsStore (motion heatmap + event timeline)
+        self.governor = None  # optional governor.ResourceGovernor, set by main
+        self.event_bus = None  # optional events.EventBus (motion start/stop, clip ready notifications), set by main
+        self.negotiation_cache = None  # optional sources.NegotiationCache (restart skips capture probing), set by main
+        self.verifier = None  # optional verify.EventVerifier (second stage check of motion starting a recording, VERIFY_ENABLED), set by main
+        self.finalisations_in_flight = 0
+        self.camera_finalisations_in_flight = [0 for _ in self.camera_configs]  # per camera (config restart waits for its own videos only)
+        self._finalisations_lock = threading.Lock()
+
+        # Calculate post event frames for each camera
+        self.post_event_frames = [self.calculate_post_event_frames(cam_config) for cam_config in self.camera_configs]
+        self.restart_requests = [threading.Event() for _ in self.camera_configs]  # camera restarts with new config (see apply_camera_configs)
+        self.pending_configs = [None for _ in self.camera_configs]  # full new config, applied when camera restarts
+        self._config_lock = threading.Lock()
         
         # Create video processing executor
         self.video_upload_executor = ThreadPoolExecutor(max_workers=max_concurrent_workers)
         
         # Camera arrays
-        self.cap_array = [None for _ in range(CAM_COUNT)]
-        self.state_array = [State.NONE for _ in range(CAM_COUNT)]
-        self.current_frame = [None for _ in range(CAM_COUNT)]
+        self.cap_array = [None for _ in range(self.cam_count)]
+        self.state_array = [State.NONE for _ in range(self.cam_count)]
+        self.current_frame = [None for _ in range(self.cam_count)]
+        self.frame_seq = [0 for _ in range(self.cam_count)]  # incremented after every new current_frame (preview JPEG cache)
+        self.burst_rings = [None for _ in range(self.cam_count)]  # (capture ts, frame, is JPEG) mirror of pre-buffer ring, for bursts
+        self.frame_pools = [None for _ in range(self.cam_count)]
+        self.detection_cap_array = [None for _ in range(self.cam_count)]  # optional low-res substream (DETECTION_SOURCE)
+        self.detection_streams = [None for _ in range(self.cam_count)]
+        self.background_models = [None for _ in range(self.cam_count)]  # detection.BackgroundModel in use (main stream or substream)
+        self.frame_buses = [None for _ in range(self.cam_count)]  # framebus.FrameBusWriter (FRAME_BUS_ENABLED), kept across reopen
+        self.cached_negotiations = [None for _ in range(self.cam_count)]  # negotiation cache entry used by init_cam, checked on first frame
+        self.startup_milestones = [set() for _ in range(self.cam_count)]  # startup times already logged (first process start only)
         
         # Thread management
         self.camera_threads = []
@@ -94,31 +143,79 @@ class CameraManager:
         else:
             logger.debug("Video directory in RAM found")
 
-    def post_process_video(self, cam_index, pre_buffer_frames, motion_video_path, motion_start_datetime_string):
-        """Combine pre-buffer frames with already-written motion video to create final video"""
+    def record_stage(self, stage, duration_ms):
+        if self.stage_stats is not None:
+            self.stage_stats.add(stage, duration_ms)
+
+    def log_startup_milestone(self, cam_index, milestone):
+        """Log time from process start (interpreter and imports included) once per camera, reopen/restart do not count"""
+        if milestone in self.startup_milestones[cam_index]:
+            return
+        self.startup_milestones[cam_index].add(milestone)
+        logger.info(f"[{self.camera_configs[cam_index]['NAME']}] Startup: {milestone} {process_uptime_seconds():.2f} s after process start")
+
+    def check_cached_negotiation(self, cam_index, frame):
+        """First frame after init_cam used cached negotiation: drop cache entry when camera delivers something else"""
+        cached = self.cached_negotiations[cam_index]
+        self.cached_negotiations[cam_index] = None
+        if cached is None or self.negotiation_cache is None:
+            return
+        cam_config = self.camera_configs[cam_index]
+        passthrough = frame.ndim == 2 and frame.shape[0] == 1
+        if passthrough:
+            frame = cv2.imdecode(frame, cv2.IMREAD_REDUCED_GRAYSCALE_2)  # only size matters
+            if frame is None:
+                return
+            height, width = frame.shape[0] * 2, frame.shape[1] * 2
+        else:
+            height, width = frame.shape[:2]
+        # reduced decode rounds odd sizes up
+        if abs(width - cached["width"]) > 1 or abs(height - cached["height"]) > 1:
+            logger.warning(f"[{cam_config['NAME']}] Camera delivers {width}x{height}, cached negotiation says {cached['width']}x{cached['height']}, cache entry dropped")
+            self.negotiation_cache.invalidate(cam_config, encoder_settings(cam_config)["codec"] == PASSTHROUGH_CODEC)
+
+    def save_thumbnail(self, frame, full_file_path):
+        """Store downscaled JPEG of given frame next to the video (generated once, at finalisation)"""
+        h, w = frame.shape[:2]
+        thumb_h = max(1, int(round(h * THUMBNAIL_WIDTH / float(w))))
+        thumb = cv2.resize(frame, (THUMBNAIL_WIDTH, thumb_h), interpolation=cv2.INTER_AREA)
+        cv2.imwrite(sidecar_path(full_file_path, ".jpg"), thumb, [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+    def post_process_video(self, cam_index, pre_buffer_frames, motion_video_path, motion_start_datetime_string, motion_start_timestamp, peak_motion_percent, frame_pool=None, clip_index=None, record_step=1, motion=True):
+        """
+        Combine pre-buffer frames with already-written motion video to create final video (every record_step-th pre-buffer frame).
+        motion=False stores clip without motion tag (motion not confirmed by verification)
+        """
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        full_file_path = None  # set once final video writer is open
         try:
-            cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
             
             logger.info(f"[{cam_name}] Combining pre-buffer with motion video ...")
             timestamp = dt.now().timestamp()
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
 
             self.ensure_ram_dirs()
 
-            # Create final combined video file
-            file_name = f"{cam_name}_{motion_start_datetime_string}.mp4"
-            full_file_path = os.path.join(VIDEO_PATH_IN_RAM, file_name)
-
-            if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-                video_fps = CAMERA_CONFIGS[cam_index]["FPS_LIMITER"]
+            if self.camera_configs[cam_index]["FPS_LIMITER"] != 0:
+                video_fps = self.camera_configs[cam_index]["FPS_LIMITER"] / float(record_step)
             else:
-                video_fps = CAMERA_CONFIGS[cam_index]["FPS"]
+                video_fps = self.camera_configs[cam_index]["FPS"] / float(record_step)
+            recorded_pre_buffer_frames = subsample(pre_buffer_frames, record_step)
             
-            out = cv2.VideoWriter(full_file_path, fourcc, video_fps, (CAMERA_CONFIGS[cam_index]["FRAME_WIDTH"], CAMERA_CONFIGS[cam_index]["FRAME_HEIGHT"]))
+            # Create final combined video file (extension depends on codec)
+            out = create_video_writer(
+                cam_name,
+                os.path.join(VIDEO_PATH_IN_RAM, f"{cam_name}_{motion_start_datetime_string}"),
+                video_fps,
+                (self.camera_configs[cam_index]["FRAME_WIDTH"], self.camera_configs[cam_index]["FRAME_HEIGHT"]),
+                encoder_settings(self.camera_configs[cam_index])
+            )
+            full_file_path = out.path
 
             # Write pre-buffer frames first
-            for frame in pre_buffer_frames:
+            frames_written = 0
+            for frame in recorded_pre_buffer_frames:
                 out.write(frame)
+                frames_written += 1
 
             # Read back and copy frames from the motion video
             if os.path.exists(motion_video_path):
@@ -127,7 +224,10 @@ class CameraManager:
                     ret, frame = motion_cap.read()
                     if not ret:
                         break
+                    if frames_written == len(recorded_pre_buffer_frames):
+                        self.save_thumbnail(frame, full_file_path) # first motion frame
                     out.write(frame)
+                    frames_written += 1
                 motion_cap.release()
                 
                 # Clean up temporary motion video
@@ -142,18 +242,35 @@ class CameraManager:
             out.release()
             out = None
 
+            if frames_written == len(recorded_pre_buffer_frames) and recorded_pre_buffer_frames:
+                self.save_thumbnail(recorded_pre_buffer_frames[-1], full_file_path) # no motion frames, use latest pre-buffer frame
+
+            if clip_index is not None:
+                clip_index.write(full_file_path)
+
             duration_ms = (dt.now().timestamp() - timestamp) * 1000
             logger.info(f"[{cam_name}] Combined video saved as {full_file_path} ({duration_ms:.3f} ms)")
 
-            # Handle FTP upload and local storage after video is complete
-            upload_and_cleanup(cam_name, full_file_path, 
-                              self.ftp_upload_video, self.save_video_locally, self.video_path)
+            clip_info = {
+                "start_ts": motion_start_timestamp - len(recorded_pre_buffer_frames) / float(video_fps),
+                "duration": frames_written / float(video_fps),
+                "peak_motion": peak_motion_percent,
+                "motion": motion,
+                "fps": video_fps
+            }
+
+            # Handle transcode, FTP upload and local storage after video is complete
+            self.finish_video(cam_index, full_file_path, clip_info)
+            self.record_stage("event_finalise", (dt.now().timestamp() - timestamp) * 1000)
             
         except Exception as e:
-            logger.error(f"[{cam_name}] Failed to process combined video {full_file_path} ({repr(e)})")
+            logger.error(f"[{cam_name}] Failed to process combined video {full_file_path or motion_video_path} ({repr(e)})")
             
             # Clean up files on error
-            for path in [full_file_path, motion_video_path]:
+            paths = [motion_video_path]
+            if full_file_path:
+                paths += [full_file_path, sidecar_path(full_file_path, ".jpg"), sidecar_path(full_file_path, CLIP_INDEX_SUFFIX)]
+            for path in paths:
                 if path and os.path.exists(path):
                     try:
                         os.remove(path)
@@ -168,50 +285,288 @@ class CameraManager:
                 except:
                     pass
 
-    def motion_percent_mog2(self, mog2, frame, downscale, thr_bin=200, blur_ksize=3):
+            # pre-buffer frames are owned by this job since motion start, give them back for reuse
+            if frame_pool is not None:
+                for frame in pre_buffer_frames:
+                    frame_pool.release(frame)
+
+    def finalize_recorded_video(self, cam_index, video_path, first_motion_jpeg, clip_info, clip_index=None):
+        """Finish video that is already complete on disk (passthrough, continuous segment): thumbnail, index, optional transcode, upload"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        timestamp = dt.now().timestamp()
+        try:
+            if first_motion_jpeg is not None:
+                self.save_thumbnail(cv2.imdecode(first_motion_jpeg, cv2.IMREAD_COLOR), video_path)
+            if clip_index is not None:
+                clip_index.write(video_path)
+
+            self.finish_video(cam_index, video_path, clip_info)
+            self.record_stage("event_finalise", (dt.now().timestamp() - timestamp) * 1000)
+
+        except Exception as e:
+            logger.error(f"[{cam_name}] Failed to finalize video {video_path} ({repr(e)})")
+            for path in [video_path, sidecar_path(video_path, ".jpg"), sidecar_path(video_path, CLIP_INDEX_SUFFIX)]:
+                if path and os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except:
+                        pass
+
+    def finish_video(self, cam_index, video_path, clip_info):
+        """Optional transcode (now, or deferred to idle time by scheduler), then FTP upload and local storage"""
+        settings = transcode_settings(self.camera_configs[cam_index])
+        upload, transcode_and_upload = self.finish_actions(cam_index, clip_info, settings)
+
+        if settings is None:
+            upload(video_path)
+        elif self.transcode_scheduler is not None:
+            self.transcode_scheduler.submit(self.camera_configs[cam_index]["NAME"], self.camera_configs[cam_index].get("TRANSCODE_PRIORITY", 0), video_path,
+                                            run=transcode_and_upload, fallback=upload, metadata={"clip_info": clip_info})
+        else:
+            transcode_and_upload(video_path)
+
+    def finish_actions(self, cam_index, clip_info, settings):
+        """(upload(path), transcode_and_upload(path)) finishing video of the camera"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+
+        def upload(path):
+            clip_id = upload_and_cleanup(cam_name, path, self.ftp_upload_video, self.save_video_locally, self.storage, clip_info)
+            if clip_info.get("motion", True): # continuous segments without motion are not announced
+                self.emit_event(EVENT_CLIP_READY, cam_index, clip=os.path.basename(path), clip_id=clip_id,
+                                url=f"/recordings/{clip_id}" if clip_id is not None else None,
+                                start_ts=clip_info["start_ts"], duration=clip_info["duration"], peak_motion=clip_info["peak_motion"])
+
+        def transcode_and_upload(path):
+            transcoded_path = self.transcode_video_file(cam_index, path, settings, clip_info.get("fps"))
+            refresh_keyframes(transcoded_path) # offsets of new file
+            upload(transcoded_path)
+
+        return upload, transcode_and_upload
+
+    def recover_transcode_job(self, cam_name, metadata):
+        """(run, fallback) of video left in transcode spool by previous run (TranscodeScheduler.start), None for unknown camera"""
+        cam_index = next((i for i, cam_config in enumerate(self.camera_configs) if cam_config["NAME"] == cam_name), None)
+        if cam_index is None:
+            return None
+        settings = transcode_settings(self.camera_configs[cam_index])
+        upload, transcode_and_upload = self.finish_actions(cam_index, metadata["clip_info"], settings)
+        return (transcode_and_upload if settings is not None else upload), upload
+
+    def transcode_video_file(self, cam_index, video_path, settings, video_fps=None):
+        """Re-encode finished video into compact codec, keeps the original if transcode fails"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        base_path = os.path.splitext(video_path)[0]
+        source_path = base_path + "_intermediate" + os.path.splitext(video_path)[1]
+        os.replace(video_path, source_path)
+
+        if video_fps is None: # otherwise clip was recorded at reduced FPS (resource governor)
+            if self.camera_configs[cam_index]["FPS_LIMITER"] != 0:
+                video_fps = self.camera_configs[cam_index]["FPS_LIMITER"]
+            else:
+                video_fps = self.camera_configs[cam_index]["FPS"]
+
+        try:
+            logger.info(f"[{cam_name}] Transcoding {video_path} ({settings['codec']}) ...")
+            timestamp = dt.now().timestamp()
+            transcoded_path = transcode_video(cam_name, source_path, base_path, video_fps,
+                                              (self.camera_configs[cam_index]["FRAME_WIDTH"], self.camera_configs[cam_index]["FRAME_HEIGHT"]), settings)
+            duration_ms = (dt.now().timestamp() - timestamp) * 1000
+            logger.info(f"[{cam_name}] Transcoded video saved as {transcoded_path} ({duration_ms:.3f} ms)")
+            os.remove(source_path)
+            return transcoded_path
+        except Exception as e:
+            logger.error(f"[{cam_name}] Transcode failed, keeping original video ({repr(e)})")
+            os.replace(source_path, video_path)
+            return video_path
+
+    def motion_percent_mog2(self, mog2, frame, downscale, thr_bin=200, blur_ksize=3, buffers=None):
         """
         Returns percentage of moving pixels (0..100) on a downscaled grayscale view.
+        Intermediates are written into `buffers` (dict kept by caller between frames) via dst=, so they are allocated only once.
         """
+        if buffers is None:
+            buffers = {}
+
         h, w = frame.shape[:2]
         ds_w = max(1, int(round(w / downscale)))
         ds_h = max(1, int(round(h / downscale)))
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        small = cv2.resize(gray, (ds_w, ds_h), interpolation=cv2.INTER_AREA)
+        gray = buffers["gray"] = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffers.get("gray"))
+        small = buffers["small"] = cv2.resize(gray, (ds_w, ds_h), dst=buffers.get("small"), interpolation=cv2.INTER_AREA)
         if blur_ksize:
-            small = cv2.GaussianBlur(small, (blur_ksize, blur_ksize), 0)
+            small = buffers["blur"] = cv2.GaussianBlur(small, (blur_ksize, blur_ksize), 0, dst=buffers.get("blur"))
 
-        fg = mog2.apply(small, learningRate=0.01)
-        _, mask = cv2.threshold(fg, thr_bin, 255, cv2.THRESH_BINARY)
+        fg = buffers["fg"] = mog2.apply(small, fgmask=buffers.get("fg"), learningRate=0.01)
+        _, mask = cv2.threshold(fg, thr_bin, 255, cv2.THRESH_BINARY, dst=buffers.get("mask"))
+        buffers["mask"] = mask
 
         moving = cv2.countNonZero(mask)
         return (moving / float(mask.size)) * 100.0
 
+    def emit_event(self, event_type, cam_index, **data):
+        """Queue notification for event sinks (never blocks camera thread)"""
+        if self.event_bus is not None:
+            self.event_bus.emit(event_type, self.camera_configs[cam_index]["NAME"], **data)
+
+    def verification_enabled(self, cam_index):
+        return self.verifier is not None and self.camera_configs[cam_index].get("VERIFY_ENABLED", False)
+
+    def start_verification(self, cam_index, reference, frame_counter):
+        """Verification of motion which just started recording: VERIFY_FRAMES frames spread over VERIFY_WINDOW_SECONDS"""
+        cam_config = self.camera_configs[cam_index]
+        fps = cam_config["FPS_LIMITER"] if cam_config["FPS_LIMITER"] != 0 else cam_config["FPS"]
+        count = max(1, int(cam_config.get("VERIFY_FRAMES", 4)))
+        step = max(1, int(round(cam_config.get("VERIFY_WINDOW_SECONDS", 0.5) * fps / count)))
+        return {"reference": reference, "frames": [], "count": count, "step": step, "next_frame": frame_counter + step,
+                "future": None, "start": time.monotonic()}
+
+    def sample_verification(self, cam_index, verification, frame, frame_counter):
+        """Add downscaled frame (without HUD) to running verification, complete set is checked in process pool"""
+        if verification["future"] is not None or frame_counter < verification["next_frame"]:
+            return
+        verification["frames"].append(downscale_frame(frame))
+        verification["next_frame"] += verification["step"]
+        if len(verification["frames"]) == verification["count"]:
+            cam_config = self.camera_configs[cam_index]
+            try:
+                verification["future"] = self.verifier.submit(cam_config["NAME"], verification["reference"], verification["frames"],
+                                                              cam_config.get("VERIFY_MIN_BLOB_PERCENT", 0.3), cam_config.get("VERIFY_MIN_PERSISTENCE", 2))
+            except Exception as e:
+                logger.warning(f"[{cam_config['NAME']}] Motion verification not started ({repr(e)})")
+                verification["next_frame"] = math.inf # recording stays unverified
+
+    def verification_verdict(self, cam_index, verification):
+        """Result of finished verification (verify.verify_event), None when check failed"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        try:
+            verdict = verification["future"].result()
+        except Exception as e:
+            logger.warning(f"[{cam_name}] Motion verification failed, recording kept ({repr(e)})")
+            return None
+        logger.info(f"[{cam_name}] Motion {'confirmed' if verdict['real'] else 'not confirmed'} ({verdict['reason']}, "
+                    f"blob {verdict['peak_blob_percent']:.2f}%, {verdict['persistent_frames']}/{verdict['frames']} frames, "
+                    f"{(time.monotonic() - verification['start']) * 1000:.0f} ms after motion start)")
+        return verdict
+
+    def publish_frame(self, cam_index, frame, capture_ts, motion_percent):
+        """Copy frame (main stream resolution, None = corrupted payload) into camera's shared memory ring for other processes (framebus.FrameBusReader)"""
+        if frame is None:
+            return
+        frame_bus = self.frame_buses[cam_index]
+        if frame_bus is not None and frame_bus.shape != frame.shape:
+            self.close_frame_bus(cam_index) # resolution changed (restart with new config)
+            frame_bus = None
+        try:
+            if frame_bus is None:
+                frame_bus = self.frame_buses[cam_index] = FrameBusWriter(self.camera_configs[cam_index]["NAME"], frame.shape)
+                logger.info(f"[{self.camera_configs[cam_index]['NAME']}] Publishing frames to /dev/shm/{frame_bus.name} ({frame.shape[1]}x{frame.shape[0]})")
+            frame_start = dt.now().timestamp()
+            frame_bus.publish(frame, dt.now().timestamp(), capture_ts, motion_percent)
+            self.record_stage("frame_bus", (dt.now().timestamp() - frame_start) * 1000)
+        except Exception as e:
+            logger.error(f"[{self.camera_configs[cam_index]['NAME']}] Failed to publish frame to frame bus ({repr(e)})")
+            self.close_frame_bus(cam_index)
+
+    def close_frame_bus(self, cam_index):
+        if self.frame_buses[cam_index] is not None:
+            try:
+                self.frame_buses[cam_index].close()
+            except Exception as e:
+                logger.warning(f"[{self.camera_configs[cam_index]['NAME']}] Failed to close frame bus ({repr(e)})")
+            self.frame_buses[cam_index] = None
+
+    def create_background_model(self, cam_index, name):
+        """Checkpointed background model, restored only when it differs from the scene well below camera's motion threshold"""
+        max_changed_percent = min(BACKGROUND_MATCH_MAX_PERCENT,
+                                  self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"] * BACKGROUND_MATCH_THRESHOLD_FACTOR)
+        return BackgroundModel(name, os.path.join(BACKGROUND_PATH_IN_RAM, f"{name}.npy"), max_changed_percent=max_changed_percent)
+
+    def get_skip_detection_seconds(self, cam_index):
+        """Detection warm-up: short when background model was restored from checkpoint"""
+        background_model = self.background_models[cam_index]
+        if background_model is not None and background_model.warm_started:
+            return min(WARM_START_SKIP_SECONDS, self.skip_detection_seconds)
+        return self.skip_detection_seconds
+
+    def start_detection_stream(self, cam_index):
+        """Start detection thread on DETECTION_SOURCE substream (if configured), returns DetectionStream or None"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        detection_stream = None
+        if self.detection_cap_array[cam_index] is not None:
+            detection_config = self.get_detection_config(cam_index)
+            detection_subtractor = self.background_models[cam_index] = self.create_background_model(cam_index, detection_config["NAME"])
+            substream_buffers = {}
+            substream_start = time.monotonic()
+
+            def detect_substream(detection_frame):
+                downscale = self.camera_configs[cam_index]["DETECTION_SOURCE"].get("MOTION_DETECTION_DOWNSCALE", self.camera_configs[cam_index]["MOTION_DETECTION_DOWNSCALE"]) # live (config reload)
+                substream_motion_percent = self.motion_percent_mog2(detection_subtractor, detection_frame, downscale=downscale, buffers=substream_buffers)
+                if self.analytics is not None and time.monotonic() - substream_start > self.get_skip_detection_seconds(cam_index):
+                    self.analytics.add_motion_mask(cam_name, substream_buffers["mask"])
+                return substream_motion_percent
+
+            detection_stream = DetectionStream(
+                cam_name,
+                self.detection_cap_array[cam_index],
+                detect_substream,
+                detection_config["MOTION_DETECTION_FRAME_STEP"]
+            )
+            detection_stream.start()
+            logger.info(f"[{cam_name}] Motion detection running on substream {detection_config['DEVICE_PATH']}")
+        self.detection_streams[cam_index] = detection_stream
+        return detection_stream
+
     def cam_worker(self, cam_index):
-        cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
+        cam_name = self.camera_configs[cam_index]["NAME"]
 
-        if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-            buffer_frames = CAMERA_CONFIGS[cam_index]["PRE_MOTION_SECONDS"] * CAMERA_CONFIGS[cam_index]["FPS_LIMITER"]
-        else:
-            buffer_frames = CAMERA_CONFIGS[cam_index]["PRE_MOTION_SECONDS"] * CAMERA_CONFIGS[cam_index]["FPS"]
+        buffer_frames = seconds_to_frames(self.camera_configs[cam_index], "PRE_MOTION_SECONDS")
+
+        # PASSTHROUGH keeps camera JPEG payloads (pre-buffer and video), frames are decoded only for detection/preview
+        passthrough = encoder_settings(self.camera_configs[cam_index])["codec"] == PASSTHROUGH_CODEC
+        passthrough_fallback_logged = False
+        first_motion_jpeg = None
 
         frame_buffer = deque(maxlen = buffer_frames)
+        motion_history = deque(maxlen = buffer_frames)  # motion percent of every pre-buffer frame (for clip index)
+        burst_ring = self.burst_rings[cam_index] = deque(maxlen = buffer_frames)
+        clip_index = None
+        record_step = 1  # recording at FPS / record_step (resource governor)
+        frame_pacer = None  # keeps recording in real time (drops/duplicates frames by capture timestamp)
         pre_buffer_frames = []  # Store pre-buffer frames when motion starts
+        detection_buffers = {}  # motion detection intermediates, reused every frame
+        camera_fps = self.camera_configs[cam_index]["FPS_LIMITER"] if self.camera_configs[cam_index]["FPS_LIMITER"] != 0 else self.camera_configs[cam_index]["FPS"]
+        verify_reference_step = max(1, int(camera_fps * VERIFY_REFERENCE_INTERVAL_SECONDS))
+        verify_references = deque(maxlen=2)  # downscaled frames without HUD from 1-2 s before motion (VERIFY_ENABLED)
+        verification = None  # running second stage check of current recording (see start_verification)
+        event_verified = None  # verification verdict of current recording (None = not verified)
+
+        # capture buffers recycled through pre-buffer ring (not for passthrough, payload sizes vary)
+        frame_pool = None
+        if not passthrough and self.camera_configs[cam_index].get("FRAME_POOL_ENABLED", True):
+            frame_pool = FramePool(
+                (self.camera_configs[cam_index]["FRAME_HEIGHT"], self.camera_configs[cam_index]["FRAME_WIDTH"], 3),
+                buffer_frames + 2  # ring + frame being processed + frame waiting for release
+            )
+        self.frame_pools[cam_index] = frame_pool
+        # motion detection on separate low-res substream, main stream only feeds pre-buffer/recording
+        detection_stream = self.start_detection_stream(cam_index)
+
+        pending_release = None  # frame evicted from ring, released one frame later (preview may still be encoding it)
         video_writer = None  # Active VideoWriter during recording
         temp_video_path = None  # Path to temporary video file
-        background_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=80, 
-            varThreshold=32, 
-            detectShadows=False
-        )
+        background_subtractor = self.create_background_model(cam_index, cam_name)
+        if detection_stream is None:
+            self.background_models[cam_index] = background_subtractor
         post_motion_frame_count = 0
         motion_percent = 0
         previous_motion_percent = 0
+        peak_motion_percent = 0
         motion_frames = 0
         no_motion_frames = 0
         motion_start_datetime_string = ""
         frame_counter = 0
         first_movement_detection_timestamp = None
+        motion_end_timestamp = None
         self.state_array[cam_index] = State.DETECTING
         
         # FPS counter variables
@@ -222,23 +577,59 @@ class CameraManager:
         skip_detection_timestamp = dt.now().timestamp()
         skip_detection_flag = True
 
-        if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-            frame_duration_expected = 1.0 / float(CAMERA_CONFIGS[cam_index]["FPS_LIMITER"])
-            frame_timestamp = dt.now().timestamp()
+        fps_limiter = FpsLimiter(self.camera_configs[cam_index]["FPS_LIMITER"]) if self.camera_configs[cam_index]["FPS_LIMITER"] != 0 else None
+        capture_clock = CaptureClock()
 
         while not self.stop_event.is_set():
-            if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-                frame_timestamp = dt.now().timestamp()
+            # restart with new capture config, but never in the middle of a recording
+            if self.restart_requests[cam_index].is_set() and self.state_array[cam_index] == State.DETECTING:
+                return
 
             # Measure frame capture time
             capture_start = dt.now().timestamp()
-            ret, frame = self.cap_array[cam_index].read()
+            if frame_pool is not None:
+                slot = frame_pool.acquire()
+                ret, frame = self.cap_array[cam_index].read(slot)
+                if frame is not slot:
+                    frame_pool.release(slot) # backend allocated its own (e.g. resolution differs from config)
+            else:
+                ret, frame = self.cap_array[cam_index].read()
+            capture_ts = capture_clock.timestamp(self.cap_array[cam_index]) # same clock as detection substream, used for alignment and pacing
             capture_duration = (dt.now().timestamp() - capture_start) * 1000
+            self.record_stage("capture", capture_duration)
             
             if not ret:
                 logger.error(f"[{cam_name}] Empty frame")
                 return
+
+            if detection_stream is not None and detection_stream.failed:
+                return # both streams are reopened by cam_loop
+
+            if frame_counter == 0:
+                self.check_cached_negotiation(cam_index, frame)
+                self.log_startup_milestone(cam_index, "first frame")
             
+            jpeg = None
+            substream_stand_in = False  # frame is substream frame shown instead of undecoded main stream payload
+            if passthrough:
+                if frame.ndim == 2 and frame.shape[0] == 1:
+                    # raw MJPG payload (CAP_PROP_CONVERT_RGB disabled in init_cam)
+                    jpeg = frame
+                    # with substream, main stream payload is never decoded (HUD/preview use substream frame)
+                    frame = detection_stream.latest_frame() if detection_stream is not None else None
+                    substream_stand_in = frame is not None
+                    if frame is None:
+                        frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+                    if frame is None:
+                        logger.warning(f"[{cam_name}] Corrupted JPEG frame, skipping")
+                        continue
+                else:
+                    # backend decoded the frame anyway, payload has to be re-encoded
+                    if not passthrough_fallback_logged:
+                        logger.warning(f"[{cam_name}] Camera does not deliver raw MJPG payload, passthrough falls back to JPEG encoding")
+                        passthrough_fallback_logged = True
+                    _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
             frame_counter += 1
             logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Frame capture ({capture_duration:.3f} ms)")
 
@@ -251,18 +642,37 @@ class CameraManager:
                 fps_last_second = current_second
 
             # Optimize frame processing - only do motion detection on specified frames
-            motion_detection_frame = frame_counter % (CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_FRAME_STEP"]) == 0
+            motion_detection_frame = frame_counter % (self.camera_configs[cam_index]["MOTION_DETECTION_FRAME_STEP"] * self.detection_step_factor(cam_index)) == 0
             
-            if motion_detection_frame:
+            if detection_stream is not None:
+                detection_stream.step_factor = self.detection_step_factor(cam_index)
+                substream_motion_percent = detection_stream.motion_at(capture_ts)
+                if substream_motion_percent is not None:
+                    motion_percent = substream_motion_percent
+                logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Substream motion -> {motion_percent:.2f}% moving")
+            elif motion_detection_frame:
                 # Measure motion detection time
                 motion_start = dt.now().timestamp()
                 # thr_bin and blur_ksize are just chatgpt numbers, they work, I dont modify them
-                motion_percent = self.motion_percent_mog2(background_subtractor, frame, downscale=CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_DOWNSCALE"])
+                motion_percent = self.motion_percent_mog2(background_subtractor, frame, downscale=self.camera_configs[cam_index]["MOTION_DETECTION_DOWNSCALE"], buffers=detection_buffers)
+                if self.analytics is not None and not skip_detection_flag:
+                    self.analytics.add_motion_mask(cam_name, detection_buffers["mask"])
                 motion_duration = (dt.now().timestamp() - motion_start) * 1000
+                self.record_stage("motion_detection", motion_duration)
                 logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Motion detection ({motion_duration:.3f} ms) -> {motion_percent:.2f}% moving")
             else:
                 logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Skipping motion detection")
 
+            if self.camera_configs[cam_index].get("FRAME_BUS_ENABLED", False):
+                self.publish_frame(cam_index, cv2.imdecode(jpeg, cv2.IMREAD_COLOR) if substream_stand_in else frame, capture_ts, motion_percent) # before HUD is drawn into it
+            elif self.frame_buses[cam_index] is not None:
+                self.close_frame_bus(cam_index) # disabled by config reload
+
+            if verification is not None:
+                self.sample_verification(cam_index, verification, frame, frame_counter)
+            elif self.verification_enabled(cam_index) and self.state_array[cam_index] == State.DETECTING and frame_counter % verify_reference_step == 0:
+                verify_references.append(downscale_frame(frame))
+
             # draw HUD
             hud_start = dt.now().timestamp()
             self.current_frame[cam_index] = draw_hud(
@@ -274,18 +684,63 @@ class CameraManager:
                 f"{motion_percent:.2f}%" if SHOW_MOTION_PERCENT_ON_FRAME else "",
                 ""
             )
+            self.frame_seq[cam_index] += 1
             hud_duration = (dt.now().timestamp() - hud_start) * 1000
+            self.record_stage("hud", hud_duration)
             
             buffer_start = dt.now().timestamp()
-            frame_buffer.append(self.current_frame[cam_index]) # no need for .copy()
+            evicted = frame_buffer[0] if frame_buffer.maxlen and len(frame_buffer) == frame_buffer.maxlen else None
+            frame_buffer.append(jpeg if passthrough else self.current_frame[cam_index]) # no need for .copy()
+            motion_history.append(motion_percent)
+            burst_ring.append((capture_ts, jpeg if passthrough else self.current_frame[cam_index], passthrough))
+            if frame_pool is not None:
+                if frame_buffer.maxlen == 0:
+                    evicted = self.current_frame[cam_index]
+                frame_pool.release(pending_release)
+                pending_release = evicted
             buffer_duration = (dt.now().timestamp() - buffer_start) * 1000
+            self.record_stage("buffer_append", buffer_duration)
             
             logger.debug(f"[{cam_name}] [Frame #{frame_counter}] HUD draw ({hud_duration:.3f} ms), Buffer append ({buffer_duration:.3f} ms)")
 
+            # second stage check finished: spurious motion is cancelled or its clip is kept without motion tag
+            if verification is not None and verification["future"] is not None and verification["future"].done():
+                verdict = self.verification_verdict(cam_index, verification)
+                verification = None
+                if verdict is not None:
+                    event_verified = verdict["real"]
+                if event_verified is False and self.camera_configs[cam_index].get("VERIFY_ACTION", VERIFY_ACTION_TAG) == VERIFY_ACTION_CANCEL:
+                    logger.info(f"[{cam_name}] Recording cancelled")
+                    if video_writer is not None:
+                        try:
+                            video_writer.release()
+                        except Exception as e:
+                            logger.warning(f"[{cam_name}] Failed to close video writer of cancelled recording ({repr(e)})")
+                        video_writer = None
+                    if temp_video_path and os.path.exists(temp_video_path):
+                        os.remove(temp_video_path)
+                    if frame_pool is not None:
+                        for pre_buffer_frame in pre_buffer_frames:
+                            frame_pool.release(pre_buffer_frame)
+                    self.emit_event(EVENT_MOTION_STOP, cam_index, start_ts=first_movement_detection_timestamp, end_ts=dt.now().timestamp(),
+                                    peak_motion=peak_motion_percent, clip="", verified=False)
+
+                    previous_motion_percent = 0
+                    motion_frames = 0
+                    no_motion_frames = 0
+                    pre_buffer_frames.clear()
+                    first_motion_jpeg = None
+                    clip_index = None
+                    first_movement_detection_timestamp = None
+                    temp_video_path = None
+                    event_verified = None
+                    self.state_array[cam_index] = State.DETECTING
+
             if skip_detection_flag:
-                if dt.now().timestamp() - skip_detection_timestamp > SKIP_DETECTION_SECONDS:
+                if dt.now().timestamp() - skip_detection_timestamp > self.get_skip_detection_seconds(cam_index):
                     skip_detection_flag = False
-                    logger.info(f"[{cam_name}] Motion detection enabled (SKIP_DETECTION_SECONDS elapsed)")
+                    logger.info(f"[{cam_name}] Motion detection enabled ({'background model restored' if self.background_models[cam_index].warm_started else 'SKIP_DETECTION_SECONDS elapsed'})")
+                    self.log_startup_milestone(cam_index, "first detected frame")
 
             # stabilize frame detector first
             if not skip_detection_flag: 
@@ -293,11 +748,11 @@ class CameraManager:
                 logic_start = dt.now().timestamp()
                 
                 # increase or reset motion_frames/no_motion_frames if needed
-                if motion_percent >= CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"] and previous_motion_percent >= CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]:
+                if motion_percent >= self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"] and previous_motion_percent >= self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]:
                     motion_frames += 1
                     no_motion_frames = 0 
 
-                elif motion_percent < CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"] and previous_motion_percent < CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]:
+                elif motion_percent < self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"] and previous_motion_percent < self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]:
                     no_motion_frames += 1 
                     motion_frames = 0
                     
@@ -311,35 +766,63 @@ class CameraManager:
                 previous_motion_percent = motion_percent
                 
                 # Movement detected, switching into RECORDING state
-                if self.state_array[cam_index] == State.DETECTING and motion_frames >= CAMERA_CONFIGS[cam_index]["NUMBER_OF_FRAMES_WITH_MOTION"] - 1:
+                if self.state_array[cam_index] == State.DETECTING and motion_frames >= self.camera_configs[cam_index]["NUMBER_OF_FRAMES_WITH_MOTION"] - 1:
                     logger.info(f"[{cam_name}] Motion detected")
                     no_motion_frames = 0 # prep. for no motion detection
                     self.state_array[cam_index] = State.RECORDING
                     motion_start_datetime_string = self.get_datetime_string()
+                    peak_motion_percent = motion_percent
+                    self.emit_event(EVENT_MOTION_START, cam_index, start_ts=dt.now().timestamp(), motion_percent=motion_percent)
+                    if self.verification_enabled(cam_index) and verify_references:
+                        verification = self.start_verification(cam_index, verify_references[0], frame_counter)
                     
                     # Quick copy of pre-buffer frames (couple ms operation)
                     pre_buffer_frames = list(frame_buffer)  # convert deque into list (and copy), <1ms event
+                    frame_buffer.clear()  # frames are now owned by recording (pooled buffers must not be recycled under it)
+                    burst_ring.clear()
                     
+                    # resource governor may ask for reduced FPS (every record_step-th frame) for this recording
+                    record_step = self.record_step(cam_index)
+
                     # Start VideoWriter immediately for streaming recording
                     try:
                         writer_start_timestamp = dt.now().timestamp()
                         self.ensure_ram_dirs()
-                        file_name = f"{cam_name}_{motion_start_datetime_string}_temp.mp4"
-                        temp_video_path = os.path.join(VIDEO_PATH_IN_RAM, file_name)
-                        
-                        if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-                            video_fps = CAMERA_CONFIGS[cam_index]["FPS_LIMITER"]
+                        if self.camera_configs[cam_index]["FPS_LIMITER"] != 0:
+                            video_fps = self.camera_configs[cam_index]["FPS_LIMITER"] / float(record_step)
                         else:
-                            video_fps = CAMERA_CONFIGS[cam_index]["FPS"]
+                            video_fps = self.camera_configs[cam_index]["FPS"] / float(record_step)
+                        pre_buffer_seconds = len(subsample(pre_buffer_frames, record_step)) / float(video_fps)
+
+                        # motion index of the clip, pre-buffer part first (same frame order as in the video)
+                        clip_index = ClipIndexBuilder(video_fps, dt.now().timestamp() - pre_buffer_seconds)
+                        clip_index.extend(subsample(motion_history, record_step), state_string[State.DETECTING])
+                        motion_history.clear()
+                        frame_pacer = FramePacer(video_fps, capture_ts)
                         
-                        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-                        video_writer = cv2.VideoWriter(
-                            temp_video_path, 
-                            fourcc, 
-                            video_fps, 
-                            (CAMERA_CONFIGS[cam_index]["FRAME_WIDTH"], CAMERA_CONFIGS[cam_index]["FRAME_HEIGHT"])
-                        )
+                        if passthrough:
+                            # final video is written directly, pre-buffer payloads go first (plain file writes)
+                            video_writer = create_video_writer(
+                                cam_name,
+                                os.path.join(VIDEO_PATH_IN_RAM, f"{cam_name}_{motion_start_datetime_string}"),
+                                video_fps, 
+                                (self.camera_configs[cam_index]["FRAME_WIDTH"], self.camera_configs[cam_index]["FRAME_HEIGHT"]),
+                                encoder_settings(self.camera_configs[cam_index])
+                            )
+                            for pre_buffer_jpeg in subsample(pre_buffer_frames, record_step):
+                                video_writer.write_jpeg(pre_buffer_jpeg)
+                            first_motion_jpeg = jpeg
+                        else:
+                            video_writer = create_video_writer(
+                                cam_name,
+                                os.path.join(VIDEO_PATH_IN_RAM, f"{cam_name}_{motion_start_datetime_string}_temp"),
+                                video_fps, 
+                                (self.camera_configs[cam_index]["FRAME_WIDTH"], self.camera_configs[cam_index]["FRAME_HEIGHT"]),
+                                encoder_settings(self.camera_configs[cam_index])
+                            )
+                        temp_video_path = video_writer.path
                         writer_duration_ms = (dt.now().timestamp() - writer_start_timestamp) * 1000
+                        self.record_stage("writer_open", writer_duration_ms)
                         logger.info(f"[{cam_name}] Started streaming video writer: {temp_video_path} ({writer_duration_ms:.3f} ms)")
                     except Exception as e:
                         logger.error(f"[{cam_name}] Failed to start video writer: {repr(e)}")
@@ -350,23 +833,34 @@ class CameraManager:
 
                 elif self.state_array[cam_index] == State.RECORDING:
                     # Movement not detected, switching into POST_RECORDING state
-                    if no_motion_frames >= CAMERA_CONFIGS[cam_index]["NUMBER_OF_FRAMES_WITH_NO_MOTION"] - 1:
+                    if no_motion_frames >= self.camera_configs[cam_index]["NUMBER_OF_FRAMES_WITH_NO_MOTION"] - 1:
                         logger.info(f"[{cam_name}] Motion stopped")
+                        motion_end_timestamp = dt.now().timestamp()
                         self.state_array[cam_index] = State.POST_RECORDING
                         post_motion_frame_count = 0 # prep for POST_MOTION
                     # Split video if movement is taking too long (to prevent excessive RAM consumption)
                     elif dt.now().timestamp() - first_movement_detection_timestamp > MAX_VIDEO_LENGTH_SECONDS:
                         logger.warning(f"[{cam_name}] Max video length reached ({MAX_VIDEO_LENGTH_SECONDS} s). If the motion persists, it will simply create new video with motion.")
+                        motion_end_timestamp = dt.now().timestamp()
                         self.state_array[cam_index] = State.POST_RECORDING
                         post_motion_frame_count = 0 # prep for POST_MOTION
                     
                 # Write frames directly to video during RECORDING and POST_RECORDING
                 if self.state_array[cam_index] == State.RECORDING or self.state_array[cam_index] == State.POST_RECORDING:
+                    peak_motion_percent = max(peak_motion_percent, motion_percent)
+
                     if video_writer is not None:
                         try:
                             frame_write_start = dt.now().timestamp()
-                            video_writer.write(self.current_frame[cam_index])
+                            # written 0x (camera faster than video FPS) up to Nx (frames were lost), so clip duration follows capture time
+                            for _ in range(frame_pacer.repeat(capture_ts)):
+                                if passthrough:
+                                    video_writer.write_jpeg(jpeg)
+                                else:
+                                    video_writer.write(self.current_frame[cam_index])
+                                clip_index.add_frame(motion_percent, state_string[self.state_array[cam_index]])
                             frame_write_duration_ms = (dt.now().timestamp() - frame_write_start) * 1000
+                            self.record_stage("frame_write", frame_write_duration_ms)
                             logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Frame write {frame_write_duration_ms:.3f} ms")
                         except Exception as e:
                             logger.error(f"[{cam_name}] [Frame #{frame_counter}] Failed to write frame to video: {repr(e)}")
@@ -374,46 +868,66 @@ class CameraManager:
                     if self.state_array[cam_index] == State.POST_RECORDING:
                         post_motion_frame_count += 1
                 
-                        if post_motion_frame_count == POST_EVENT_FRAMES[cam_index]:
+                        if post_motion_frame_count >= self.post_event_frames[cam_index]: # may be lowered by config reload
                             logger.info(f"[{cam_name}] Post motion frame count reached")
 
                             # Close the video writer and process the video
                             if video_writer is not None:
+                                recorded_frame_count = video_writer.frame_count if passthrough else 0
+                                if frame_pacer.duplicated or frame_pacer.dropped:
+                                    logger.debug(f"[{cam_name}] Frame pacing: {frame_pacer.duplicated} frames duplicated, {frame_pacer.dropped} dropped")
                                 try:
                                     writer_close_start = dt.now().timestamp()
                                     video_writer.release()
                                     video_writer = None
                                     close_duration_ms = (dt.now().timestamp() - writer_close_start) * 1000
+                                    self.record_stage("writer_close", close_duration_ms)
                                     logger.info(f"[{cam_name}] Video writer closed ({close_duration_ms:.3f} ms)")
                                 except Exception as e:
                                     logger.error(f"[{cam_name}] Failed to close video writer: {repr(e)}")
 
                             # Submit for post-processing (merge with pre-buffer)
-                            if temp_video_path:
-                                self.video_upload_executor.submit(self.post_process_video, cam_index, pre_buffer_frames.copy(), temp_video_path, motion_start_datetime_string)
+                            if temp_video_path and passthrough:
+                                clip_info = {
+                                    "start_ts": first_movement_detection_timestamp - pre_buffer_seconds,
+                                    "duration": recorded_frame_count / float(video_fps),
+                                    "peak_motion": peak_motion_percent,
+                                    "motion": event_verified is not False,
+                                    "fps": video_fps
+                                }
+                                self.submit_finalisation(self.finalize_recorded_video, cam_index, temp_video_path, first_motion_jpeg, clip_info, clip_index)
+                            elif temp_video_path:
+                                self.submit_finalisation(self.post_process_video, cam_index, pre_buffer_frames.copy(), temp_video_path, motion_start_datetime_string, first_movement_detection_timestamp, peak_motion_percent, frame_pool, clip_index, record_step, event_verified is not False)
                             
+                            if self.analytics is not None:
+                                self.analytics.add_event(cam_name, first_movement_detection_timestamp, motion_end_timestamp, peak_motion_percent,
+                                                         f"{cam_name}_{motion_start_datetime_string}" if temp_video_path else "")
+                            self.emit_event(EVENT_MOTION_STOP, cam_index, start_ts=first_movement_detection_timestamp, end_ts=motion_end_timestamp,
+                                            peak_motion=peak_motion_percent, clip=f"{cam_name}_{motion_start_datetime_string}" if temp_video_path else "",
+                                            verified=event_verified)
+
                             # Reset state
                             previous_motion_percent = 0
                             motion_frames = 0
                             no_motion_frames = 0
                             pre_buffer_frames.clear()
+                            first_motion_jpeg = None
+                            clip_index = None
                             first_movement_detection_timestamp = None
                             temp_video_path = None
+                            if verification is not None:
+                                logger.debug(f"[{cam_name}] Recording finished before motion verification")
+                                verification = None
+                            event_verified = None
 
                             self.state_array[cam_index] = State.DETECTING
                             
-            # Measure FPS limiting and overall loop performance
-            if CAMERA_CONFIGS[cam_index]["FPS_LIMITER"] != 0:
-                frame_duration = dt.now().timestamp() - frame_timestamp
-                
-                if frame_duration < frame_duration_expected:
-                    sleep_time = frame_duration_expected - frame_duration
-                    logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Applying FPS limiter (sleeping {sleep_time*1000:.3f} ms)")
-                    time.sleep(sleep_time)
-                elif frame_duration > frame_duration_expected and not skip_detection_flag:
-                    # NOTE: sometimes this pops up, but FPS counter still shows targeted FPS even during writing/rendering frames, commenting out for now
-                    #logger.warning(f"[{cam_name}] [Frame #{frame_counter}] Frame is taking too long to process")    
-                    pass
+            self.record_stage("frame_total", (dt.now().timestamp() - capture_start) * 1000)
+
+            # FPS limiting (sleep until next frame slot)
+            if fps_limiter is not None:
+                sleep_time = fps_limiter.wait()
+                logger.debug(f"[{cam_name}] [Frame #{frame_counter}] Applying FPS limiter (slept {sleep_time*1000:.3f} ms)")
             
         # Cleanup: Close video writer if still open
         if video_writer is not None:
@@ -423,16 +937,290 @@ class CameraManager:
             except Exception as e:
                 logger.error(f"[{cam_name}] Failed to close video writer on exit: {repr(e)}")
 
+    def continuous_worker(self, cam_index):
+        """
+        CONTINUOUS recording mode: every frame goes straight into fixed-length segment files (no pre-buffer in RAM),
+        segments are cut on frame count, so they follow each other without gap. Motion detection only tags segments.
+        """
+        cam_config = self.camera_configs[cam_index]
+        cam_name = cam_config["NAME"]
+        video_fps = cam_config["FPS_LIMITER"] if cam_config["FPS_LIMITER"] != 0 else cam_config["FPS"]
+        segment_frames = max(1, int(round(cam_config.get("SEGMENT_SECONDS", 60) * video_fps)))
+        settings = encoder_settings(cam_config)
+        passthrough = settings["codec"] == PASSTHROUGH_CODEC
+        passthrough_fallback_logged = False
+        self.burst_rings[cam_index] = None # no pre-buffer, bursts use live frames only
+
+        detection_stream = self.start_detection_stream(cam_index)
+        background_subtractor = self.create_background_model(cam_index, cam_name)
+        if detection_stream is None:
+            self.background_models[cam_index] = background_subtractor
+        detection_buffers = {}
+        frame_pool = None
+        if not passthrough and cam_config.get("FRAME_POOL_ENABLED", True):
+            frame_pool = FramePool((cam_config["FRAME_HEIGHT"], cam_config["FRAME_WIDTH"], 3), 2) # frame being written + frame in preview
+        self.frame_pools[cam_index] = frame_pool
+        pending_release = None
+
+        segment = None  # {"writer", "writer_frames", "step", "fps", "start_ts", "clip_index", "pacer", "motion", "peak_motion", "thumbnail_jpeg", "tag_since"}
+        motion_percent = 0
+        previous_motion_percent = 0
+        motion_frames = 0
+        no_motion_frames = 0
+        post_motion_frame_count = 0
+        motion_start_timestamp = None
+        motion_end_timestamp = None
+        event_peak_motion_percent = 0
+        frame_counter = 0
+        fps_counter = 0
+        fps_frame_count = 0
+        fps_last_second = int(dt.now().timestamp())
+        skip_detection_timestamp = dt.now().timestamp()
+        skip_detection_flag = True
+        fps_limiter = FpsLimiter(cam_config["FPS_LIMITER"]) if cam_config["FPS_LIMITER"] != 0 else None
+        capture_clock = CaptureClock()
+        self.state_array[cam_index] = State.DETECTING
+
+        # SAVE_VIDEO_LOCALLY off: segments without motion are uploaded only as pre-motion part of an event and nothing
+        # is stored to be tagged later, so they wait here until PRE_MOTION_SECONDS after their end decide it
+        held_segments = []  # {"end_ts", "args" of finalize_recorded_video}
+
+        def close_segment():
+            clip_info = {
+                "start_ts": segment["start_ts"],
+                "duration": segment["writer_frames"] / float(segment["fps"]),
+                "peak_motion": segment["peak_motion"],
+                "motion": segment["motion"],
+                "tag_since": segment["tag_since"],
+                "fps": segment["fps"],
+            }
+            writer_close_start = dt.now().timestamp()
+            segment["writer"].release()
+            self.record_stage("writer_close", (dt.now().timestamp() - writer_close_start) * 1000)
+            logger.info(f"[{cam_name}] Segment {segment['writer'].path} closed ({'motion' if segment['motion'] else 'no motion'})")
+            args = (segment["writer"].path, segment["thumbnail_jpeg"], clip_info, segment["clip_index"])
+            if not segment["motion"] and self.ftp_upload_video and not self.save_video_locally:
+                held_segments.append({"end_ts": clip_info["start_ts"] + clip_info["duration"], "args": args})
+            else:
+                self.submit_finalisation(self.finalize_recorded_video, cam_index, *args)
+
+        def release_held_segments(tag_since=None, release_all=False):
+            """Finalise held segments: overlapping tag_since as motion, those too old to be pre-motion part of any event as they are"""
+            decided_ts = dt.now().timestamp() - cam_config["PRE_MOTION_SECONDS"]
+            for held in list(held_segments):
+                tagged = tag_since is not None and held["end_ts"] > tag_since
+                if tagged or release_all or held["end_ts"] < decided_ts:
+                    held_segments.remove(held)
+                    if tagged:
+                        held["args"][2]["motion"] = True
+                        logger.info(f"[{cam_name}] Segment {held['args'][0]} tagged as pre-motion part of event")
+                    self.submit_finalisation(self.finalize_recorded_video, cam_index, *held["args"])
+
+        try:
+            while not self.stop_event.is_set() and not self.restart_requests[cam_index].is_set():
+                capture_start = dt.now().timestamp()
+                if frame_pool is not None:
+                    slot = frame_pool.acquire()
+                    ret, frame = self.cap_array[cam_index].read(slot)
+                    if frame is not slot:
+                        frame_pool.release(slot)
+                else:
+                    ret, frame = self.cap_array[cam_index].read()
+                capture_ts = capture_clock.timestamp(self.cap_array[cam_index])
+                self.record_stage("capture", (dt.now().timestamp() - capture_start) * 1000)
+
+                if not ret:
+                    logger.error(f"[{cam_name}] Empty frame")
+                    return
+                if detection_stream is not None and detection_stream.failed:
+                    return
+                if frame_counter == 0:
+                    self.check_cached_negotiation(cam_index, frame)
+                    self.log_startup_milestone(cam_index, "first frame")
+
+                jpeg = None
+                substream_stand_in = False
+                if passthrough:
+                    if frame.ndim == 2 and frame.shape[0] == 1:
+                        jpeg = frame
+                        frame = detection_stream.latest_frame() if detection_stream is not None else None
+                        substream_stand_in = frame is not None
+                        if frame is None:
+                            frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+                        if frame is None:
+                            logger.warning(f"[{cam_name}] Corrupted JPEG frame, skipping")
+                            continue
+                    else:
+                        if not passthrough_fallback_logged:
+                            logger.warning(f"[{cam_name}] Camera does not deliver raw MJPG payload, passthrough falls back to JPEG encoding")
+                            passthrough_fallback_logged = True
+                        _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+                frame_counter += 1
+                current_second = int(dt.now().timestamp())
+                fps_frame_count += 1
+                if current_second != fps_last_second:
+                    fps_counter = fps_frame_count - 1
+                    fps_frame_count = 1
+                    fps_last_second = current_second
+
+                # motion detection (substream or every MOTION_DETECTION_FRAME_STEP-th frame)
+                if detection_stream is not None:
+                    detection_stream.step_factor = self.detection_step_factor(cam_index)
+                    substream_motion_percent = detection_stream.motion_at(capture_ts)
+                    if substream_motion_percent is not None:
+                        motion_percent = substream_motion_percent
+                elif frame_counter % (cam_config["MOTION_DETECTION_FRAME_STEP"] * self.detection_step_factor(cam_index)) == 0:
+                    motion_start = dt.now().timestamp()
+                    motion_percent = self.motion_percent_mog2(background_subtractor, frame, downscale=cam_config["MOTION_DETECTION_DOWNSCALE"], buffers=detection_buffers)
+                    self.record_stage("motion_detection", (dt.now().timestamp() - motion_start) * 1000)
+                    if self.analytics is not None and not skip_detection_flag:
+                        self.analytics.add_motion_mask(cam_name, detection_buffers["mask"])
+
+                if cam_config.get("FRAME_BUS_ENABLED", False):
+                    self.publish_frame(cam_index, cv2.imdecode(jpeg, cv2.IMREAD_COLOR) if substream_stand_in else frame, capture_ts, motion_percent)
+                elif self.frame_buses[cam_index] is not None:
+                    self.close_frame_bus(cam_index)
+
+                hud_start = dt.now().timestamp()
+                self.current_frame[cam_index] = draw_hud(
+                    frame,
+                    f"{state_string[self.state_array[cam_index]]}" if SHOW_STATE_ON_FRAME else "",
+                    dt.now().strftime("%H:%M:%S.%f")[:-3] if SHOW_TIMESTAMP_ON_FRAME else "",
+                    cam_name if SHOW_CAM_NAME_ON_FRAME else "",
+                    f"{fps_counter}" if SHOW_FPS_ON_FRAME else "",
+                    f"{motion_percent:.2f}%" if SHOW_MOTION_PERCENT_ON_FRAME else "",
+                    ""
+                )
+                self.frame_seq[cam_index] += 1
+                self.record_stage("hud", (dt.now().timestamp() - hud_start) * 1000)
+                if frame_pool is not None:
+                    frame_pool.release(pending_release)
+                    pending_release = self.current_frame[cam_index]
+
+                if skip_detection_flag and dt.now().timestamp() - skip_detection_timestamp > self.get_skip_detection_seconds(cam_index):
+                    skip_detection_flag = False
+                    logger.info(f"[{cam_name}] Motion detection enabled ({'background model restored' if self.background_models[cam_index].warm_started else 'SKIP_DETECTION_SECONDS elapsed'})")
+                    self.log_startup_milestone(cam_index, "first detected frame")
+
+                # same motion state machine as event mode, but it only produces tags
+                motion_started = False
+                if not skip_detection_flag:
+                    threshold = cam_config["MOTION_DETECTION_THRESHOLD_PERCENT"]
+                    if motion_percent >= threshold and previous_motion_percent >= threshold:
+                        motion_frames += 1
+                        no_motion_frames = 0
+                    elif motion_percent < threshold and previous_motion_percent < threshold:
+                        no_motion_frames += 1
+                        motion_frames = 0
+                    previous_motion_percent = motion_percent
+
+                    if self.state_array[cam_index] == State.DETECTING and motion_frames >= cam_config["NUMBER_OF_FRAMES_WITH_MOTION"] - 1:
+                        logger.info(f"[{cam_name}] Motion detected")
+                        self.state_array[cam_index] = State.RECORDING
+                        no_motion_frames = 0
+                        motion_started = True
+                        motion_start_timestamp = dt.now().timestamp()
+                        event_peak_motion_percent = motion_percent
+                        self.emit_event(EVENT_MOTION_START, cam_index, start_ts=motion_start_timestamp, motion_percent=motion_percent)
+                    elif self.state_array[cam_index] == State.RECORDING and no_motion_frames >= cam_config["NUMBER_OF_FRAMES_WITH_NO_MOTION"] - 1:
+                        logger.info(f"[{cam_name}] Motion stopped")
+                        self.state_array[cam_index] = State.POST_RECORDING
+                        post_motion_frame_count = 0
+                        motion_end_timestamp = dt.now().timestamp()
+                    elif self.state_array[cam_index] == State.POST_RECORDING:
+                        post_motion_frame_count += 1
+                        if motion_frames >= cam_config["NUMBER_OF_FRAMES_WITH_MOTION"] - 1:
+                            self.state_array[cam_index] = State.RECORDING # motion is back, same event continues
+                        elif post_motion_frame_count >= self.post_event_frames[cam_index]:
+                            if self.analytics is not None:
+                                self.analytics.add_event(cam_name, motion_start_timestamp, motion_end_timestamp, event_peak_motion_percent)
+                            self.emit_event(EVENT_MOTION_STOP, cam_index, start_ts=motion_start_timestamp, end_ts=motion_end_timestamp,
+                                            peak_motion=event_peak_motion_percent, clip="")
+                            self.state_array[cam_index] = State.DETECTING
+
+                    if self.state_array[cam_index] != State.DETECTING:
+                        event_peak_motion_percent = max(event_peak_motion_percent, motion_percent)
+
+                # next segment starts right after previous one (same frame loop, no gap)
+                if segment is not None and segment["writer_frames"] >= segment_frames // segment["step"]:
+                    close_segment()
+                    segment = None
+
+                if segment is None:
+                    writer_start = dt.now().timestamp()
+                    self.ensure_ram_dirs()
+                    record_step = self.record_step(cam_index)  # reduced FPS under resource pressure
+                    writer = create_video_writer(
+                        cam_name,
+                        os.path.join(VIDEO_PATH_IN_RAM, f"{cam_name}_{self.get_datetime_string()}"),
+                        video_fps / float(record_step),
+                        (cam_config["FRAME_WIDTH"], cam_config["FRAME_HEIGHT"]),
+                        settings
+                    )
+                    segment = {"writer": writer, "writer_frames": 0, "step": record_step, "fps": video_fps / float(record_step),
+                               "start_ts": dt.now().timestamp(), "clip_index": ClipIndexBuilder(video_fps / float(record_step), dt.now().timestamp()),
+                               "pacer": FramePacer(video_fps / float(record_step), capture_ts),
+                               "motion": False, "peak_motion": 0.0, "thumbnail_jpeg": None, "tag_since": None}
+                    self.record_stage("writer_open", (dt.now().timestamp() - writer_start) * 1000)
+                    logger.debug(f"[{cam_name}] Segment {writer.path} started")
+
+                in_motion = self.state_array[cam_index] != State.DETECTING
+                if in_motion:
+                    segment["peak_motion"] = max(segment["peak_motion"], motion_percent)
+                    if not segment["motion"]:
+                        segment["motion"] = True
+                        segment["thumbnail_jpeg"] = None # thumbnail from first motion frame
+                if motion_started:
+                    # pre-motion part of the event may be in already finished segments
+                    segment["tag_since"] = motion_start_timestamp - cam_config["PRE_MOTION_SECONDS"]
+                if held_segments:
+                    release_held_segments(segment["tag_since"] if motion_started else None)
+                if segment["thumbnail_jpeg"] is None:
+                    segment["thumbnail_jpeg"] = jpeg if passthrough else cv2.imencode(".jpg", self.current_frame[cam_index])[1]
+
+                frame_write_start = dt.now().timestamp()
+                for _ in range(segment["pacer"].repeat(capture_ts)):
+                    if passthrough:
+                        segment["writer"].write_jpeg(jpeg)
+                    else:
+                        segment["writer"].write(self.current_frame[cam_index])
+                    segment["writer_frames"] += 1
+                    segment["clip_index"].add_frame(motion_percent, state_string[self.state_array[cam_index]])
+                self.record_stage("frame_write", (dt.now().timestamp() - frame_write_start) * 1000)
+                self.record_stage("frame_total", (dt.now().timestamp() - capture_start) * 1000)
+
+                if fps_limiter is not None:
+                    fps_limiter.wait()
+        finally:
+            # keep whatever was recorded until stop/failure
+            if segment is not None:
+                try:
+                    close_segment()
+                except Exception as e:
+                    logger.error(f"[{cam_name}] Failed to close segment on exit ({repr(e)})")
+            release_held_segments(release_all=True)
+
     def cam_loop(self, cam_index):
-        cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        reopen_delay = REOPEN_INITIAL_DELAY_SECONDS
 
         while 1:
+            worker_start = time.monotonic()
             try:
-                self.cam_worker(cam_index) 
+                if self.camera_configs[cam_index].get("RECORDING_MODE", RECORDING_MODE_EVENT) == RECORDING_MODE_CONTINUOUS:
+                    self.continuous_worker(cam_index)
+                else:
+                    self.cam_worker(cam_index) 
             except Exception as e:
                 logger.error(f"[{cam_name}] Camera worker excepted ({repr(e)})")
 
-            if not self.stop_event.is_set():
+            # worker ran fine for a while -> this is a new outage, start backoff from beginning
+            if time.monotonic() - worker_start > REOPEN_MAX_DELAY_SECONDS:
+                reopen_delay = REOPEN_INITIAL_DELAY_SECONDS
+
+            restart = self.restart_requests[cam_index].is_set() and not self.stop_event.is_set()
+            if not self.stop_event.is_set() and not restart:
                 logger.error(f"[{cam_name}] Camera worker stopped")  
 
             logger.info(f"[{cam_name}] Closing cv2 cap ...")
@@ -443,23 +1231,79 @@ class CameraManager:
             except Exception as e:
                 logger.warning(f"[{cam_name}] Cv2 cap failed to close ({repr(e)})")
 
+            if self.detection_cap_array[cam_index] is not None:
+                try:
+                    if self.detection_streams[cam_index] is not None:
+                        self.detection_streams[cam_index].stop()
+                        self.detection_streams[cam_index] = None
+                    self.detection_cap_array[cam_index].release()
+                    self.detection_cap_array[cam_index] = None
+                except Exception as e:
+                    logger.warning(f"[{cam_name}] Detection cap failed to close ({repr(e)})")
+
+            # latest background for warm start of next worker (detection thread is stopped by now)
+            if self.background_models[cam_index] is not None:
+                self.background_models[cam_index].checkpoint()
+                self.background_models[cam_index] = None
+
             if self.stop_event.is_set():
+                self.close_frame_bus(cam_index)
                 return
+
+            if restart:
+                # videos of this camera still being finalised were recorded with previous capture config
+                while self.camera_finalisations_in_flight[cam_index]:
+                    if self.stop_event.wait(0.1):
+                        return
+                logger.info(f"[{cam_name}] Restarting camera with new configuration ...")
+                with self._config_lock:
+                    self._update_config_locked(cam_index, self.pending_configs[cam_index])
+                    self.pending_configs[cam_index] = None
+                    self.restart_requests[cam_index].clear()
+                reopen_delay = REOPEN_INITIAL_DELAY_SECONDS
+                self.init_cam(cam_index)
+                continue
      
-            logger.info(f"[{cam_name}] Re-opening cv2 cap in 2 seconds ...")
-            time.sleep(2)
+            logger.info(f"[{cam_name}] Re-opening cv2 cap in {reopen_delay} seconds ...")
+            if self.stop_event.wait(reopen_delay):
+                return
+            reopen_delay = min(reopen_delay * 2, REOPEN_MAX_DELAY_SECONDS)
             self.init_cam(cam_index)
 
-    def init_cam(self, cam_index):
-        cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
+    def open_source(self, cam_config):
+        """V4L2 / network (FFmpeg) / file capture with in-place reconnect, chosen by SOURCE_TYPE or DEVICE_PATH"""
+        return CaptureSource(cam_config, self.stop_event)
 
-        logger.info(f"[{cam_name}] Opening cap ...")
-        cap = cv2.VideoCapture(CAMERA_CONFIGS[cam_index]["DEVICE_PATH"], cv2.CAP_V4L2)
+    def get_detection_config(self, cam_index):
+        """Camera config of optional DETECTION_SOURCE substream (its keys override main stream ones), None if not set"""
+        cam_config = self.camera_configs[cam_index]
+        if not cam_config.get("DETECTION_SOURCE"):
+            return None
+        main_config = {key: value for key, value in cam_config.items() if key != "DETECTION_SOURCE"}
+        return {**main_config, **cam_config["DETECTION_SOURCE"], "NAME": f"{cam_config['NAME']}-DET"}
+
+    def init_detection_cam(self, cam_index):
+        detection_config = self.get_detection_config(cam_index)
+        cam_name = detection_config["NAME"]
+
+        logger.info(f"[{cam_name}] Opening detection cap ...")
+        cap = self.capture_factory(detection_config)
         cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_CONFIGS[cam_index]["FRAME_WIDTH"])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_CONFIGS[cam_index]["FRAME_HEIGHT"])
-        cap.set(cv2.CAP_PROP_FPS, CAMERA_CONFIGS[cam_index]["FPS"])
-        
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, detection_config["FRAME_WIDTH"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, detection_config["FRAME_HEIGHT"])
+        cap.set(cv2.CAP_PROP_FPS, detection_config["FPS"])
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # only latest frame matters for detection
+        self.detection_cap_array[cam_index] = cap
+
+        actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        actual_fps = int(cap.get(cv2.CAP_PROP_FPS))
+        logger.info(f"[{cam_name}] Detection substream: {actual_width}x{actual_height} @ {actual_fps} FPS")
+
+    def negotiate_cam(self, cam_index, cap, passthrough):
+        """Probe buffer size, read first frame and return settings camera actually accepted (stored in negotiation cache)"""
+        cam_name = self.camera_configs[cam_index]["NAME"]
+
         # Try camera optimizations with detailed reporting
         logger.debug(f"[{cam_name}] Adjusting buffer size ...")
         
@@ -479,13 +1323,6 @@ class CameraManager:
         self.cap_array[cam_index] = cap    
 
         ret, frame = self.cap_array[cam_index].read() # fetch first frame to get things going
-        
-        # verify cam params
-        cam_width = CAMERA_CONFIGS[cam_index]["FRAME_WIDTH"]
-        cam_height = CAMERA_CONFIGS[cam_index]["FRAME_HEIGHT"]
-        cam_fps = CAMERA_CONFIGS[cam_index]["FPS"]
-        cam_fps_limiter = CAMERA_CONFIGS[cam_index]["FPS_LIMITER"]
-        cam_motion_detection_threshold_percent = CAMERA_CONFIGS[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]
 
         # Get actual camera properties for detailed analysis
         actual_width = int(self.cap_array[cam_index].get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -496,7 +1333,59 @@ class CameraManager:
         
         # Convert fourcc back to readable format
         fourcc_str = "".join([chr((int(actual_fourcc) >> 8 * i) & 0xFF) for i in range(4)])
-        
+
+        # only a camera that delivered a frame is worth remembering
+        if ret and self.negotiation_cache is not None:
+            self.negotiation_cache.put(self.camera_configs[cam_index], passthrough, {
+                "width": actual_width,
+                "height": actual_height,
+                "fps": actual_fps,
+                "buffer_size": actual_buffer_size,
+                "fourcc": fourcc_str,
+            })
+
+        return actual_width, actual_height, actual_fps, actual_buffer_size, fourcc_str
+
+    def init_cam(self, cam_index):
+        cam_name = self.camera_configs[cam_index]["NAME"]
+
+        if self.get_detection_config(cam_index) is not None:
+            self.init_detection_cam(cam_index)
+
+        logger.info(f"[{cam_name}] Opening cap ...")
+        cap = self.capture_factory(self.camera_configs[cam_index])
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_configs[cam_index]["FRAME_WIDTH"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_configs[cam_index]["FRAME_HEIGHT"])
+        cap.set(cv2.CAP_PROP_FPS, self.camera_configs[cam_index]["FPS"])
+
+        # PASSTHROUGH records camera JPEG payloads, so ask backend not to decode them
+        passthrough = encoder_settings(self.camera_configs[cam_index])["codec"] == PASSTHROUGH_CODEC
+        if passthrough:
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+        cached = self.negotiation_cache.get(self.camera_configs[cam_index], passthrough) if self.negotiation_cache is not None else None
+        self.cached_negotiations[cam_index] = cached
+        if cached is not None:
+            # same device and settings negotiated before: no probing, no verification read
+            logger.debug(f"[{cam_name}] Using cached negotiation (buffer size {cached['buffer_size']})")
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, cached["buffer_size"])
+            self.cap_array[cam_index] = cap
+            actual_width = cached["width"]
+            actual_height = cached["height"]
+            actual_fps = cached["fps"]
+            actual_buffer_size = cached["buffer_size"]
+            fourcc_str = cached["fourcc"]
+        else:
+            actual_width, actual_height, actual_fps, actual_buffer_size, fourcc_str = self.negotiate_cam(cam_index, cap, passthrough)
+
+        # verify cam params
+        cam_width = self.camera_configs[cam_index]["FRAME_WIDTH"]
+        cam_height = self.camera_configs[cam_index]["FRAME_HEIGHT"]
+        cam_fps = self.camera_configs[cam_index]["FPS"]
+        cam_fps_limiter = self.camera_configs[cam_index]["FPS_LIMITER"]
+        cam_motion_detection_threshold_percent = self.camera_configs[cam_index]["MOTION_DETECTION_THRESHOLD_PERCENT"]
+
         mismatched_params_string = ""
         if cam_width != actual_width:
             mismatched_params_string += f"WIDTH(target:{cam_width} -> actual:{actual_width}), "
@@ -508,7 +1397,7 @@ class CameraManager:
         if mismatched_params_string != "":
             logger.warning(f"[{cam_name}] Parameter mismatches: {mismatched_params_string[:-2]}")
         
-        logger.info(f"[{cam_name}] Settings")
+        logger.info(f"[{cam_name}] Settings{' (cached)' if cached is not None else ''}")
         logger.info(f"[{cam_name}]   |-- Resolution: {actual_width}x{actual_height}")
         logger.info(f"[{cam_name}]   |-- Hardware FPS: {actual_fps}")
         logger.info(f"[{cam_name}]   |-- Software FPS limit: {cam_fps_limiter}")
@@ -517,10 +1406,10 @@ class CameraManager:
         logger.info(f"[{cam_name}]   |-- Buffer: {actual_buffer_size}")
 
     def init_cameras(self):
-        logger.info(f"[SYS] Found {CAM_COUNT} camera/-s in config")
+        logger.info(f"[SYS] Found {self.cam_count} camera/-s in config")
 
         threads = []
-        for cam_index in range(CAM_COUNT):
+        for cam_index in range(self.cam_count):
             t = threading.Thread(target=self.init_cam, args=(cam_index, ))
             t.start()
             threads.append(t)
@@ -530,8 +1419,8 @@ class CameraManager:
 
     def start_camera_threads(self):
         """Start all camera worker threads"""
-        for cam_index in range(CAM_COUNT):
-            cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
+        for cam_index in range(self.cam_count):
+            cam_name = self.camera_configs[cam_index]["NAME"]
             logger.info(f"[{cam_name}] Starting motion detection ...")
             t = threading.Thread(target=self.cam_loop, args=(cam_index,))
             t.start()
@@ -540,7 +1429,7 @@ class CameraManager:
     def join_camera_threads(self):
         """Join all camera worker threads during shutdown"""
         for cam_index, t in enumerate(self.camera_threads):
-            cam_name = CAMERA_CONFIGS[cam_index]["NAME"]
+            cam_name = self.camera_configs[cam_index]["NAME"]
             try:
                 logger.info(f"[{cam_name}] Joining camera worker thread ...")
                 t.join()
@@ -555,11 +1444,161 @@ class CameraManager:
         except Exception as e:
             logger.warning(f"[SYS] Executor shutdown issue ({repr(e)})")
     
+    def detection_step_factor(self, cam_index):
+        return self.governor.detection_step_factor(cam_index) if self.governor is not None else 1
+
+    def record_step(self, cam_index):
+        return self.governor.record_step(cam_index) if self.governor is not None else 1
+
+    def submit_finalisation(self, fn, cam_index, *args):
+        """
+        Submit video post-processing job fn(cam_index, *args) to executor, counting jobs in flight
+        (all cameras: encoder budget of resource governor, per camera: config restart)
+        """
+        with self._finalisations_lock:
+            self.finalisations_in_flight += 1
+            self.camera_finalisations_in_flight[cam_index] += 1
+
+        def done(_):
+            with self._finalisations_lock:
+                self.finalisations_in_flight -= 1
+                self.camera_finalisations_in_flight[cam_index] -= 1
+
+        self.video_upload_executor.submit(fn, cam_index, *args).add_done_callback(done)
+
+    def active_encoders(self):
+        """Cameras writing a video right now plus queued/running post-processing jobs"""
+        writing = sum(
+            1 for cam_index, state in enumerate(self.state_array)
+            if state in (State.RECORDING, State.POST_RECORDING) or self.camera_configs[cam_index].get("RECORDING_MODE", RECORDING_MODE_EVENT) == RECORDING_MODE_CONTINUOUS
+        )
+        return writing + self.finalisations_in_flight
+
+    def cameras_idle(self):
+        """True when every camera is just detecting (no recording in progress)"""
+        return all(state == State.DETECTING for state in self.state_array)
+
+    def calculate_post_event_frames(self, cam_config):
+        return seconds_to_frames(cam_config, "POST_MOTION_SECONDS")
+
+    def apply_camera_configs(self, camera_configs):
+        """
+        Apply reloaded camera configs (same cameras, same order). Values are updated in place, so running workers
+        pick them up on next frame. Cameras with changed capture keys (config.CAMERA_RESTART_KEYS) are restarted
+        once they are not recording, capture keys are swapped in only then. Returns {"updated": [...], "restarted": [...]}.
+        """
+        if [c["NAME"] for c in camera_configs] != [c["NAME"] for c in self.camera_configs]:
+            raise ConfigError("cameras were added, removed or renamed, service restart is needed")
+
+        summary = {"updated": [], "restarted": []}
+        with self._config_lock:
+            for cam_index, new_config in enumerate(camera_configs):
+                cam_config = self.camera_configs[cam_index]
+                cam_name = cam_config["NAME"]
+                changed, restart = camera_changes(self.pending_configs[cam_index] or cam_config, new_config)
+                if not changed:
+                    continue
+
+                restart = restart or self.pending_configs[cam_index] is not None # earlier restart not done yet
+                if restart:
+                    self._update_config_locked(cam_index, {key: value for key, value in new_config.items() if key not in CAMERA_RESTART_KEYS}, keep=CAMERA_RESTART_KEYS)
+                    self.pending_configs[cam_index] = new_config
+                    logger.info(f"[{cam_name}] Config changed ({', '.join(sorted(changed))}), camera will be restarted")
+                    self.restart_requests[cam_index].set()
+                    summary["restarted"].append(cam_name)
+                else:
+                    self._update_config_locked(cam_index, new_config)
+                    logger.info(f"[{cam_name}] Config changed ({', '.join(sorted(changed))}), applied live")
+                    summary["updated"].append(cam_name)
+        return summary
+
+    def _update_config_locked(self, cam_index, new_config, keep=()):
+        """Update camera config dict in place (workers hold reference to it), keys in keep are left as they are"""
+        cam_config = self.camera_configs[cam_index]
+        cam_config.update(new_config)
+        for key in set(cam_config) - set(new_config) - set(keep):
+            del cam_config[key]
+        self.post_event_frames[cam_index] = self.calculate_post_event_frames(cam_config)
+        if self.detection_streams[cam_index] is not None and cam_config.get("DETECTION_SOURCE"):
+            self.detection_streams[cam_index].frame_step = self.get_detection_config(cam_index)["MOTION_DETECTION_FRAME_STEP"]
+
+    def burst_frames(self, cam_index, count, interval):
+        """
+        Up to count frames interval seconds apart as [(wall clock timestamp, JPEG bytes)], ending now when pre-buffer
+        reaches back far enough, otherwise starting with its oldest frame and continuing with live frames.
+        Runs in caller's thread (frames are only read, camera worker is not interrupted), pooled pre-buffer frames
+        are pinned meanwhile (frame pool does not recycle them).
+        """
+        frame_pool = self.frame_pools[cam_index]
+        burst_ring = self.burst_rings[cam_index] or ()
+        ring = frame_pool.pin_items(burst_ring, 1) if frame_pool is not None else list(burst_ring) # copy, worker keeps appending
+        try:
+            return self._burst_frames(cam_index, ring, count, interval)
+        finally:
+            if frame_pool is not None:
+                frame_pool.unpin_items(ring, 1)
+
+    def _burst_frames(self, cam_index, ring, count, interval):
+        now = time.monotonic()
+        wall_offset = time.time() - now
+        start = now - (count - 1) * interval
+        start = max(start, ring[0][0]) if ring else now
+
+        frames = []
+        last_key = None
+        for n in range(count):
+            target = start + n * interval
+            if ring and target <= now:
+                # newest pre-buffer frame captured at target or before
+                i = max(bisect.bisect_right(ring, target, key=lambda item: item[0]) - 1, 0)
+                ts, image, is_jpeg = ring[i]
+                key = ("ring", i)
+            else:
+                if self.stop_event.wait(max(0.0, target - time.monotonic())):
+                    break
+                key = ("live", self.frame_seq[cam_index])
+                image, unpin = self.pin_current_frame(cam_index)
+                try:
+                    ts, image, is_jpeg = time.monotonic(), image.copy() if image is not None else None, False # pooled buffer is recycled soon
+                finally:
+                    unpin()
+            if image is None or key == last_key:
+                continue # no frame yet, or interval shorter than frame period
+            last_key = key
+            if is_jpeg:
+                data = image.tobytes()
+            else:
+                ok, jpg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, BURST_JPEG_QUALITY])
+                if not ok:
+                    continue
+                data = jpg.tobytes()
+            frames.append((ts + wall_offset, data))
+        return frames
+
+    def pin_current_frame(self, cam_index):
+        """(preview frame or None, unpin()) for readers outside camera worker, frame pool doesn't recycle the frame until unpin()"""
+        frame_pool = self.frame_pools[cam_index]
+        if frame_pool is None:
+            return self.current_frame[cam_index], lambda: None
+        frame = frame_pool.pin(lambda: self.current_frame[cam_index])
+        return frame, lambda: frame_pool.unpin(frame)
+
+    def get_source_health(self):
+        """Per-camera source health (main stream and optional detection substream)"""
+        health = []
+        for cam_index, cam_config in enumerate(self.camera_configs):
+            entry = {"cam": cam_config["NAME"], "state": self.state_array[cam_index].name}
+            for key, cap in (("source", self.cap_array[cam_index]), ("detection_source", self.detection_cap_array[cam_index])):
+                if cap is not None and hasattr(cap, "health"):
+                    entry[key] = cap.health()
+            health.append(entry)
+        return health
+
     def get_camera_count(self):
-        return CAM_COUNT
+        return self.cam_count
     
     def get_camera_configs(self):
-        return CAMERA_CONFIGS
+        return self.camera_configs
     
     def get_current_frames(self):
         return self.current_frame
\ No newline at end of file
@@ -0,0 +1,305 @@
+import os
+import json
+import shutil
+import struct
+import subprocess
+from storage import sidecar_path, CLIP_INDEX_SUFFIX
+from encoder import MjpegAviWriter
+from logging_setup import get_logger
+
+logger = get_logger()
+
+CLIP_INDEX_VERSION = 1
+
+AVIIF_KEYFRAME = 0x10
+
+
+class ClipIndexBuilder:
+    """
+    Motion index of one clip, filled frame by frame while recording (a few float operations per frame):
+    per-second max/mean motion percent, state transitions (frame numbers) and, once the file is final,
+    byte offsets of first keyframe of every second (so players/tools can seek and cut without decoding).
+    """
+    def __init__(self, fps, start_ts):
+        self.fps = float(fps)
+        self.start_ts = start_ts     # wall clock time of frame 0
+        self.frame_count = 0
+        self.motion_max = []         # per second
+        self.motion_sum = []         # per second, divided by motion_count on export
+        self.motion_count = []       # frames per second
+        self.transitions = []        # (frame, state)
+        self._state = None
+
+    def add_frame(self, motion_percent, state):
+        second = int(self.frame_count / self.fps)
+        if second == len(self.motion_max):
+            self.motion_max.append(motion_percent)
+            self.motion_sum.append(motion_percent)
+            self.motion_count.append(1)
+        else:
+            self.motion_max[second] = max(self.motion_max[second], motion_percent)
+            self.motion_sum[second] += motion_percent
+            self.motion_count[second] += 1
+        if state != self._state:
+            self.transitions.append((self.frame_count, state))
+            self._state = state
+        self.frame_count += 1
+
+    def extend(self, motion_percents, state):
+        for motion_percent in motion_percents:
+            self.add_frame(motion_percent, state)
+
+    def to_dict(self):
+        peak_second = max(range(len(self.motion_max)), key=self.motion_max.__getitem__) if self.motion_max else 0
+        return {
+            "version": CLIP_INDEX_VERSION,
+            "fps": self.fps,
+            "start_ts": self.start_ts,
+            "frames": self.frame_count,
+            "duration": self.frame_count / self.fps,
+            "peak_second": peak_second,
+            "peak_motion": round(self.motion_max[peak_second], 3) if self.motion_max else 0.0,
+            "motion_max": [round(v, 3) for v in self.motion_max],
+            "motion_mean": [round(total / count, 3) for total, count in zip(self.motion_sum, self.motion_count)],
+            "transitions": [{"frame": frame, "time": round(frame / self.fps, 3), "state": state} for frame, state in self.transitions],
+            "keyframes": [],
+        }
+
+    def write(self, video_path):
+        """Write sidecar next to finished video (keyframes are read from the file itself)"""
+        index = self.to_dict()
+        index["keyframes"] = keyframe_index(video_path, self.fps)
+        _write_index(video_path, index)
+
+
+def _write_index(video_path, index):
+    path = sidecar_path(video_path, CLIP_INDEX_SUFFIX)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def read_clip_index(video_path):
+    """Parsed sidecar index of given video, None if missing"""
+    try:
+        with open(sidecar_path(video_path, CLIP_INDEX_SUFFIX), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def refresh_keyframes(video_path):
+    """Re-read keyframe offsets after video was re-encoded (sidecar keeps motion data)"""
+    index = read_clip_index(video_path)
+    if index is None:
+        return
+    index["keyframes"] = keyframe_index(video_path, index["fps"])
+    _write_index(video_path, index)
+
+### KEYFRAMES ###
+
+def _avi_frames(path):
+    """(absolute offset, size, keyframe) of every video chunk from idx1, plus (width, height, fps) from avih"""
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"AVI ":
+            raise ValueError("not an AVI file")
+
+        movi_data_offset = None
+        frames = []
+        width = height = 0
+        fps = 0.0
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            fourcc, size = struct.unpack("<4sI", header)
+            chunk_start = f.tell()
+            if fourcc == b"LIST":
+                list_type = f.read(4)
+                if list_type == b"movi":
+                    movi_data_offset = chunk_start  # idx1 offsets are relative to 'movi' fourcc
+                elif list_type == b"hdrl":
+                    avih = f.read(8 + 56)
+                    if avih[:4] == b"avih":
+                        usec_per_frame = struct.unpack_from("<I", avih, 8)[0]
+                        width, height = struct.unpack_from("<II", avih, 8 + 32)
+                        fps = 1e6 / usec_per_frame if usec_per_frame else 0.0
+            elif fourcc == b"idx1":
+                data = f.read(size)
+                for ckid, flags, offset, length in struct.iter_unpack("<4sIII", data[:len(data) - len(data) % 16]):
+                    if ckid[2:4] in (b"dc", b"db"):
+                        frames.append((offset, length, bool(flags & AVIIF_KEYFRAME)))
+            f.seek(chunk_start + size + (size % 2))
+
+    if movi_data_offset is None:
+        raise ValueError("AVI without movi list")
+    # offsets are either relative to 'movi' or absolute (both exist in the wild)
+    base = movi_data_offset if frames and frames[0][0] < movi_data_offset else 0
+    return [(base + offset + 8, length, key) for offset, length, key in frames], (width, height, fps)
+
+
+def _mp4_boxes(data, start=0, end=None):
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _mp4_frames(path):
+    """(absolute offset, size, keyframe) of every sample of first video track, read from moov (mdat is skipped)"""
+    moov = None
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        pos = 0
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            size, box_type = struct.unpack(">I4s", f.read(8))
+            header = 8
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+                header = 16
+            elif size == 0:
+                size = file_size - pos
+            if size < header:
+                break
+            if box_type == b"moov":
+                moov = f.read(size - header)
+                break
+            pos += size
+    if moov is None:
+        raise ValueError("MP4 without moov box")
+
+    def child(parent_start, parent_end, box_type):
+        for t, s, e in _mp4_boxes(moov, parent_start, parent_end):
+            if t == box_type:
+                return s, e
+        return None
+
+    for trak_type, trak_start, trak_end in _mp4_boxes(moov):
+        if trak_type != b"trak":
+            continue
+        mdia = child(trak_start, trak_end, b"mdia")
+        hdlr = mdia and child(*mdia, b"hdlr")
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+        stbl = child(*child(*mdia, b"minf"), b"stbl")
+
+        boxes = {t: (s, e) for t, s, e in _mp4_boxes(moov, *stbl)}
+        s, _ = boxes[b"stsz"]
+        sample_size, sample_count = struct.unpack_from(">II", moov, s + 4)
+        sizes = list(struct.unpack_from(f">{sample_count}I", moov, s + 12)) if sample_size == 0 else [sample_size] * sample_count
+
+        if b"stco" in boxes:
+            s, _ = boxes[b"stco"]
+            chunk_offsets = struct.unpack_from(f">{struct.unpack_from('>I', moov, s + 4)[0]}I", moov, s + 8)
+        else:
+            s, _ = boxes[b"co64"]
+            chunk_offsets = struct.unpack_from(f">{struct.unpack_from('>I', moov, s + 4)[0]}Q", moov, s + 8)
+
+        s, _ = boxes[b"stsc"]
+        stsc_count = struct.unpack_from(">I", moov, s + 4)[0]
+        stsc = [struct.unpack_from(">III", moov, s + 8 + 12 * i) for i in range(stsc_count)]
+
+        keyframes = None  # no stss -> every sample is sync sample
+        if b"stss" in boxes:
+            s, _ = boxes[b"stss"]
+            keyframes = set(struct.unpack_from(f">{struct.unpack_from('>I', moov, s + 4)[0]}I", moov, s + 8))
+
+        frames = []
+        sample = 0
+        for i, (first_chunk, samples_per_chunk, _) in enumerate(stsc):
+            last_chunk = stsc[i + 1][0] - 1 if i + 1 < len(stsc) else len(chunk_offsets)
+            for chunk in range(first_chunk, last_chunk + 1):
+                offset = chunk_offsets[chunk - 1]
+                for _ in range(samples_per_chunk):
+                    if sample >= sample_count:
+                        break
+                    frames.append((offset, sizes[sample], keyframes is None or (sample + 1) in keyframes))
+                    offset += sizes[sample]
+                    sample += 1
+        return frames
+    raise ValueError("MP4 without video track")
+
+
+def keyframe_index(video_path, fps):
+    """First keyframe of every second as [{"frame", "time", "offset"}], empty if container is not supported"""
+    ext = os.path.splitext(video_path)[1].lower()
+    try:
+        if ext == ".avi":
+            frames, _ = _avi_frames(video_path)
+        elif ext in (".mp4", ".mov"):
+            frames = _mp4_frames(video_path)
+        else:
+            return []
+    except Exception as e:
+        logger.warning(f"Failed to read keyframes of {video_path} ({repr(e)})")
+        return []
+
+    keyframes = []
+    last_second = -1
+    for frame, (offset, _, key) in enumerate(frames):
+        second = int(frame / fps)
+        if key and second != last_second:
+            keyframes.append({"frame": frame, "time": round(frame / fps, 3), "offset": offset})
+            last_second = second
+    return keyframes
+
+### HIGHLIGHTS ###
+
+def highlight_segments(index, threshold_percent, padding_seconds=1.0, merge_gap_seconds=2.0):
+    """Time ranges [{"start", "end", "peak_motion"}] where per-second max motion reaches threshold, padded and merged"""
+    duration = index["duration"]
+    segments = []
+    for second, motion in enumerate(index["motion_max"]):
+        if motion < threshold_percent:
+            continue
+        start, end = max(0.0, second - padding_seconds), min(duration, second + 1 + padding_seconds)
+        if segments and start - segments[-1]["end"] <= merge_gap_seconds:
+            segments[-1]["end"] = end
+            segments[-1]["peak_motion"] = max(segments[-1]["peak_motion"], motion)
+        else:
+            segments.append({"start": start, "end": end, "peak_motion": motion})
+    return segments
+
+
+def cut_segment(video_path, start, end, output_path_without_ext):
+    """
+    Cut [start, end) seconds out of a clip without re-encoding, returns output path.
+    MJPG AVI is cut frame-exact by copying JPEG chunks, other containers need ffmpeg (stream copy from previous keyframe).
+    """
+    ext = os.path.splitext(video_path)[1].lower()
+    if ext == ".avi":
+        frames, (width, height, fps) = _avi_frames(video_path)
+        if fps <= 0:
+            raise ValueError("AVI without frame rate")
+        output_path = output_path_without_ext + ".avi"
+        writer = MjpegAviWriter(output_path, fps, (width, height))
+        try:
+            with open(video_path, "rb") as f:
+                for offset, size, _ in frames[int(start * fps):int(end * fps)]:
+                    f.seek(offset)
+                    writer.write_jpeg(f.read(size))
+        finally:
+            writer.release()
+        return output_path
+
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(f"cutting {ext} clips requires ffmpeg")
+    output_path = output_path_without_ext + ext
+    cmd = [shutil.which("ffmpeg"), "-hide_banner", "-loglevel", "error", "-y",
+           "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{end - start:.3f}", "-c", "copy", "-an", output_path]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {result.returncode} ({result.stderr.decode(errors='replace').strip()})")
+    return output_path
@@ -0,0 +1,210 @@
+import os
+import json
+
+CONFIG_PATH = os.path.join(os.path.dirname((os.path.abspath(__file__))), "config.json")
+
+NUMBER = (int, float)
+
+# required global keys -> accepted types
+GLOBAL_SCHEMA = {
+    "LOGGING_LEVEL": str,
+    "LOGGING_ROOT_LEVEL": str,
+    "LOGGING_FILE_NAME": str,
+    "LOGGING_FILE_COUNT": int,
+    "LOGGING_ROLLOVER_TIME": str,
+    "LOGGING_PATH": str,
+    "FTP_UPLOAD_VIDEO": bool,
+    "FTP_HOSTNAME": str,
+    "FTP_USERNAME": str,
+    "FTP_PASSWORD": str,
+    "FTP_PATH": str,
+    "FTP_TIMEOUT": NUMBER,
+    "SAVE_VIDEO_LOCALLY": bool,
+    "VIDEO_PATH": str,
+    "MAX_CONCURRENT_VIDEO_WRITES_AND_UPLOADS": int,
+    "MAX_VIDEO_LENGTH_SECONDS": NUMBER,
+    "MAX_STORAGE_GB": NUMBER,
+    "MAX_STORAGE_DAYS": NUMBER,
+    "MAX_UNTAGGED_STORAGE_HOURS": NUMBER,
+    "DEFERRED_TRANSCODE_ENABLED": bool,
+    "TRANSCODE_SPOOL_PATH": str,
+    "TRANSCODE_SPOOL_MAX_MB": NUMBER,
+    "TRANSCODE_MAX_CPU_PERCENT": NUMBER,
+    "TRANSCODE_MAX_TEMPERATURE_C": NUMBER,
+    "ANALYTICS_ENABLED": bool,
+    "ANALYTICS_PATH": str,
+    "CACHE_PATH": str,
+    "GOVERNOR_ENABLED": bool,
+    "GOVERNOR_MAX_CPU_PERCENT": NUMBER,
+    "GOVERNOR_MAX_SHM_MB": NUMBER,
+    "GOVERNOR_MAX_ENCODERS": int,
+    "EVENTS_SINKS": list,
+    "EVENTS_BATCH_SECONDS": NUMBER,
+    "EVENTS_COALESCE_SECONDS": NUMBER,
+    "VERIFY_WORKERS": int,
+    "SKIP_DETECTION_SECONDS": NUMBER,
+    "SHOW_MOTION_PERCENT_ON_FRAME": bool,
+    "SHOW_STATE_ON_FRAME": bool,
+    "SHOW_FPS_ON_FRAME": bool,
+    "SHOW_CAM_NAME_ON_FRAME": bool,
+    "SHOW_TIMESTAMP_ON_FRAME": bool,
+    "HTTP_SERVER_ENABLED": bool,
+    "HTTP_SERVER_PORT": int,
+    "HTTP_FPS_LIMITER": NUMBER,
+    "HTTP_USE_X_SENDFILE": bool,
+}
+
+# required camera keys -> accepted types
+CAMERA_SCHEMA = {
+    "DEVICE_PATH": (str, int),
+    "FPS": NUMBER,
+    "FPS_LIMITER": NUMBER,
+    "FRAME_WIDTH": int,
+    "FRAME_HEIGHT": int,
+    "MOTION_DETECTION_THRESHOLD_PERCENT": NUMBER,
+    "MOTION_DETECTION_DOWNSCALE": NUMBER,
+    "MOTION_DETECTION_FRAME_STEP": int,
+    "NUMBER_OF_FRAMES_WITH_MOTION": int,
+    "NUMBER_OF_FRAMES_WITH_NO_MOTION": int,
+    "PRE_MOTION_SECONDS": NUMBER,
+    "POST_MOTION_SECONDS": NUMBER,
+}
+
+# optional camera keys -> accepted types (checked only when present)
+CAMERA_OPTIONAL_SCHEMA = {
+    "SOURCE_TYPE": str,
+    "VIDEO_CODEC": str,
+    "VIDEO_ENCODER_PRESET": str,
+    "VIDEO_ENCODER_QUALITY": NUMBER,
+    "VIDEO_FFMPEG_ENCODER": str,
+    "TRANSCODE_CODEC": str,
+    "TRANSCODE_PRIORITY": NUMBER,
+    "RECORDING_MODE": str,
+    "SEGMENT_SECONDS": NUMBER,
+    "PRIORITY": NUMBER,
+    "DETECTION_SOURCE": dict,
+    "STREAM_TRANSPORT": str,
+    "STREAM_BUFFER_SIZE": int,
+    "STREAM_DROP_LATE": bool,
+    "FILE_REALTIME": bool,
+    "FRAME_POOL_ENABLED": bool,
+    "FRAME_BUS_ENABLED": bool,
+    "VERIFY_ENABLED": bool,
+    "VERIFY_ACTION": str,
+    "VERIFY_FRAMES": int,
+    "VERIFY_WINDOW_SECONDS": NUMBER,
+    "VERIFY_MIN_BLOB_PERCENT": NUMBER,
+    "VERIFY_MIN_PERSISTENCE": int,
+}
+
+# values which must be positive (> 0) or non-negative (>= 0)
+POSITIVE_CAMERA_KEYS = ("FPS", "FRAME_WIDTH", "FRAME_HEIGHT", "MOTION_DETECTION_DOWNSCALE", "MOTION_DETECTION_FRAME_STEP",
+                        "NUMBER_OF_FRAMES_WITH_MOTION", "NUMBER_OF_FRAMES_WITH_NO_MOTION")
+NON_NEGATIVE_CAMERA_KEYS = ("FPS_LIMITER", "MOTION_DETECTION_THRESHOLD_PERCENT", "PRE_MOTION_SECONDS", "POST_MOTION_SECONDS")
+RECORDING_MODES = ("EVENT", "CONTINUOUS")
+VERIFY_ACTIONS = ("TAG", "CANCEL")
+
+# camera keys used only when camera (re)opens: capture setup, pre-buffer size, writers. Changing any of them restarts the camera,
+# everything else (detection thresholds, frame counts, post-motion, transcode, priority) is applied to the running camera
+CAMERA_RESTART_KEYS = {
+    "DEVICE_PATH", "SOURCE_TYPE", "FPS", "FPS_LIMITER", "FRAME_WIDTH", "FRAME_HEIGHT", "PRE_MOTION_SECONDS",
+    "VIDEO_CODEC", "VIDEO_ENCODER_PRESET", "VIDEO_ENCODER_QUALITY", "VIDEO_FFMPEG_ENCODER",
+    "RECORDING_MODE", "SEGMENT_SECONDS", "DETECTION_SOURCE", "FRAME_POOL_ENABLED",
+    "STREAM_TRANSPORT", "STREAM_BUFFER_SIZE", "STREAM_DROP_LATE", "FILE_REALTIME",
+    "RECONNECT_WINDOW_SECONDS", "RECONNECT_INITIAL_DELAY_SECONDS", "RECONNECT_MAX_DELAY_SECONDS",
+}
+
+
+class ConfigError(ValueError):
+    """config.json is invalid, message lists every problem found"""
+
+
+def _type_name(expected):
+    types = expected if isinstance(expected, tuple) else (expected,)
+    return " or ".join(t.__name__ for t in types)
+
+
+def _check_type(problems, where, key, value, expected):
+    types = expected if isinstance(expected, tuple) else (expected,)
+    # bool is int subclass, but true/false is never meant as a number
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        problems.append(f"{where}{key} must be {_type_name(expected)}, got {json.dumps(value)}")
+        return False
+    return True
+
+
+def validate(data) -> None:
+    """Raise ConfigError listing all missing keys, wrong types and out of range values"""
+    problems = []
+    for key, expected in GLOBAL_SCHEMA.items():
+        if key not in data:
+            problems.append(f"missing {key}")
+        else:
+            _check_type(problems, "", key, data[key], expected)
+
+    camera_names = [name for name in data if name.startswith("CAM")]
+    if not camera_names:
+        problems.append("no camera configured (CAM1, CAM2, ...)")
+    for cam_name in camera_names:
+        cam_config = data[cam_name]
+        where = f"{cam_name}."
+        if not isinstance(cam_config, dict):
+            problems.append(f"{cam_name} must be object")
+            continue
+        for key, expected in CAMERA_SCHEMA.items():
+            if key not in cam_config:
+                problems.append(f"missing {where}{key}")
+            elif _check_type(problems, where, key, cam_config[key], expected):
+                if key in POSITIVE_CAMERA_KEYS and cam_config[key] <= 0:
+                    problems.append(f"{where}{key} must be > 0")
+                elif key in NON_NEGATIVE_CAMERA_KEYS and cam_config[key] < 0:
+                    problems.append(f"{where}{key} must be >= 0")
+        for key, expected in CAMERA_OPTIONAL_SCHEMA.items():
+            if key in cam_config:
+                _check_type(problems, where, key, cam_config[key], expected)
+        if cam_config.get("RECORDING_MODE", "EVENT") not in RECORDING_MODES:
+            problems.append(f"{where}RECORDING_MODE must be one of {', '.join(RECORDING_MODES)}")
+        if cam_config.get("VERIFY_ACTION", "TAG") not in VERIFY_ACTIONS:
+            problems.append(f"{where}VERIFY_ACTION must be one of {', '.join(VERIFY_ACTIONS)}")
+
+    if problems:
+        raise ConfigError("; ".join(problems))
+
+
+class Config:
+    """Validated config.json: global keys via config["KEY"] / config.get(), camera configs (with NAME) in config.cameras"""
+    def __init__(self, data, path=CONFIG_PATH):
+        validate(data)
+        self.data = data
+        self.path = path
+        self.cameras = [
+            {"NAME": cam_name, **cam_config}
+            for cam_name, cam_config in data.items() if cam_name.startswith("CAM")
+        ]
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def global_keys(self):
+        return [key for key in self.data if not key.startswith("CAM")]
+
+
+def load_config(path=CONFIG_PATH) -> Config:
+    with open(path, "r") as f:
+        return Config(json.load(f), path)
+
+
+def camera_changes(old_config, new_config):
+    """(changed keys, whether camera has to be restarted) between two configs of one camera"""
+    changed = {key for key in set(old_config) | set(new_config) if old_config.get(key) != new_config.get(key)}
+    return changed, bool(changed & CAMERA_RESTART_KEYS)
+
+
+# loaded once, shared by all modules
+config = load_config()
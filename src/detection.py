@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+import cv2
+from timing import CaptureClock
+from logging_setup import get_logger
+
+logger = get_logger()
+
+BACKGROUND_CHECKPOINT_INTERVAL_SECONDS = 30
+BACKGROUND_CHECKPOINT_MAX_AGE_SECONDS = 3600
+BACKGROUND_PRIME_FRAMES = 20            # checkpoint image fed into new model this many times
+BACKGROUND_MATCH_PIXEL_DIFF = 25        # gray level difference counted as changed pixel
+BACKGROUND_MATCH_MAX_PERCENT = 10.0     # more changed pixels -> scene changed (light, camera moved), checkpoint is not used
+BACKGROUND_MATCH_THRESHOLD_FACTOR = 0.5 # restored model must differ from scene less than this part of motion threshold (no trigger right after restart)
+
+
+class DetectionStream:
+    """
+    Motion detection on a secondary (low resolution) stream of the same camera, running in own thread.
+    Every result is stored with its capture timestamp (timing.CaptureClock, time.monotonic scale), main stream
+    frames are matched to the closest preceding result via motion_at().
+    """
+    def __init__(self, cam_name, cap, detect, frame_step=1, history_len=64):
+        self.cam_name = cam_name
+        self.cap = cap
+        self.detect = detect            # callable: frame -> motion percent
+        self.frame_step = max(1, int(frame_step))
+        self.step_factor = 1            # set by camera worker (resource governor stretches detection step)
+        self.failed = False             # read failed, camera worker should reopen both streams
+        self.frame_count = 0
+
+        self._clock = CaptureClock()
+        self._samples = deque(maxlen=history_len)  # (capture timestamp, motion percent)
+        self._latest_frame = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"{self.cam_name}-detection", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            capture_ts = self._clock.timestamp(self.cap)
+            if not ret:
+                logger.error(f"[{self.cam_name}] Empty frame on detection stream")
+                self.failed = True
+                return
+
+            self.frame_count += 1
+            if self.frame_count % (self.frame_step * self.step_factor) == 0:
+                motion_percent = self.detect(frame)
+                with self._lock:
+                    self._samples.append((capture_ts, motion_percent))
+
+            with self._lock:
+                self._latest_frame = frame
+
+    def motion_at(self, timestamp: float) -> float | None:
+        """Motion percent of the latest detection frame captured at or before timestamp (None before first result)"""
+        with self._lock:
+            if not self._samples:
+                return None
+            result = self._samples[0][1]
+            for sample_ts, motion_percent in self._samples:
+                if sample_ts > timestamp:
+                    break
+                result = motion_percent
+            return result
+
+    def latest_frame(self):
+        """Copy of the latest detection frame (safe to draw on), None before first frame"""
+        with self._lock:
+            return None if self._latest_frame is None else self._latest_frame.copy()
+
+
+class BackgroundModel:
+    """
+    MOG2 background subtractor which survives camera reopen/restart: learned background image is checkpointed
+    to checkpoint_path every BACKGROUND_CHECKPOINT_INTERVAL_SECONDS and a new model is primed from it on first frame,
+    if that frame still matches (otherwise it learns from scratch as before). Same apply() as cv2 subtractor.
+    """
+    def __init__(self, cam_name, checkpoint_path, history=80, var_threshold=32, max_changed_percent=BACKGROUND_MATCH_MAX_PERCENT):
+        self.cam_name = cam_name
+        self.checkpoint_path = checkpoint_path  # None = no checkpoints
+        self.max_changed_percent = max_changed_percent  # checkpoint differing more from first frame is not used
+        self.mog2 = cv2.createBackgroundSubtractorMOG2(history=history, varThreshold=var_threshold, detectShadows=False)
+        self.warm_started = False
+        self._first_frame = True
+        self._last_checkpoint_ts = time.monotonic()
+
+    def apply(self, image, fgmask=None, learningRate=-1):
+        if self._first_frame:
+            self._first_frame = False
+            self.warm_started = self._warm_start(image)
+        fg = self.mog2.apply(image, fgmask=fgmask, learningRate=learningRate)
+        if time.monotonic() - self._last_checkpoint_ts > BACKGROUND_CHECKPOINT_INTERVAL_SECONDS:
+            self.checkpoint()
+        return fg
+
+    def _warm_start(self, image):
+        if self.checkpoint_path is None:
+            return False
+        try:
+            if time.time() - os.path.getmtime(self.checkpoint_path) > BACKGROUND_CHECKPOINT_MAX_AGE_SECONDS:
+                return False
+            background = np.load(self.checkpoint_path)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"[{self.cam_name}] Failed to read background checkpoint ({repr(e)})")
+            return False
+
+        if background.shape != image.shape or background.dtype != image.dtype:
+            return False  # resolution/downscale changed
+        changed = cv2.countNonZero(cv2.threshold(cv2.absdiff(background, image), BACKGROUND_MATCH_PIXEL_DIFF, 255, cv2.THRESH_BINARY)[1])
+        changed_percent = changed / float(image.size) * 100.0
+        if changed_percent > self.max_changed_percent:
+            logger.info(f"[{self.cam_name}] Background checkpoint does not match the scene ({changed_percent:.2f}% changed), learning from scratch")
+            return False
+
+        for _ in range(BACKGROUND_PRIME_FRAMES):
+            self.mog2.apply(background, learningRate=-1)
+        logger.info(f"[{self.cam_name}] Background model restored from checkpoint ({changed_percent:.2f}% changed)")
+        return True
+
+    def checkpoint(self):
+        """Save learned background image (atomic replace, readers never see partial file)"""
+        self._last_checkpoint_ts = time.monotonic()
+        if self.checkpoint_path is None or self._first_frame:
+            return
+        try:
+            background = self.mog2.getBackgroundImage()
+            os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+            with open(self.checkpoint_path + ".tmp", "wb") as f:
+                np.save(f, background)
+            os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+        except Exception as e:
+            logger.warning(f"[{self.cam_name}] Failed to save background checkpoint ({repr(e)})")
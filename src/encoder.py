@@ -0,0 +1,256 @@
+import os
+import shutil
+import struct
+import subprocess
+import cv2
+from logging_setup import get_logger
+
+logger = get_logger()
+
+DEFAULT_CODEC = "mp4v"
+
+# codec -> (container extension, fourcc candidates tried in order)
+OPENCV_CODECS = {
+    "mp4v": (".mp4", ["mp4v"]),
+    "MJPG": (".avi", ["MJPG"]),
+    "H264": (".mp4", ["avc1", "H264", "X264"]),
+}
+
+FFMPEG_CODEC = "FFMPEG"
+FFMPEG_EXTENSION = ".mp4"
+
+PASSTHROUGH_CODEC = "PASSTHROUGH" # camera JPEG payloads stored as-is, no decode/encode
+PASSTHROUGH_EXTENSION = ".avi"
+
+_unavailable_codecs = set() # probed once per process, so fallback warning isn't repeated on every video
+
+
+def encoder_settings(cam_config: dict) -> dict:
+    """Per camera encoder options (all optional in config.json)"""
+    return {
+        "codec": cam_config.get("VIDEO_CODEC", DEFAULT_CODEC),
+        "preset": cam_config.get("VIDEO_ENCODER_PRESET", "veryfast"),  # ffmpeg only, ultrafast ... veryslow
+        "quality": cam_config.get("VIDEO_ENCODER_QUALITY", 75),         # 0-100, higher = better/bigger
+        "ffmpeg_encoder": cam_config.get("VIDEO_FFMPEG_ENCODER", "libx264"),
+    }
+
+
+def transcode_settings(cam_config: dict) -> dict | None:
+    """Encoder options for optional transcode of finished passthrough videos (None = keep MJPEG)"""
+    codec = cam_config.get("TRANSCODE_CODEC")
+    if not codec:
+        return None
+    return {**encoder_settings(cam_config), "codec": codec}
+
+
+class OpenCVWriter:
+    """cv2.VideoWriter with a known output path"""
+    def __init__(self, path, writer, fourcc_str):
+        self.path = path
+        self.fourcc_str = fourcc_str
+        self._writer = writer
+
+    def write(self, frame):
+        self._writer.write(frame)
+
+    def release(self):
+        self._writer.release()
+
+
+class FfmpegWriter:
+    """Pipes raw BGR frames into external ffmpeg process, encoding happens outside of this process"""
+    def __init__(self, path, fps, frame_size, encoder, preset, quality):
+        self.path = path
+        self.fourcc_str = encoder
+        width, height = frame_size
+        crf = int(round(35 - quality * 0.17)) # quality 0..100 -> crf 35..18
+
+        cmd = [
+            shutil.which("ffmpeg"), "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+            "-an", "-c:v", encoder,
+        ]
+        if encoder == "libx264":
+            cmd += ["-preset", preset, "-crf", str(crf)]
+        cmd += ["-pix_fmt", "yuv420p", "-movflags", "+faststart", path]
+
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        self._proc.stdin.write(memoryview(frame).cast("B")) # no intermediate bytes copy for contiguous frames
+
+    def release(self):
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        _, stderr = self._proc.communicate()
+        if self._proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {self._proc.returncode} ({stderr.decode(errors='replace').strip()})")
+
+
+class MjpegAviWriter:
+    """
+    Minimal AVI 1.0 muxer for already compressed JPEG frames (MJPG stream + idx1 index).
+    Writing a frame is just a file write, header sizes are patched on release.
+    """
+    def __init__(self, path, fps, frame_size, quality=75):
+        self.path = path
+        self.fourcc_str = "MJPG"
+        self.frame_count = 0
+        self.quality = int(quality)
+        self._width, self._height = frame_size
+        self._fps = float(fps)
+        self._index = []          # (offset relative to 'movi', size)
+        self._max_chunk = 0
+        self._file = open(path, "wb")
+        self._write_headers()
+
+    def _write_headers(self):
+        w, h = self._width, self._height
+        rate, scale = int(round(self._fps * 1000)), 1000
+
+        avih = struct.pack("<14I", int(1e6 / self._fps), 0, 0, 0x10, 0, 0, 1, 0, w, h, 0, 0, 0, 0) # AVIF_HASINDEX
+        strh = struct.pack("<4s4sIHHIIIIIIIIhhhh", b"vids", b"MJPG", 0, 0, 0, 0, scale, rate, 0, 0, 0, 0xFFFFFFFF, 0, 0, 0, w, h)
+        strf = struct.pack("<IiiHH4sIiiII", 40, w, h, 1, 24, b"MJPG", w * h * 3, 0, 0, 0, 0)
+
+        strl = b"strl" + self._chunk(b"strh", strh) + self._chunk(b"strf", strf)
+        hdrl = b"hdrl" + self._chunk(b"avih", avih) + self._chunk(b"LIST", strl)
+
+        self._file.write(b"RIFF" + struct.pack("<I", 0) + b"AVI ")
+        self._avih_offset = self._file.tell() + 8 + 4 + 8        # LIST hdrl header + 'hdrl' + avih chunk header
+        self._strh_offset = self._avih_offset + len(avih) + 8 + 4 + 8  # LIST strl header + 'strl' + strh chunk header
+        self._file.write(self._chunk(b"LIST", hdrl))
+
+        self._movi_offset = self._file.tell()
+        self._file.write(b"LIST" + struct.pack("<I", 0) + b"movi")
+
+    @staticmethod
+    def _chunk(fourcc, data):
+        pad = b"\0" if len(data) % 2 else b""
+        return fourcc + struct.pack("<I", len(data)) + data + pad
+
+    def write_jpeg(self, jpeg):
+        """Append one compressed frame (bytes or 1-D uint8 array)"""
+        data = memoryview(jpeg).cast("B")
+        offset = self._file.tell() - (self._movi_offset + 8)  # relative to 'movi' fourcc
+        self._file.write(b"00dc" + struct.pack("<I", len(data)))
+        self._file.write(data)
+        if len(data) % 2:
+            self._file.write(b"\0")
+        self._index.append((offset, len(data)))
+        self._max_chunk = max(self._max_chunk, len(data))
+        self.frame_count += 1
+
+    def write(self, frame):
+        """Append decoded frame (needs JPEG encode, used only when raw payload is not available)"""
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if ok:
+            self.write_jpeg(jpeg)
+
+    def release(self):
+        if self._file.closed:
+            return
+        movi_end = self._file.tell()
+        self._file.write(b"idx1" + struct.pack("<I", 16 * len(self._index)))
+        self._file.write(b"".join(struct.pack("<4sIII", b"00dc", 0x10, offset, size) for offset, size in self._index)) # AVIIF_KEYFRAME
+        file_end = self._file.tell()
+
+        # patch sizes now that they are known
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", file_end - 8))
+        self._file.seek(self._movi_offset + 4)
+        self._file.write(struct.pack("<I", movi_end - self._movi_offset - 8))
+        self._file.seek(self._avih_offset + 16)
+        self._file.write(struct.pack("<I", self.frame_count))          # dwTotalFrames
+        self._file.seek(self._avih_offset + 28)
+        self._file.write(struct.pack("<I", self._max_chunk + 8))       # dwSuggestedBufferSize
+        self._file.seek(self._strh_offset + 32)
+        self._file.write(struct.pack("<II", self.frame_count, self._max_chunk + 8)) # dwLength, dwSuggestedBufferSize
+        self._file.close()
+
+
+def _open_opencv_writer(path_without_ext, codec, fps, frame_size, quality):
+    extension, fourcc_candidates = OPENCV_CODECS[codec]
+    path = path_without_ext + extension
+    for fourcc_str in fourcc_candidates:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc_str), fps, frame_size)
+        if writer.isOpened():
+            if codec == "MJPG":
+                writer.set(cv2.VIDEOWRITER_PROP_QUALITY, quality)
+            return OpenCVWriter(path, writer, fourcc_str)
+        writer.release()
+
+    # backend refused every fourcc, don't leave empty file behind
+    if os.path.exists(path):
+        os.remove(path)
+    return None
+
+
+def create_video_writer(cam_name, path_without_ext, fps, frame_size, settings):
+    """
+    Open video writer for given encoder settings, extension is chosen by the codec (see writer.path).
+    Falls back to mp4v when requested backend is not available on this host.
+    """
+    codec = settings["codec"]
+    writer = None
+
+    if codec == PASSTHROUGH_CODEC:
+        return MjpegAviWriter(path_without_ext + PASSTHROUGH_EXTENSION, fps, frame_size, settings["quality"])
+
+    if codec in _unavailable_codecs:
+        pass
+    elif codec == FFMPEG_CODEC:
+        if shutil.which("ffmpeg") is not None:
+            writer = FfmpegWriter(path_without_ext + FFMPEG_EXTENSION, fps, frame_size,
+                                  settings["ffmpeg_encoder"], settings["preset"], settings["quality"])
+        else:
+            logger.warning(f"[{cam_name}] ffmpeg not found on PATH, falling back to {DEFAULT_CODEC}")
+    elif codec in OPENCV_CODECS:
+        writer = _open_opencv_writer(path_without_ext, codec, fps, frame_size, settings["quality"])
+        if writer is None:
+            logger.warning(f"[{cam_name}] Codec {codec} not available in OpenCV build, falling back to {DEFAULT_CODEC}")
+    else:
+        logger.warning(f"[{cam_name}] Unknown codec {codec}, falling back to {DEFAULT_CODEC}")
+
+    if writer is None:
+        _unavailable_codecs.add(codec)
+        writer = _open_opencv_writer(path_without_ext, DEFAULT_CODEC, fps, frame_size, settings["quality"])
+        if writer is None:
+            raise RuntimeError(f"Failed to open video writer for {path_without_ext}")
+
+    return writer
+
+
+def transcode_video(cam_name, src_path, path_without_ext, fps, frame_size, settings):
+    """
+    Re-encode finished video with given settings, returns path of the new file.
+    ffmpeg reads the source itself when available, otherwise frames are decoded by OpenCV.
+    """
+    if settings["codec"] == FFMPEG_CODEC and FFMPEG_CODEC not in _unavailable_codecs and shutil.which("ffmpeg") is not None:
+        path = path_without_ext + FFMPEG_EXTENSION
+        cmd = [shutil.which("ffmpeg"), "-hide_banner", "-loglevel", "error", "-y", "-i", src_path, "-an", "-c:v", settings["ffmpeg_encoder"]]
+        if settings["ffmpeg_encoder"] == "libx264":
+            cmd += ["-preset", settings["preset"], "-crf", str(int(round(35 - settings["quality"] * 0.17)))]
+        cmd += ["-pix_fmt", "yuv420p", "-movflags", "+faststart", path]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {result.returncode} ({result.stderr.decode(errors='replace').strip()})")
+        return path
+
+    cap = cv2.VideoCapture(src_path)
+    source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    if all(source_size):
+        frame_size = source_size # video may be older than current camera config (deferred transcode, config reload)
+    writer = create_video_writer(cam_name, path_without_ext, fps, frame_size, settings)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(frame)
+    finally:
+        cap.release()
+        writer.release()
+    return writer.path
@@ -0,0 +1,545 @@
+"""
+Event notifications (motion start/stop, clip ready) for receivers outside of Purr View.
+
+Camera threads only append into bounded in-memory queue (never block, oldest event is dropped when full),
+every sink has its own dispatcher thread, which delivers events in batches, coalesces rapid re-triggers
+and retries failed deliveries. Sinks are configured as URLs in EVENTS_SINKS:
+
+    http://host/path, https://...     JSON POST {"events": [...]}
+    mqtt://host:1883/purrview          MQTT 3.1.1 publish (QoS 1) of each event to purrview/<CAM>/<type>
+    unix:///run/purrview/events.sock   JSON lines over Unix stream socket
+
+Stand-in receivers for testing (print events and delivery latency):
+
+    python3 events.py receive --http 9000
+    python3 events.py receive --unix /tmp/purrview-events.sock
+    python3 events.py receive --mqtt 1883
+    python3 events.py bench --sink http://127.0.0.1:9000/ --events 1000 --rate 200
+"""
+import os
+import json
+import time
+import socket
+import struct
+import threading
+import urllib.parse
+import urllib.request
+from collections import deque
+from logging_setup import get_logger
+
+logger = get_logger()
+
+EVENT_MOTION_START = "motion_start"
+EVENT_MOTION_STOP = "motion_stop"
+EVENT_CLIP_READY = "clip_ready"
+
+QUEUE_MAX_EVENTS = 1000
+BATCH_MAX_EVENTS = 50
+RETRY_INITIAL_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 30.0
+RETRY_MAX_ATTEMPTS = 5
+SINK_TIMEOUT_SECONDS = 5.0
+LATENCY_SAMPLES = 1000
+
+
+def coalesce(batch, window_seconds):
+    """
+    Fold rapid re-triggers of one camera: motion_stop followed by motion_start within window_seconds are both
+    dropped (motion just continues), repeated motion_start without stop in between is dropped.
+    Returns (remaining items, number of folded events).
+    """
+    result = []
+    open_cams = {}  # cam -> index in result of motion_stop, which may still be cancelled by quick motion_start
+    started = set()
+    folded = 0
+    for item in batch:
+        _, event = item
+        cam = event["cam"]
+        if event["type"] == EVENT_MOTION_START:
+            stop_index = open_cams.pop(cam, None)
+            if stop_index is not None and event["ts"] - result[stop_index][1]["ts"] <= window_seconds:
+                result[stop_index] = None
+                folded += 2
+                started.add(cam)
+                continue
+            if cam in started:
+                folded += 1
+                continue
+            started.add(cam)
+        elif event["type"] == EVENT_MOTION_STOP:
+            started.discard(cam)
+            open_cams[cam] = len(result)
+        result.append(item)
+    return [item for item in result if item is not None], folded
+
+
+### sinks ###
+
+class WebhookSink:
+    """HTTP POST of {"events": [...]}, any 2xx status is success"""
+    def __init__(self, url, timeout=SINK_TIMEOUT_SECONDS):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events):
+        body = json.dumps({"events": events}).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+    def close(self):
+        pass
+
+
+class UnixSocketSink:
+    """Newline delimited JSON events over Unix stream socket, connection kept open between batches"""
+    def __init__(self, path, timeout=SINK_TIMEOUT_SECONDS):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+
+    def send(self, events):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._sock = sock
+        try:
+            self._sock.sendall(b"".join(json.dumps(event).encode() + b"\n" for event in events))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def _mqtt_string(value):
+    data = value.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+def _mqtt_packet(packet_type, payload):
+    """Fixed header (type/flags byte + variable length remaining length) + payload"""
+    length = len(payload)
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes([packet_type]) + bytes(encoded) + payload
+
+
+def _mqtt_read_packet(sock):
+    """(type/flags byte, payload) of next packet"""
+    header = _recv_exact(sock, 1)[0]
+    length, shift = 0, 0
+    while True:
+        byte = _recv_exact(sock, 1)[0]
+        length += (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return header, _recv_exact(sock, length)
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return data
+
+
+class MqttSink:
+    """
+    Minimal MQTT 3.1.1 publisher (no external library): QoS 1 publish of every event to <prefix>/<CAM>/<type>,
+    batch is delivered once broker acknowledged all its messages.
+    """
+    KEEPALIVE_SECONDS = 60
+
+    def __init__(self, host, port=1883, topic_prefix="purrview", client_id=None, timeout=SINK_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.topic_prefix = topic_prefix.strip("/") or "purrview"
+        self.client_id = client_id or f"purrview-{socket.gethostname()}-{os.getpid()}"
+        self.timeout = timeout
+        self._sock = None
+        self._packet_id = 0
+        self._last_sent = 0.0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        # protocol name, level 4 (3.1.1), clean session flag, keepalive, client id
+        payload = _mqtt_string("MQTT") + bytes([4, 0x02]) + struct.pack("!H", self.KEEPALIVE_SECONDS) + _mqtt_string(self.client_id)
+        sock.sendall(_mqtt_packet(0x10, payload))
+        header, body = _mqtt_read_packet(sock)
+        if header >> 4 != 2 or len(body) < 2 or body[1] != 0:
+            sock.close()
+            raise ConnectionError(f"MQTT connection refused ({body[1] if len(body) > 1 else 'malformed CONNACK'})")
+        self._sock = sock
+        self._last_sent = time.monotonic()
+
+    def send(self, events):
+        if self._sock is not None and time.monotonic() - self._last_sent > self.KEEPALIVE_SECONDS:
+            self.close() # broker dropped idle connection by now, don't wait for a timeout to find out
+        if self._sock is None:
+            self._connect()
+        try:
+            pending = set()
+            for event in events:
+                self._packet_id = self._packet_id % 0xFFFF + 1
+                topic = f"{self.topic_prefix}/{event['cam']}/{event['type']}"
+                payload = _mqtt_string(topic) + struct.pack("!H", self._packet_id) + json.dumps(event).encode()
+                self._sock.sendall(_mqtt_packet(0x32, payload)) # PUBLISH, QoS 1
+                pending.add(self._packet_id)
+            while pending:
+                header, body = _mqtt_read_packet(self._sock)
+                if header >> 4 == 4: # PUBACK
+                    pending.discard(struct.unpack("!H", body[:2])[0])
+            self._last_sent = time.monotonic()
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.sendall(_mqtt_packet(0xE0, b"")) # DISCONNECT
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+
+def create_sink(url):
+    """Sink for URL from EVENTS_SINKS, ValueError for unknown scheme"""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return WebhookSink(url)
+    if parsed.scheme == "mqtt":
+        return MqttSink(parsed.hostname or "localhost", parsed.port or 1883, parsed.path or "purrview")
+    if parsed.scheme == "unix":
+        return UnixSocketSink(parsed.path)
+    raise ValueError(f"unsupported event sink {url} (http, https, mqtt or unix)")
+
+
+### dispatch ###
+
+class Dispatcher:
+    """Bounded queue + delivery thread of one sink"""
+    def __init__(self, name, sink, stop_event, batch_seconds, coalesce_seconds, max_queue=QUEUE_MAX_EVENTS):
+        self.name = name
+        self.sink = sink
+        self.stop_event = stop_event
+        self.batch_seconds = batch_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self._queue = deque()
+        self._held = []  # recent motion_stop events waiting for possible re-trigger (delivery thread only)
+        self._max_queue = max_queue
+        self._cond = threading.Condition()
+        self._thread = None
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # emit -> delivered (ms)
+        self.stats = {
+            "queued": 0,
+            "delivered": 0,
+            "batches": 0,
+            "coalesced": 0,
+            "dropped": 0,     # queue full
+            "failed": 0,      # given up after RETRY_MAX_ATTEMPTS
+            "retries": 0,
+            "max_queue_depth": 0,
+        }
+
+    def offer(self, item):
+        """Called from camera threads, never blocks"""
+        with self._cond:
+            if len(self._queue) >= self._max_queue:
+                self._queue.popleft()
+                self.stats["dropped"] += 1
+            self._queue.append(item)
+            self.stats["queued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+            self._cond.notify()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"events-{self.name}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        """
+        Wait for first event, then batch_seconds for more. motion_stop is held back for coalesce_seconds,
+        so motion starting again right after it cancels both instead of notifying twice.
+        """
+        with self._cond:
+            while not self._queue:
+                timeout = 0.5
+                if self._held:
+                    timeout = self._held[0][0] + self.coalesce_seconds - time.monotonic()
+                    if timeout <= 0:
+                        break
+                if self.stop_event.is_set():
+                    if self._held:
+                        break # flush held events on shutdown
+                    return None
+                self._cond.wait(timeout)
+        if self.batch_seconds > 0 and len(self._queue) < BATCH_MAX_EVENTS and not self.stop_event.is_set():
+            self.stop_event.wait(self.batch_seconds)
+        with self._cond:
+            batch = self._held + [self._queue.popleft() for _ in range(min(BATCH_MAX_EVENTS, len(self._queue)))]
+        if self.coalesce_seconds > 0:
+            batch, folded = coalesce(batch, self.coalesce_seconds)
+            self.stats["coalesced"] += folded
+
+        self._held = []
+        if self.stop_event.is_set():
+            return batch
+        now = time.monotonic()
+        last_motion_event = {event["cam"]: i for i, (_, event) in enumerate(batch) if event["type"] in (EVENT_MOTION_START, EVENT_MOTION_STOP)}
+        ready = []
+        for i, item in enumerate(batch):
+            emitted, event = item
+            if event["type"] == EVENT_MOTION_STOP and last_motion_event[event["cam"]] == i and now - emitted < self.coalesce_seconds:
+                self._held.append(item)
+            else:
+                ready.append(item)
+        return ready
+
+    def _deliver(self, batch):
+        delay = RETRY_INITIAL_DELAY_SECONDS
+        for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+            try:
+                self.sink.send([event for _, event in batch])
+                now = time.monotonic()
+                self._latencies.extend((now - emitted) * 1000 for emitted, _ in batch)
+                self.stats["delivered"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except Exception as e:
+                if attempt == RETRY_MAX_ATTEMPTS or self.stop_event.is_set():
+                    logger.error(f"[SYS] Event sink {self.name} failed, {len(batch)} events dropped ({repr(e)})")
+                    break
+                logger.warning(f"[SYS] Event sink {self.name} failed, retry in {delay:.0f} s ({repr(e)})")
+                self.stats["retries"] += 1
+                if self.stop_event.wait(delay):
+                    break # shutting down, no point in waiting for receiver
+                delay = min(delay * 2, RETRY_MAX_DELAY_SECONDS)
+        self.stats["failed"] += len(batch)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            if batch:
+                self._deliver(batch)
+        self.sink.close()
+
+    def status(self):
+        with self._cond:
+            depth = len(self._queue)
+        latencies = sorted(self._latencies)
+        latency = {}
+        if latencies:
+            latency = {
+                "avg_ms": round(sum(latencies) / len(latencies), 3),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                "max_ms": round(latencies[-1], 3),
+            }
+        return {"sink": self.name, "queue_depth": depth, "held": len(self._held), **self.stats, "latency": latency}
+
+
+class EventBus:
+    """
+    Fan-out of camera events to all sinks, emit() is safe to call from any thread and never blocks.
+    Has own stop event, so clips finalised during shutdown are still announced before close().
+    """
+    def __init__(self, sink_urls, batch_seconds=0.2, coalesce_seconds=2.0):
+        self.stop_event = threading.Event()
+        self.dispatchers = []
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        for url in sink_urls:
+            try:
+                sink = create_sink(url)
+            except ValueError as e:
+                logger.error(f"[SYS] Event sink skipped ({repr(e)})")
+                continue
+            self.dispatchers.append(Dispatcher(url, sink, self.stop_event, batch_seconds, coalesce_seconds))
+
+    def start(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.start()
+        if self.dispatchers:
+            logger.info(f"[SYS] Event notifications enabled ({', '.join(d.name for d in self.dispatchers)})")
+
+    def close(self, timeout=SINK_TIMEOUT_SECONDS):
+        """Deliver what is queued (one attempt, no retries) and stop dispatchers"""
+        self.stop_event.set()
+        for dispatcher in self.dispatchers:
+            dispatcher.join(timeout)
+
+    def emit(self, event_type, cam_name, **data):
+        if not self.dispatchers:
+            return
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        event = {"id": seq, "type": event_type, "cam": cam_name, "ts": time.time(), **data}
+        item = (time.monotonic(), event)
+        for dispatcher in self.dispatchers:
+            dispatcher.offer(item)
+
+    def status(self):
+        return [dispatcher.status() for dispatcher in self.dispatchers]
+
+
+### stand-in receivers ###
+
+class _Receiver:
+    """Prints received events and their latency (receive time - event ts, same machine clock)"""
+    def __init__(self):
+        self.count = 0
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def received(self, event):
+        latency_ms = (time.time() - event["ts"]) * 1000
+        with self._lock:
+            self.count += 1
+            self.latencies.append(latency_ms)
+        print(f"{event['cam']} {event['type']} #{event['id']} latency {latency_ms:.1f} ms {json.dumps(event)}", flush=True)
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return "no events received"
+        return (f"{self.count} events, latency avg {sum(latencies) / len(latencies):.1f} ms, "
+                f"p95 {latencies[int((len(latencies) - 1) * 0.95)]:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+def _serve_http(receiver, port):
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            for event in json.loads(body)["events"]:
+                receiver.received(event)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("0.0.0.0", port), Handler).serve_forever()
+
+
+def _serve_stream(receiver, server, handle):
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=handle, args=(receiver, conn), daemon=True).start()
+
+
+def _handle_json_lines(receiver, conn):
+    with conn, conn.makefile("rb") as f:
+        for line in f:
+            receiver.received(json.loads(line))
+
+
+def _handle_mqtt(receiver, conn):
+    """Just enough of a broker: accepts connection, acknowledges and prints publishes"""
+    with conn:
+        try:
+            while True:
+                header, body = _mqtt_read_packet(conn)
+                packet_type = header >> 4
+                if packet_type == 1: # CONNECT
+                    conn.sendall(_mqtt_packet(0x20, b"\x00\x00"))
+                elif packet_type == 3: # PUBLISH
+                    topic_length = struct.unpack("!H", body[:2])[0]
+                    offset = 2 + topic_length
+                    if (header >> 1) & 0x03: # QoS 1 -> packet id + PUBACK
+                        conn.sendall(_mqtt_packet(0x40, body[offset:offset + 2]))
+                        offset += 2
+                    receiver.received(json.loads(body[offset:]))
+                elif packet_type == 12: # PINGREQ
+                    conn.sendall(_mqtt_packet(0xD0, b""))
+                elif packet_type == 14: # DISCONNECT
+                    return
+        except ConnectionError:
+            return
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Purr View event notification tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    receive = commands.add_parser("receive", help="stand-in receiver, prints events and delivery latency")
+    receive.add_argument("--http", type=int, metavar="PORT")
+    receive.add_argument("--unix", metavar="PATH")
+    receive.add_argument("--mqtt", type=int, metavar="PORT")
+    bench = commands.add_parser("bench", help="emit synthetic events into sink and print dispatcher stats")
+    bench.add_argument("--sink", required=True, help="sink URL (same format as EVENTS_SINKS)")
+    bench.add_argument("--events", type=int, default=1000)
+    bench.add_argument("--rate", type=float, default=100.0, help="events per second")
+    bench.add_argument("--cams", type=int, default=4)
+    bench.add_argument("--batch", type=float, default=0.2, help="EVENTS_BATCH_SECONDS")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bus = EventBus([args.sink], batch_seconds=args.batch, coalesce_seconds=0)
+        bus.start()
+        emit_ms = []
+        for n in range(args.events):
+            start = time.perf_counter()
+            bus.emit(EVENT_MOTION_START if (n // args.cams) % 2 == 0 else EVENT_MOTION_STOP, f"CAM{n % args.cams + 1}", motion_percent=1.0)
+            emit_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(1.0 / args.rate)
+        dispatcher = bus.dispatchers[0]
+        deadline = time.monotonic() + 30
+        while sum(dispatcher.stats[key] for key in ("delivered", "failed", "dropped", "coalesced")) < args.events and time.monotonic() < deadline:
+            time.sleep(0.05)
+        bus.close()
+        print(json.dumps({"emit_max_ms": round(max(emit_ms), 3), "sinks": bus.status()}, indent=2))
+        return
+
+    receiver = _Receiver()
+    threads = []
+    if args.http:
+        threads.append(threading.Thread(target=_serve_http, args=(receiver, args.http), daemon=True))
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(args.unix)
+        server.listen()
+        threads.append(threading.Thread(target=_serve_stream, args=(receiver, server, _handle_json_lines), daemon=True))
+    if args.mqtt:
+        server = socket.create_server(("0.0.0.0", args.mqtt))
+        threads.append(threading.Thread(target=_serve_stream, args=(receiver, server, _handle_mqtt), daemon=True))
+    if not threads:
+        parser.error("receive needs at least one of --http, --unix, --mqtt")
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(receiver.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Shared memory frame bus: every camera publishes its frames into a ring in /dev/shm/purrview_<CAM>,
+other local processes read them zero-copy with FrameBusReader (only numpy needed, no Purr View config):
+
+    from framebus import FrameBusReader
+    reader = FrameBusReader("CAM1")
+    while True:
+        frame = reader.wait_next(timeout=1.0)
+        if frame is not None:
+            process(frame.image, frame.motion_percent)
+
+Layout: header | slots x (slot header | H x W x C uint8 image). Each slot is guarded by seqlock (odd sequence
+= being written), readers retry instead of blocking the writer, so slow consumers never slow down capture.
+"""
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+FRAME_BUS_PREFIX = "purrview_"
+FRAME_BUS_MAGIC = b"PURRBUS1"
+FRAME_BUS_VERSION = 1
+DEFAULT_SLOTS = 4
+
+# magic, version, slots, height, width, channels, closed, slot size, latest frame index
+HEADER = struct.Struct("<8sIIIIIIQQ")
+HEADER_SIZE = 64
+LATEST_OFFSET = struct.calcsize("<8sIIIIIIQ")
+CLOSED_OFFSET = struct.calcsize("<8sIIIII")
+# sequence, frame index, wall clock timestamp, capture timestamp (time.monotonic), motion percent
+SLOT_HEADER = struct.Struct("<QQddf")
+SLOT_HEADER_SIZE = 64
+
+READ_RETRIES = 8
+REATTACH_INTERVAL_SECONDS = 0.5
+
+BusFrame = namedtuple("BusFrame", ["index", "timestamp", "capture_ts", "motion_percent", "image", "slot", "seq"])
+
+
+def frame_bus_name(cam_name):
+    return f"{FRAME_BUS_PREFIX}{cam_name}"
+
+
+def _attach(name):
+    """Attach to existing segment without registering it in resource tracker (it would unlink it when reader exits)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # Python < 3.13
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _Ring:
+    """Views over mapped segment, shared by writer and reader"""
+    def __init__(self, shm, slots, shape):
+        self.shm = shm
+        self.slots = slots
+        self.shape = shape
+        self.slot_size = SLOT_HEADER_SIZE + int(np.prod(shape))
+        self.images = [
+            np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=self.slot_offset(slot) + SLOT_HEADER_SIZE)
+            for slot in range(slots)
+        ]
+
+    def slot_offset(self, slot):
+        return HEADER_SIZE + slot * self.slot_size
+
+    def release(self):
+        self.images = []  # numpy views must be gone before segment can be closed
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # consumer still holds zero-copy frame, mapping is released together with it
+
+
+class FrameBusWriter:
+    """Publishing side (camera worker): fixed frame shape, frame indexes start at 1"""
+    def __init__(self, cam_name, shape, slots=DEFAULT_SLOTS):
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        self.shape = (height, width, channels) if len(shape) > 2 else (height, width)
+        self.name = frame_bus_name(cam_name)
+        self.frame_index = 0
+
+        size = HEADER_SIZE + slots * (SLOT_HEADER_SIZE + height * width * channels)
+        try:
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # left over by crashed process, readers of the old segment reattach to the new one
+            stale = _attach(self.name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+
+        self._ring = _Ring(shm, slots, self.shape)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        for slot in range(slots):
+            SLOT_HEADER.pack_into(shm.buf, self._ring.slot_offset(slot), 0, 0, 0.0, 0.0, 0.0)
+        HEADER.pack_into(shm.buf, 0, FRAME_BUS_MAGIC, FRAME_BUS_VERSION, slots, height, width, channels, 0, self._ring.slot_size, 0)
+
+    def publish(self, frame, timestamp, capture_ts, motion_percent):
+        ring = self._ring
+        buf = ring.shm.buf
+        self.frame_index += 1
+        slot = self.frame_index % ring.slots
+        offset = ring.slot_offset(slot)
+
+        seq = SLOT_HEADER.unpack_from(buf, offset)[0] + 1
+        struct.pack_into("<Q", buf, offset, seq)  # odd: readers of this slot retry
+        np.copyto(ring.images[slot], frame)
+        SLOT_HEADER.pack_into(buf, offset, seq + 1, self.frame_index, timestamp, capture_ts, motion_percent)
+        struct.pack_into("<Q", buf, LATEST_OFFSET, self.frame_index)
+
+    def close(self):
+        """Mark bus closed (readers reattach when camera publishes again) and remove segment"""
+        shm = self._ring.shm
+        struct.pack_into("<I", shm.buf, CLOSED_OFFSET, 1)
+        self._ring.release()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameBusReader:
+    """
+    Consuming side. wait_next() returns newest frame not seen yet (slow reader skips frames, see .missed).
+    With copy=False image is a view into shared memory: valid until writer comes around the ring
+    (slots - 1 frames later), check with is_valid(frame) after processing.
+    """
+    def __init__(self, cam_name):
+        self.name = frame_bus_name(cam_name)
+        self.last_index = 0
+        self.missed = 0
+        self._ring = None
+        self._next_attach_ts = 0.0
+        self._attach()
+
+    def _attach(self, skip_existing=False):
+        self._next_attach_ts = time.monotonic() + REATTACH_INTERVAL_SECONDS
+        try:
+            shm = _attach(self.name)
+        except FileNotFoundError:
+            return False
+        magic, version, slots, height, width, channels, closed, _, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != FRAME_BUS_MAGIC or version != FRAME_BUS_VERSION or closed:
+            shm.close()
+            return False
+        self._ring = _Ring(shm, slots, (height, width, channels) if channels > 1 else (height, width))
+        self.last_index = struct.unpack_from("<Q", shm.buf, LATEST_OFFSET)[0] if skip_existing else 0
+        return True
+
+    @property
+    def connected(self):
+        return self._ring is not None
+
+    @property
+    def shape(self):
+        return self._ring.shape if self._ring is not None else None
+
+    def _check_connection(self):
+        if self._ring is not None and struct.unpack_from("<I", self._ring.shm.buf, CLOSED_OFFSET)[0]:
+            self._ring.release()
+            self._ring = None
+        if self._ring is None and time.monotonic() >= self._next_attach_ts:
+            self._attach()
+        return self._ring is not None
+
+    def latest_index(self):
+        if not self._check_connection():
+            return 0
+        return struct.unpack_from("<Q", self._ring.shm.buf, LATEST_OFFSET)[0]
+
+    def read(self, frame_index, copy=True):
+        """Frame with given index, None if it is not (or no longer) in the ring"""
+        ring = self._ring
+        if ring is None:
+            return None
+        slot = frame_index % ring.slots
+        offset = ring.slot_offset(slot)
+        for _ in range(READ_RETRIES):
+            seq, index, timestamp, capture_ts, motion_percent = SLOT_HEADER.unpack_from(ring.shm.buf, offset)
+            if seq % 2:
+                continue  # being written right now
+            if index != frame_index:
+                return None
+            image = ring.images[slot].copy() if copy else ring.images[slot]
+            if not copy or SLOT_HEADER.unpack_from(ring.shm.buf, offset)[0] == seq:
+                return BusFrame(index, timestamp, capture_ts, motion_percent, image, slot, seq)
+        return None
+
+    def is_valid(self, frame):
+        """True while zero-copy frame was not overwritten"""
+        if self._ring is None:
+            return False
+        return SLOT_HEADER.unpack_from(self._ring.shm.buf, self._ring.slot_offset(frame.slot))[0] == frame.seq
+
+    def wait_next(self, timeout=1.0, copy=True, poll_sec=0.001):
+        """Newest frame published after previously returned one, None on timeout or when camera is not publishing"""
+        deadline = time.monotonic() + timeout
+        while True:
+            latest = self.latest_index()
+            if latest > self.last_index:
+                frame = self.read(latest, copy=copy)
+                if frame is not None:
+                    if self.last_index:
+                        self.missed += latest - self.last_index - 1
+                    self.last_index = latest
+                    return frame
+            if time.monotonic() >= deadline:
+                # nothing new: camera may be reopening, or writer died and a new segment replaced ours
+                self.close()
+                self._attach(skip_existing=True)
+                return None
+            time.sleep(poll_sec)
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.release()
+            self._ring = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read frames of one camera from frame bus and print rate")
+    parser.add_argument("cam", help="camera name, e.g. CAM1")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    reader = FrameBusReader(args.cam)
+    received = 0
+    start = time.monotonic()
+    while time.monotonic() - start < args.seconds:
+        frame = reader.wait_next(timeout=1.0, copy=False)
+        if frame is None:
+            print(f"{args.cam}: no frames")
+            continue
+        received += 1
+        latency_ms = (time.monotonic() - frame.capture_ts) * 1000
+        print(f"{args.cam}: frame {frame.index} {frame.image.shape} motion {frame.motion_percent:.2f}% latency {latency_ms:.1f} ms valid {reader.is_valid(frame)}")
+    print(f"{args.cam}: {received / args.seconds:.1f} FPS, {reader.missed} frames skipped")
+    reader.close()
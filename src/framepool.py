@@ -0,0 +1,98 @@
+import threading
+from collections import deque
+import numpy as np
+
+
+class FramePool:
+    """
+    Preallocated frame buffers of one shape, recycled through the pre-buffer ring,
+    so steady-state capture doesn't allocate (cap.read(image=...) writes into pooled buffer).
+    Readers outside camera worker (preview, burst) pin buffers, pinned buffer is recycled only after it is unpinned.
+    """
+    def __init__(self, shape, capacity, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)  # max number of free buffers kept
+        self._free = deque(np.empty(self.shape, self.dtype) for _ in range(self.capacity))
+        self._lock = threading.Lock()
+        self._pinned = {}  # id(buffer) -> [buffer, pin count, released while pinned]
+
+        # statistics (reported by benchmark)
+        self.allocations = self.capacity
+        self.reuses = 0
+
+    def acquire(self):
+        """Free buffer, newly allocated only when all buffers are in use"""
+        with self._lock:
+            if self._free:
+                self.reuses += 1
+                return self._free.pop()
+            self.allocations += 1
+        return np.empty(self.shape, self.dtype)
+
+    def release(self, buf) -> None:
+        """Return buffer for reuse (foreign shapes and buffers above capacity are left to GC)"""
+        if buf is None or buf.shape != self.shape or buf.dtype != self.dtype:
+            return
+        with self._lock:
+            entry = self._pinned.get(id(buf))
+            if entry is not None:
+                entry[2] = True  # recycled by unpin/unpin_items
+                return
+            self._release_locked(buf)
+
+    def _release_locked(self, buf) -> None:
+        if len(self._free) < self.capacity:
+            self._free.append(buf)
+
+    def pin(self, read):
+        """
+        Call read() under pool lock and pin buffer it returns (None allowed), so buffer can't be recycled
+        between reading and pinning (read must not return free buffer, e.g. current preview frame)
+        """
+        with self._lock:
+            buf = read()
+            if buf is not None:
+                self._pin_locked(buf)
+        return buf
+
+    def unpin(self, buf) -> None:
+        """Undo pin, buffer released meanwhile goes back to pool now"""
+        if buf is None:
+            return
+        with self._lock:
+            self._unpin_locked(buf)
+
+    def pin_items(self, items, index):
+        """
+        Copy of items (e.g. burst ring of tuples) with buffer item[index] of every item pinned. Copy is taken under
+        pool lock, so no buffer in it can be recycled between copying and pinning (items must not hold free buffers).
+        """
+        with self._lock:
+            items = list(items)
+            for item in items:
+                self._pin_locked(item[index])
+        return items
+
+    def unpin_items(self, items, index) -> None:
+        """Undo pin_items, buffers released meanwhile go back to pool now"""
+        with self._lock:
+            for item in items:
+                self._unpin_locked(item[index])
+
+    def _pin_locked(self, buf) -> None:
+        entry = self._pinned.get(id(buf))
+        if entry is None:
+            self._pinned[id(buf)] = [buf, 1, False]
+        else:
+            entry[1] += 1
+
+    def _unpin_locked(self, buf) -> None:
+        entry = self._pinned.get(id(buf))
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._pinned[id(buf)]
+            if entry[2]:
+                self._release_locked(entry[0])
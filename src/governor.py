@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+import psutil
+from logging_setup import get_logger
+
+logger = get_logger()
+
+# degradation levels relieving CPU, each one includes all previous ones
+LEVEL_NORMAL = 0
+LEVEL_PREVIEW_REDUCED = 1     # preview at half HTTP FPS
+LEVEL_DETECTION_SPARSE = 2    # motion detection on every 2nd detection frame
+LEVEL_PREVIEW_PAUSED = 3      # no preview frames at all
+LEVEL_NAMES = ["NORMAL", "PREVIEW_REDUCED", "DETECTION_SPARSE", "PREVIEW_PAUSED"]
+
+# recording levels relieving encoders and /dev/shm (preview and detection don't write videos)
+RECORDING_NORMAL = 0
+RECORDING_REDUCED = 1         # new recordings at half FPS
+RECORDING_LEVEL_NAMES = ["NORMAL", "RECORDING_REDUCED"]
+
+# pressure (usage/budget ratio) above 1 degrades one camera per tick, below RELEASE_PRESSURE restores one
+RELEASE_PRESSURE = 0.8
+# after a change the same ladder waits this long, so the next decision sees effect of the previous one
+HOLD_SECONDS = 5.0
+
+
+class ResourceGovernor:
+    """
+    Shares CPU, /dev/shm and encoder budget between cameras.
+    Once per poll_sec it measures usage and moves one camera one level up (lowest PRIORITY first) or down
+    (highest PRIORITY first), so the box degrades gradually instead of dropping frames everywhere at once.
+    CPU pressure moves preview/detection levels, encoder and /dev/shm pressure recording levels,
+    each ladder holds for HOLD_SECONDS after a change.
+    """
+    def __init__(self, stop_event, camera_configs, shm_path, active_encoders, max_cpu_percent, max_shm_bytes, max_encoders, poll_sec: float = 1.0):
+        self.stop_event = stop_event
+        self.camera_configs = camera_configs
+        self.shm_path = shm_path
+        self.active_encoders = active_encoders  # callable -> int
+        self.max_cpu_percent = float(max_cpu_percent)
+        self.max_shm_bytes = int(max_shm_bytes)
+        self.max_encoders = int(max_encoders)
+        self.poll_sec = poll_sec
+
+        self.levels = [LEVEL_NORMAL for _ in camera_configs]
+        self.recording_levels = [RECORDING_NORMAL for _ in camera_configs]
+        self._last_change = {"cpu": -HOLD_SECONDS, "recording": -HOLD_SECONDS}  # time.monotonic() of last change per ladder
+        self.metrics = {
+            "cpu_percent": 0.0,
+            "shm_bytes": 0,
+            "encoders": 0,
+            "pressure": 0.0,
+            "level_changes": 0,
+        }
+        self._thread = None
+
+    def start(self):
+        psutil.cpu_percent(None)  # prime counter
+        self._thread = threading.Thread(target=self._run, name="resource-governor", daemon=True)
+        self._thread.start()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    ### per-camera knobs, read by camera workers and viewer ###
+
+    def preview_fps_factor(self, cam_index) -> float:
+        level = self.levels[cam_index]
+        if level >= LEVEL_PREVIEW_PAUSED:
+            return 0.0
+        return 0.5 if level >= LEVEL_PREVIEW_REDUCED else 1.0
+
+    def detection_step_factor(self, cam_index) -> int:
+        return 2 if self.levels[cam_index] >= LEVEL_DETECTION_SPARSE else 1
+
+    def record_step(self, cam_index) -> int:
+        """Write every n-th frame of new recordings"""
+        return 2 if self.recording_levels[cam_index] >= RECORDING_REDUCED else 1
+
+    def priority(self, cam_index) -> int:
+        return int(self.camera_configs[cam_index].get("PRIORITY", 0))  # read live, config can be reloaded
+
+    ### control loop ###
+
+    def _shm_usage_bytes(self):
+        total = 0
+        try:
+            with os.scandir(self.shm_path) as it:
+                for entry in it:
+                    try:
+                        total += entry.stat().st_size
+                    except FileNotFoundError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return total
+
+    def measure(self):
+        """Usage/budget ratio of every budget: {"cpu", "shm", "encoders"}"""
+        cpu = psutil.cpu_percent(None)
+        shm = self._shm_usage_bytes()
+        encoders = self.active_encoders()
+        ratios = {"cpu": cpu / self.max_cpu_percent if self.max_cpu_percent else 0.0,
+                  "shm": shm / self.max_shm_bytes if self.max_shm_bytes else 0.0,
+                  "encoders": encoders / self.max_encoders if self.max_encoders else 0.0}
+        self.metrics.update({"cpu_percent": cpu, "shm_bytes": shm, "encoders": encoders, "pressure": max(ratios.values())})
+        return ratios
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_sec):
+            try:
+                self.step(self.measure())
+            except Exception as e:
+                logger.error(f"[SYS] Resource governor tick failed ({repr(e)})")
+
+    def step(self, ratios, now=None):
+        """Move at most one camera by one level on each ladder according to the budgets that ladder relieves"""
+        now = time.monotonic() if now is None else now
+        self._step_ladder("cpu", self.levels, LEVEL_NAMES, ratios["cpu"], now)
+        self._step_ladder("recording", self.recording_levels, RECORDING_LEVEL_NAMES, max(ratios["shm"], ratios["encoders"]), now)
+
+    def _step_ladder(self, ladder, levels, names, pressure, now):
+        if now - self._last_change[ladder] < HOLD_SECONDS:
+            return
+        cams = range(len(self.camera_configs))
+        if pressure > 1.0:
+            candidates = [i for i in cams if levels[i] < len(names) - 1]
+            if candidates:
+                # lowest priority first, spread among equal priorities
+                cam_index = min(candidates, key=lambda i: (self.priority(i), levels[i]))
+                self._set_level(levels, names, cam_index, levels[cam_index] + 1, pressure)
+                self._last_change[ladder] = now
+        elif pressure < RELEASE_PRESSURE:
+            candidates = [i for i in cams if levels[i] > 0]
+            if candidates:
+                cam_index = max(candidates, key=lambda i: (self.priority(i), levels[i]))
+                self._set_level(levels, names, cam_index, levels[cam_index] - 1, pressure)
+                self._last_change[ladder] = now
+
+    def _set_level(self, levels, names, cam_index, level, pressure):
+        cam_name = self.camera_configs[cam_index]["NAME"]
+        logger.warning(f"[{cam_name}] {'Recording' if levels is self.recording_levels else 'Degradation'} level {names[levels[cam_index]]} -> {names[level]} "
+                       f"(pressure {pressure:.2f}, CPU {self.metrics['cpu_percent']:.2f} %, shm {self.metrics['shm_bytes'] / (1024**2):.2f} MB, encoders {self.metrics['encoders']})")
+        levels[cam_index] = level
+        self.metrics["level_changes"] += 1
+
+    def prometheus_metrics(self) -> str:
+        """Measurements and decisions in Prometheus text format"""
+        lines = [
+            "# TYPE purrview_governor_cpu_percent gauge",
+            f"purrview_governor_cpu_percent {self.metrics['cpu_percent']}",
+            "# TYPE purrview_governor_shm_bytes gauge",
+            f"purrview_governor_shm_bytes {self.metrics['shm_bytes']}",
+            "# TYPE purrview_governor_encoders gauge",
+            f"purrview_governor_encoders {self.metrics['encoders']}",
+            "# TYPE purrview_governor_pressure gauge",
+            f"purrview_governor_pressure {self.metrics['pressure']}",
+            "# TYPE purrview_governor_level_changes_total counter",
+            f"purrview_governor_level_changes_total {self.metrics['level_changes']}",
+            "# TYPE purrview_camera_degradation_level gauge",
+        ]
+        for cam_index, cam_config in enumerate(self.camera_configs):
+            lines.append(f'purrview_camera_degradation_level{{cam="{cam_config["NAME"]}",level="{LEVEL_NAMES[self.levels[cam_index]]}"}} {self.levels[cam_index]}')
+        lines.append("# TYPE purrview_camera_recording_level gauge")
+        for cam_index, cam_config in enumerate(self.camera_configs):
+            lines.append(f'purrview_camera_recording_level{{cam="{cam_config["NAME"]}",level="{RECORDING_LEVEL_NAMES[self.recording_levels[cam_index]]}"}} {self.recording_levels[cam_index]}')
+        return "\n".join(lines) + "\n"
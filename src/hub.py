@@ -0,0 +1,500 @@
+"""
+Aggregation hub: one dashboard for cameras of several Purr View nodes (one box per building, ...).
+
+    python3 hub.py --node garage=http://192.168.1.20 --node attic=http://192.168.1.21:5000 --port 8080
+
+- live streams are relayed as received (JPEG parts are forwarded, never decoded/re-encoded), one upstream
+  connection per camera no matter how many clients watch it, opened only while somebody watches
+- /recordings merges recordings of all nodes (newest first), files/thumbnails/indexes are proxied from nodes
+- nodes are plain Purr View instances, nothing has to be configured on them
+"""
+
+### LOGGING ###
+from logging_setup import get_logger
+logger = get_logger()
+
+### IMPORTS ###
+import argparse
+import heapq
+import json
+import signal
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from flask import Flask, Response, render_template_string, abort, request, jsonify, redirect
+from werkzeug.serving import make_server
+
+### CONF ###
+NODE_TIMEOUT_SECONDS = 5.0
+STREAM_READ_TIMEOUT_SECONDS = 10.0
+RELAY_LINGER_SECONDS = 5.0          # keep upstream open a bit after last client left (page reloads)
+RELAY_RECONNECT_MAX_DELAY_SECONDS = 10.0
+PROXY_CHUNK_SIZE = 64 * 1024
+# headers passed through proxied responses (Range requests keep working, so browsers can seek in videos)
+PROXY_HEADERS = ("Content-Type", "Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified",
+                 "Cache-Control", "Content-Disposition")
+
+HUB_HTML = """
+<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Purr View Hub</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1"/>
+  <style>
+    :root { color-scheme: light dark; }
+    body { margin:0; background:Canvas; color:CanvasText;
+           font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; }
+    .nav { padding:16px 16px 0; }
+    h2 { margin:16px 16px 0; font-size:18px; }
+    .grid {
+      display:grid;
+      grid-template-columns: repeat(auto-fill, minmax(400px, 1fr));
+      gap:16px; padding:16px;
+    }
+    .card { border-radius:12px; overflow:hidden; box-shadow:0 2px 10px rgba(0,0,0,.12); }
+    .frame { display:block; width:100%; height:auto; background:#111; }
+    .meta { padding:8px 12px; font-size:14px; }
+  </style>
+</head>
+<body>
+  <nav class="nav"><a href="/browse">Recordings</a></nav>
+  {% for node in nodes %}
+    <h2>{{ node.name }}{% if not node.online %} (offline){% endif %}</h2>
+    <main class="grid">
+      {% for c in node.cameras %}
+        <div class="card">
+          <img class="frame" src="{{ c.stream_url }}" alt="{{ node.name }} {{ c.name }}"
+               width="{{ c.width }}" height="{{ c.height }}" loading="lazy"/>
+          <div class="meta">{{ c.name }}</div>
+        </div>
+      {% endfor %}
+    </main>
+  {% endfor %}
+</body>
+</html>
+"""
+
+BROWSE_HTML = """
+<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Purr View Hub - Recordings</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1"/>
+  <style>
+    :root { color-scheme: light dark; }
+    body { margin:0; background:Canvas; color:CanvasText;
+           font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; }
+    .nav { padding:16px 16px 0; }
+    .grid {
+      display:grid;
+      grid-template-columns: repeat(auto-fill, minmax(320px, 1fr));
+      gap:16px; padding:16px;
+    }
+    .card { border-radius:12px; overflow:hidden; box-shadow:0 2px 10px rgba(0,0,0,.12); }
+    .card img { display:block; width:100%; height:auto; background:#111; }
+    .meta { padding:8px 12px; font-size:14px; }
+  </style>
+</head>
+<body>
+  <nav class="nav"><a href="/">Live</a></nav>
+  <main class="grid">
+    {% for c in clips %}
+      <div class="card">
+        <a href="{{ c.url }}"><img src="{{ c.thumbnail_url }}" alt="{{ c.name }}" loading="lazy"/></a>
+        <div class="meta">{{ c.node }} | {{ c.cam }} | {{ c.started }} | {{ "%.1f"|format(c.duration) }} s | {{ "%.2f"|format(c.peak_motion) }} %</div>
+      </div>
+    {% endfor %}
+  </main>
+</body>
+</html>
+"""
+
+
+def read_mjpeg_parts(resp, boundary):
+    """Yield payloads of multipart/x-mixed-replace response, cut by Content-Length when node sends it"""
+    boundary_seen = False
+    while True:
+        if not boundary_seen:
+            line = resp.readline()
+            if not line:
+                return
+            if not line.startswith(boundary):
+                continue
+        boundary_seen = False
+
+        headers = {}
+        while True:
+            line = resp.readline()
+            if not line:
+                return
+            line = line.strip()
+            if not line:
+                break
+            key, _, value = line.partition(b":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = headers.get(b"content-length")
+        if length:
+            data = resp.read(int(length))
+            if len(data) < int(length):
+                return
+        else:
+            # older node: part ends where next boundary starts
+            chunks = []
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                if line.startswith(boundary):
+                    boundary_seen = True
+                    break
+                chunks.append(line)
+            data = b"".join(chunks)[:-2] # CRLF before boundary
+        yield data
+
+
+class Node:
+    """One Purr View instance, camera list refreshed periodically"""
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url.rstrip("/")
+        self.cameras = []
+        self.online = False
+        self.last_error = None
+        self.last_seen_ts = None
+
+    def open(self, path, params=None, headers=None, timeout=NODE_TIMEOUT_SECONDS):
+        url = self.url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=timeout)
+
+    def get_json(self, path, params=None):
+        with self.open(path, params) as resp:
+            return json.loads(resp.read())
+
+    def refresh(self):
+        try:
+            self.cameras = self.get_json("/api/cameras")
+            if not self.online:
+                logger.info(f"[SYS] Hub node {self.name} online ({self.url}, {len(self.cameras)} cameras)")
+            self.online = True
+            self.last_error = None
+            self.last_seen_ts = time.time()
+        except Exception as e:
+            if self.online or self.last_error is None:
+                logger.warning(f"[SYS] Hub node {self.name} offline ({repr(e)})")
+            self.online = False
+            self.last_error = repr(e)
+
+    def status(self):
+        return {"name": self.name, "url": self.url, "online": self.online, "cameras": len(self.cameras),
+                "last_seen_ts": self.last_seen_ts, "last_error": self.last_error}
+
+
+class StreamRelay:
+    """
+    Shares one upstream MJPEG connection of one camera between all hub clients. Upstream is opened by first
+    client and closed RELAY_LINGER_SECONDS after last one left, clients always get the newest JPEG (slow
+    client skips frames instead of delaying others).
+    """
+    def __init__(self, node, cam_idx, stop_event):
+        self.node = node
+        self.cam_idx = cam_idx
+        self.stop_event = stop_event
+        self.name = f"{node.name}/{cam_idx}"
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+        self.seq = 0
+        self.jpeg = None
+        self.connected = False
+        self.connects = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+
+    def _should_close(self):
+        """Checked by relay thread, decided under lock so client arriving right now starts new thread"""
+        with self._cond:
+            if self.stop_event.is_set() or (self.subscribers == 0 and time.monotonic() - self.idle_since > RELAY_LINGER_SECONDS):
+                self._thread = None
+                self.jpeg = None # never serve stale frame to next client
+                logger.info(f"[SYS] Hub relay {self.name} closed (no clients)")
+                return True
+            return False
+
+    def _run(self):
+        delay = 1.0
+        while not self._should_close():
+            try:
+                with self.node.open(f"/stream/{self.cam_idx}", timeout=STREAM_READ_TIMEOUT_SECONDS) as resp:
+                    boundary = b"--" + dict(resp.headers.get_params() or []).get("boundary", "frame").encode()
+                    self.connected = True
+                    self.connects += 1
+                    logger.info(f"[SYS] Hub relay {self.name} connected")
+                    for data in read_mjpeg_parts(resp, boundary):
+                        with self._cond:
+                            self.seq += 1
+                            self.jpeg = data
+                            self.frames_received += 1
+                            self.bytes_received += len(data)
+                            self._cond.notify_all()
+                        delay = 1.0
+                        if self._should_close():
+                            return
+                    logger.warning(f"[SYS] Hub relay {self.name} stream ended by node")
+            except Exception as e:
+                logger.warning(f"[SYS] Hub relay {self.name} upstream failed ({repr(e)}), retry in {delay:.0f} s")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, RELAY_RECONNECT_MAX_DELAY_SECONDS)
+            finally:
+                self.connected = False
+
+    def frames(self):
+        """Newest JPEG bytes as they arrive, for one client"""
+        with self._cond:
+            self.subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        last_seq = 0
+        try:
+            while not self.stop_event.is_set():
+                with self._cond:
+                    self._cond.wait_for(lambda: self.seq != last_seq or self.stop_event.is_set(), timeout=1.0)
+                    if self.seq == last_seq or self.jpeg is None:
+                        continue
+                    last_seq, data = self.seq, self.jpeg
+                yield data
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                self.idle_since = time.monotonic()
+
+    def status(self):
+        return {"node": self.node.name, "cam_idx": self.cam_idx, "subscribers": self.subscribers,
+                "connected": self.connected, "connects": self.connects,
+                "frames_received": self.frames_received, "bytes_received": self.bytes_received}
+
+
+class Hub:
+    def __init__(self, nodes, stop_event, host="0.0.0.0", port=8080, refresh_seconds=30.0):
+        self.nodes = {node.name: node for node in nodes}
+        self.stop_event = stop_event
+        self.host = host
+        self.port = port
+        self.refresh_seconds = refresh_seconds
+        self.relays = {}
+        self._relays_lock = threading.Lock()
+
+        self.app = Flask(__name__)
+        self._server = None
+        self._thread = None
+        self._refresh_thread = None
+        self._bind_routes()
+
+    def _node_or_404(self, node_name):
+        node = self.nodes.get(node_name)
+        if node is None:
+            abort(404)
+        return node
+
+    def relay(self, node, cam_idx):
+        with self._relays_lock:
+            key = (node.name, cam_idx)
+            if key not in self.relays:
+                self.relays[key] = StreamRelay(node, cam_idx, self.stop_event)
+            return self.relays[key]
+
+    def cameras(self):
+        return [
+            {**cam, "node": node.name, "node_online": node.online,
+             "stream_url": f"/stream/{node.name}/{cam['idx']}"}
+            for node in self.nodes.values() for cam in node.cameras
+        ]
+
+    def merged_clips(self, args):
+        """Recordings of all nodes, newest first, urls pointing to hub proxy"""
+        limit = min(args.get("limit", 100, type=int), 1000)
+        offset = args.get("offset", 0, type=int)
+        params = {key: args[key] for key in ("cam", "since", "until", "motion") if key in args}
+        params["limit"] = limit + offset # each node's newest limit+offset clips cover the merged page
+        results = []
+        for node in self.nodes.values():
+            try:
+                clips = node.get_json("/recordings", params)
+            except urllib.error.HTTPError as e:
+                if e.code != 404: # 404 = node doesn't store videos locally
+                    logger.warning(f"[SYS] Hub failed to list recordings of {node.name} ({repr(e)})")
+                continue
+            except Exception as e:
+                logger.warning(f"[SYS] Hub failed to list recordings of {node.name} ({repr(e)})")
+                continue
+            for clip in clips:
+                clip["node"] = node.name
+                clip["url"] = f"/nodes/{node.name}/recordings/{clip['id']}"
+                clip["thumbnail_url"] = f"/nodes/{node.name}/recordings/{clip['id']}/thumbnail"
+            results.append(clips)
+        merged = heapq.merge(*results, key=lambda clip: clip["start_ts"], reverse=True)
+        return list(merged)[offset:offset + limit]
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            for node in self.nodes.values():
+                node.refresh()
+            self.stop_event.wait(self.refresh_seconds)
+
+    def _bind_routes(self):
+        app = self.app
+
+        @app.get("/stream/<node_name>/<int:cam_idx>")
+        def stream(node_name, cam_idx: int):
+            node = self._node_or_404(node_name)
+            if not any(cam["idx"] == cam_idx for cam in node.cameras):
+                abort(404)
+            relay = self.relay(node, cam_idx)
+
+            def gen():
+                try:
+                    for data in relay.frames():
+                        yield (b"--frame\r\n"
+                            b"Content-Type: image/jpeg\r\n"
+                            b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" +
+                            data + b"\r\n")
+                except (GeneratorExit, BrokenPipeError):
+                    pass  # client closed
+
+            resp = Response(gen(), mimetype="multipart/x-mixed-replace; boundary=frame")
+            resp.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            return resp
+
+        @app.get("/nodes/<node_name>/<path:path>")
+        def node_proxy(node_name, path):
+            node = self._node_or_404(node_name)
+            if path.startswith("stream/"):
+                return redirect(f"/stream/{node_name}/{path.split('/', 1)[1]}")
+            headers = {key: request.headers[key] for key in ("Range", "If-Range", "If-None-Match", "If-Modified-Since") if key in request.headers}
+            try:
+                upstream = node.open("/" + path, request.args.to_dict(), headers)
+            except urllib.error.HTTPError as e:
+                upstream = e # error status and body are passed to the client as they are
+            except Exception as e:
+                logger.warning(f"[SYS] Hub proxy to {node.name} failed ({repr(e)})")
+                abort(502)
+
+            def gen():
+                with upstream:
+                    while True:
+                        chunk = upstream.read(PROXY_CHUNK_SIZE)
+                        if not chunk:
+                            return
+                        yield chunk
+
+            resp = Response(gen(), status=upstream.getcode())
+            for key in PROXY_HEADERS:
+                if key in upstream.headers:
+                    resp.headers[key] = upstream.headers[key]
+            return resp
+
+        @app.get("/api/cameras")
+        def api_cameras():
+            return jsonify(self.cameras())
+
+        @app.get("/recordings")
+        def recordings():
+            try:
+                return jsonify(self.merged_clips(request.args))
+            except ValueError:
+                abort(400)
+
+        @app.get("/health")
+        def health():
+            with self._relays_lock:
+                relays = [relay.status() for relay in self.relays.values()]
+            return jsonify({"nodes": [node.status() for node in self.nodes.values()], "relays": relays})
+
+        @app.get("/browse")
+        def browse():
+            clips = self.merged_clips(request.args)
+            for clip in clips:
+                clip["started"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(clip["start_ts"]))
+            return render_template_string(BROWSE_HTML, clips=clips)
+
+        @app.get("/")
+        def index():
+            nodes = [
+                {"name": node.name, "online": node.online,
+                 "cameras": [cam for cam in self.cameras() if cam["node"] == node.name]}
+                for node in self.nodes.values()
+            ]
+            return render_template_string(HUB_HTML, nodes=nodes)
+
+    # ---- lifecycle ----
+    def start(self):
+        if self._server is not None:
+            return
+        for node in self.nodes.values():
+            node.refresh()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresh_thread.start()
+        self._server = make_server(self.host, self.port, self.app, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0):
+        if self._server is None:
+            return
+        try:
+            self._server.shutdown()
+        finally:
+            if self._thread is not None:
+                self._thread.join(timeout=timeout)
+        self._server = None
+        self._thread = None
+
+
+def parse_node(value):
+    """'name=http://host:port' or just 'http://host:port' (name = host:port)"""
+    name, sep, url = value.partition("=")
+    if not sep:
+        name, url = None, value
+    if "://" not in url:
+        url = "http://" + url
+    name = name or urllib.parse.urlparse(url).netloc
+    if not name or "/" in name:
+        raise argparse.ArgumentTypeError(f"invalid node name in {value}")
+    return Node(name, url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purr View hub: one dashboard for several Purr View nodes")
+    parser.add_argument("--node", action="append", type=parse_node, required=True, metavar="NAME=URL", help="Purr View node, repeatable")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--refresh", type=float, default=30.0, help="camera list refresh interval (s)")
+    args = parser.parse_args()
+
+    names = [node.name for node in args.node]
+    if len(set(names)) != len(names):
+        parser.error("node names must be unique")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    hub = Hub(args.node, stop_event, host=args.host, port=args.port, refresh_seconds=args.refresh)
+    hub.start()
+    logger.info(f"[SYS] Hub running on port {args.port} with {len(names)} nodes ({', '.join(names)})")
+    stop_event.wait()
+    logger.info("[SYS] Stopping hub ...")
+    hub.stop()
+
+
+if __name__ == "__main__":
+    main()
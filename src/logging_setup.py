@@ -3,12 +3,8 @@ import logging.config
 from datetime import datetime as dt
 import os
 from logging.handlers import TimedRotatingFileHandler
-import json
 from pathlib import Path
-
-# CONF
-with open(os.path.join(os.path.dirname((os.path.abspath(__file__))), "config.json"), "r") as f:
-    config = json.load(f)
+from config import config
 
 LOGGING_PATH = Path(os.path.expandvars(config["LOGGING_PATH"])).expanduser() # deals with $USER and ~/... 
 LOGGING_LEVEL = config["LOGGING_LEVEL"]
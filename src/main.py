@@ -5,17 +5,18 @@ logger = get_logger()
 ### IMPORTS ###
 import os
 import threading
-import json
 import time
 from pathlib import Path
 import signal
 from cam import CameraManager
-from view import Viewer
-from utils import init_storage_in_ram, monitor_resources_usages
+from storage import StorageManager
+from sources import NegotiationCache
+from events import EventBus
+from verify import EventVerifier
+from utils import init_storage_in_ram, monitor_resources_usages, process_uptime_seconds
+from config import config, load_config
 
 ### CONF ###
-with open(os.path.join(os.path.dirname((os.path.abspath(__file__))), "config.json"), "r") as f:
-    config = json.load(f)
 
 VIDEO_PATH_IN_RAM = "/dev/shm/PurrView/videos"
 
@@ -23,22 +24,81 @@ LOGGING_LEVEL = config["LOGGING_LEVEL"]
 FTP_UPLOAD_VIDEO = config["FTP_UPLOAD_VIDEO"]
 VIDEO_PATH = Path(os.path.expandvars(config["VIDEO_PATH"])).expanduser() # deals with $USER and ~/...
 SAVE_VIDEO_LOCALLY = config["SAVE_VIDEO_LOCALLY"]
+MAX_STORAGE_GB = config["MAX_STORAGE_GB"] # 0 = unlimited
+MAX_STORAGE_DAYS = config["MAX_STORAGE_DAYS"] # 0 = unlimited
+MAX_UNTAGGED_STORAGE_HOURS = config["MAX_UNTAGGED_STORAGE_HOURS"] # continuous segments without motion, 0 = same as MAX_STORAGE_DAYS
 MAX_CONCURRENT_VIDEO_WRITES_AND_UPLOADS = config["MAX_CONCURRENT_VIDEO_WRITES_AND_UPLOADS"]
+DEFERRED_TRANSCODE_ENABLED = config["DEFERRED_TRANSCODE_ENABLED"]
+TRANSCODE_SPOOL_PATH = Path(os.path.expandvars(config["TRANSCODE_SPOOL_PATH"])).expanduser()
+TRANSCODE_SPOOL_MAX_MB = config["TRANSCODE_SPOOL_MAX_MB"]
+TRANSCODE_MAX_CPU_PERCENT = config["TRANSCODE_MAX_CPU_PERCENT"]
+TRANSCODE_MAX_TEMPERATURE_C = config["TRANSCODE_MAX_TEMPERATURE_C"]
+ANALYTICS_ENABLED = config["ANALYTICS_ENABLED"]
+ANALYTICS_PATH = Path(os.path.expandvars(config["ANALYTICS_PATH"])).expanduser()
+CACHE_PATH = Path(os.path.expandvars(config["CACHE_PATH"])).expanduser() # writable by service user (install dir is not)
+CAMERA_CACHE_PATH = CACHE_PATH / "camera_cache.json" # negotiated capture settings, see sources.NegotiationCache
+GOVERNOR_ENABLED = config["GOVERNOR_ENABLED"]
+GOVERNOR_MAX_CPU_PERCENT = config["GOVERNOR_MAX_CPU_PERCENT"]
+GOVERNOR_MAX_SHM_MB = config["GOVERNOR_MAX_SHM_MB"] # 0 = not limited
+GOVERNOR_MAX_ENCODERS = config["GOVERNOR_MAX_ENCODERS"] # 0 = not limited
+EVENTS_SINKS = config["EVENTS_SINKS"] # webhook/MQTT/unix socket URLs, empty = no notifications
+EVENTS_BATCH_SECONDS = config["EVENTS_BATCH_SECONDS"]
+EVENTS_COALESCE_SECONDS = config["EVENTS_COALESCE_SECONDS"]
+VERIFY_WORKERS = config["VERIFY_WORKERS"] # processes for second stage motion verification (cameras with VERIFY_ENABLED)
 HTTP_SERVER_ENABLED = config["HTTP_SERVER_ENABLED"]
 HTTP_SERVER_PORT = config["HTTP_SERVER_PORT"]
 HTTP_FPS_LIMITER = config["HTTP_FPS_LIMITER"]
+HTTP_USE_X_SENDFILE = config["HTTP_USE_X_SENDFILE"]
 
 ### GLOBALS ###
 stop_event = threading.Event()
+reload_event = threading.Event()  # SIGHUP -> config reload in main loop
 
 ### FUNCTIONS ###
 
+def reload_config(camera_manager):
+    """Re-read config.json, apply camera changes live (restarting only cameras with changed capture keys)"""
+    logger.info("[SYS] Reloading configuration ...")
+    try:
+        new_config = load_config()
+        summary = camera_manager.apply_camera_configs(new_config.cameras)
+    except (OSError, ValueError) as e: # ConfigError and JSON syntax errors are ValueError
+        logger.error(f"[SYS] Configuration reload failed, running configuration kept ({repr(e)})")
+        return {"ok": False, "error": str(e)}
+
+    # global keys are read once at start (paths, servers, storage limits, ...)
+    summary["restart_required"] = [key for key in new_config.global_keys() if new_config.get(key) != config.get(key)]
+    if summary["restart_required"]:
+        logger.warning(f"[SYS] Changed global keys need service restart: {', '.join(summary['restart_required'])}")
+    logger.info(f"[SYS] Configuration reloaded (updated: {summary['updated']}, restarted: {summary['restarted']})")
+    summary["ok"] = True
+    return summary
+
 def main():
     logger.info("")
     logger.info("")
-    logger.info(f"[SYS] Init")
+    logger.info(f"[SYS] Init ({process_uptime_seconds():.2f} s after process start)")
     os.makedirs(VIDEO_PATH, exist_ok=True)
 
+    storage = StorageManager(
+        video_path=VIDEO_PATH,
+        max_bytes=int(MAX_STORAGE_GB * 1024**3),
+        max_age_seconds=MAX_STORAGE_DAYS * 24 * 3600,
+        untagged_max_age_seconds=MAX_UNTAGGED_STORAGE_HOURS * 3600
+    )
+
+    # optional subsystems (and their dependencies: Flask, psutil, ...) are imported only when enabled
+    analytics = None
+    if ANALYTICS_ENABLED:
+        from analytics import AnalyticsStore
+        try:
+            analytics = AnalyticsStore(ANALYTICS_PATH)
+        except OSError as e:
+            logger.error(f"[SYS] Analytics disabled, {ANALYTICS_PATH} is not usable ({repr(e)})")
+
+    event_bus = EventBus(EVENTS_SINKS, batch_seconds=EVENTS_BATCH_SECONDS, coalesce_seconds=EVENTS_COALESCE_SECONDS)
+    event_bus.start()
+
     if LOGGING_LEVEL == "DEBUG":
         resource_usage_monitor_t = None
 
@@ -49,36 +109,91 @@ def main():
     for sig in (signal.SIGINT, signal.SIGTERM):
         signal.signal(sig, shutdown)
 
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_event.set())
+
+    transcode_scheduler = None
+    governor = None
+
     # Initialize camera manager
     camera_manager = CameraManager(
         stop_event=stop_event,
         max_concurrent_workers=MAX_CONCURRENT_VIDEO_WRITES_AND_UPLOADS,
         ftp_upload_video=FTP_UPLOAD_VIDEO,
         save_video_locally=SAVE_VIDEO_LOCALLY,
-        video_path=VIDEO_PATH
+        storage=storage,
+        analytics=analytics
     )
+    camera_manager.event_bus = event_bus
+    camera_manager.negotiation_cache = NegotiationCache(CAMERA_CACHE_PATH)
+    # processes are spawned on first verification, or right away when some camera verifies motion
+    verifier = EventVerifier(VERIFY_WORKERS)
+    camera_manager.verifier = verifier
+
+    if DEFERRED_TRANSCODE_ENABLED:
+        from scheduler import TranscodeScheduler
+        transcode_scheduler = TranscodeScheduler(
+            stop_event=stop_event,
+            cameras_idle=camera_manager.cameras_idle,
+            spool_path=TRANSCODE_SPOOL_PATH,
+            spool_max_bytes=TRANSCODE_SPOOL_MAX_MB * 1024**2,
+            max_cpu_percent=TRANSCODE_MAX_CPU_PERCENT,
+            max_temperature_c=TRANSCODE_MAX_TEMPERATURE_C
+        )
+        camera_manager.transcode_scheduler = transcode_scheduler
     
     try:
         camera_manager.init_cameras()
         init_storage_in_ram(VIDEO_PATH_IN_RAM)
         
+        if transcode_scheduler is not None:
+            transcode_scheduler.start(recover=camera_manager.recover_transcode_job)
+
         # Start camera threads
         camera_manager.start_camera_threads()
 
+        if any(cam_config.get("VERIFY_ENABLED", False) for cam_config in camera_manager.get_camera_configs()):
+            verifier.start()
+
+        if GOVERNOR_ENABLED:
+            from governor import ResourceGovernor
+            governor = ResourceGovernor(
+                stop_event=stop_event,
+                camera_configs=camera_manager.get_camera_configs(),
+                shm_path=VIDEO_PATH_IN_RAM,
+                active_encoders=camera_manager.active_encoders,
+                max_cpu_percent=GOVERNOR_MAX_CPU_PERCENT,
+                max_shm_bytes=GOVERNOR_MAX_SHM_MB * 1024**2,
+                max_encoders=GOVERNOR_MAX_ENCODERS
+            )
+            camera_manager.governor = governor
+            governor.start()
+
         if LOGGING_LEVEL == "DEBUG":
             resource_usage_monitor_t = threading.Thread(target=monitor_resources_usages, args=(stop_event,))
             resource_usage_monitor_t.start()
 
         if HTTP_SERVER_ENABLED:
+            from view import Viewer
             # Start viewer HTTP server (non-blocking)
             viewer = Viewer(
                 current_frame=camera_manager.get_current_frames(),
                 cam_count=camera_manager.get_camera_count(),
                 camera_configs=camera_manager.get_camera_configs(),
                 stop_event=stop_event,
+                storage=storage,
                 host="0.0.0.0",
                 port=HTTP_SERVER_PORT,
-                http_fps_limit=HTTP_FPS_LIMITER
+                http_fps_limit=HTTP_FPS_LIMITER,
+                use_x_sendfile=HTTP_USE_X_SENDFILE,
+                health_provider=camera_manager.get_source_health,
+                analytics=analytics,
+                governor=governor,
+                config_reloader=lambda: reload_config(camera_manager),
+                frame_seq=camera_manager.frame_seq,
+                burst_provider=camera_manager.burst_frames,
+                event_bus=event_bus,
+                verifier=verifier,
+                frame_pinner=camera_manager.pin_current_frame
             )
             viewer.start()
             logger.info(f"[SYS] HTTP server started on 0.0.0.0:{HTTP_SERVER_PORT}")
@@ -86,6 +201,9 @@ def main():
         # main wait loop; exits when signal handler sets the event
         while not stop_event.is_set():
             time.sleep(1)
+            if reload_event.is_set():
+                reload_event.clear()
+                reload_config(camera_manager)
 
     except Exception:
         logger.exception(f"[SYS] Unexpected exception detected")
@@ -109,9 +227,31 @@ def main():
         # join cam workers
         camera_manager.join_camera_threads()
 
+        if governor is not None:
+            governor.join()
+
+        # stop verification processes (recordings still being verified stay unverified)
+        verifier.close()
+
         # shutdown camera manager (including video upload executor)
         camera_manager.shutdown_executor()
 
+        # stop deferred transcodes (remaining videos stay in spool for next start)
+        if transcode_scheduler is not None:
+            logger.info("[SYS] Stopping deferred transcode scheduler ...")
+            transcode_scheduler.shutdown()
+
+        # write out motion heatmap accumulated since last flush
+        if analytics is not None:
+            analytics.close()
+
+        # deliver notifications queued so far (clip ready events of videos finished during shutdown)
+        logger.info("[SYS] Flushing event notifications ...")
+        event_bus.close()
+
+        # close storage index
+        storage.close()
+
         logger.info("[SYS] Cleanup completed")
 
     return 0
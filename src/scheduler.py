@@ -0,0 +1,235 @@
+import os
+import json
+import heapq
+import shutil
+import threading
+import itertools
+import psutil
+from datetime import datetime as dt
+from storage import SIDECAR_SUFFIXES, sidecar_path
+from utils import _read_cpu_temperature_c_generic
+from logging_setup import get_logger
+
+logger = get_logger()
+
+# niceness of scheduler thread (inherited by ffmpeg child processes), so capture threads always win
+SCHEDULER_NICENESS = 10
+JOB_SUFFIX = ".job.json"  # job metadata next to spooled video, queue is rebuilt from it after restart/crash
+
+
+class TranscodeScheduler:
+    """
+    Defers CPU-heavy transcode of finished videos until the box is idle
+    (all cameras detecting, CPU and temperature below thresholds).
+    Videos wait in a bounded spool directory, highest priority first, then oldest first.
+    Every spooled video has its job metadata next to it, so videos left in spool (crash, kill) are queued again by start().
+    """
+    def __init__(self, stop_event, cameras_idle, spool_path, spool_max_bytes, max_cpu_percent, max_temperature_c, poll_sec: float = 1.0):
+        self.stop_event = stop_event
+        self.cameras_idle = cameras_idle  # callable -> bool
+        self.spool_path = spool_path
+        self.spool_max_bytes = int(spool_max_bytes)
+        self.max_cpu_percent = float(max_cpu_percent)
+        self.max_temperature_c = float(max_temperature_c)
+        self.poll_sec = poll_sec
+
+        self._jobs = []                  # heap of (-priority, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.spool_bytes = 0
+        self._thread = None
+
+    def start(self, recover=None):
+        """
+        Start scheduler thread. Videos left in spool by previous run are queued again,
+        recover(cam_name, metadata) -> (run, fallback) or None (job can't be restored, video stays in spool).
+        """
+        os.makedirs(self.spool_path, exist_ok=True)
+        self._recover_spool(recover)
+        psutil.cpu_percent(None)  # prime counter, next call returns delta since now
+        self._thread = threading.Thread(target=self._run, name="transcode-scheduler")
+        self._thread.start()
+
+    def submit(self, cam_name, priority, video_path, run, fallback, metadata=None) -> None:
+        """
+        Move video (with sidecars) into spool and queue it.
+        run(spooled_path) does the transcode + upload, fallback(spooled_path) uploads video as it is.
+        metadata (JSON serializable) is stored with the video and passed to recover callback of start() after restart.
+        If spool is full or scheduler is closed, fallback runs right away in caller thread.
+        """
+        size = os.path.getsize(video_path)
+
+        with self._cond:
+            accepted = not self._closed and self.spool_bytes + size <= self.spool_max_bytes
+            if accepted:
+                self.spool_bytes += size
+
+        if not accepted:
+            logger.warning(f"[{cam_name}] Transcode spool full or closed, keeping {video_path} as it is")
+            fallback(video_path)
+            return
+
+        queued_ts = dt.now().timestamp()
+        try:
+            spooled_path = os.path.join(self.spool_path, os.path.basename(video_path))
+            # metadata first: video found in spool always has it
+            self._write_job_file(spooled_path, {"video": os.path.basename(spooled_path), "cam_name": cam_name, "priority": priority,
+                                                "queued_ts": queued_ts, "metadata": metadata})
+            self._move_to_spool(video_path, spooled_path)
+        except Exception as e:
+            logger.error(f"[{cam_name}] Failed to move {video_path} into spool ({repr(e)})")
+            self._remove_job_file(spooled_path)
+            with self._cond:
+                self.spool_bytes -= size
+            fallback(video_path)
+            return
+
+        self._queue(cam_name, priority, spooled_path, size, run, fallback, queued_ts, metadata)
+
+    def _queue(self, cam_name, priority, spooled_path, size, run, fallback, queued_ts, metadata):
+        job = {"cam_name": cam_name, "path": spooled_path, "size": size, "run": run, "fallback": fallback,
+               "queued_ts": queued_ts, "metadata": metadata}
+        with self._cond:
+            heapq.heappush(self._jobs, (-priority, next(self._seq), job))
+            logger.info(f"[{cam_name}] Transcode of {spooled_path} deferred (queue: {len(self._jobs)}, spool: {self.spool_bytes / (1024**2):.2f} MB)")
+            self._cond.notify()
+
+    def _move_to_spool(self, video_path, spooled_path):
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(sidecar_path(video_path, suffix)):
+                shutil.move(sidecar_path(video_path, suffix), sidecar_path(spooled_path, suffix))
+        shutil.move(video_path, spooled_path)
+
+    def _write_job_file(self, spooled_path, job):
+        job_path = sidecar_path(spooled_path, JOB_SUFFIX)
+        with open(job_path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(job_path + ".tmp", job_path)
+
+    def _remove_job_file(self, spooled_path):
+        try:
+            os.remove(sidecar_path(spooled_path, JOB_SUFFIX))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"[SYS] Failed to remove job file of {spooled_path} ({repr(e)})")
+
+    def _recover_spool(self, recover):
+        """
+        Queue videos left in spool by previous run (shutdown, crash) again, oldest first. Every video in spool counts
+        into spool size, also those that can't be restored (unreadable job file, unknown camera), which stay in spool.
+        """
+        jobs = []
+        videos = {}  # name -> size of every video in spool
+        for name in os.listdir(self.spool_path):
+            path = os.path.join(self.spool_path, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            if name.endswith(JOB_SUFFIX):
+                try:
+                    with open(path) as f:
+                        job = json.load(f)
+                    if not all(key in job for key in ("video", "cam_name", "priority", "queued_ts", "metadata")):
+                        raise ValueError("incomplete job")
+                    jobs.append(job)
+                except Exception as e:
+                    logger.warning(f"[SYS] Failed to read spooled job {path} ({repr(e)})")
+            elif not any(name.endswith(suffix) for suffix in SIDECAR_SUFFIXES):
+                videos[name] = os.path.getsize(path)
+
+        with self._cond:
+            self.spool_bytes += sum(videos.values())
+
+        restored = set()
+        for job in sorted(jobs, key=lambda job: job["queued_ts"]):
+            spooled_path = os.path.join(self.spool_path, job["video"])
+            if job["video"] not in videos:
+                self._remove_job_file(spooled_path) # crashed before video was moved in (video stayed where it was)
+                continue
+            actions = recover(job["cam_name"], job["metadata"]) if recover is not None and job["metadata"] is not None else None
+            if actions is None:
+                continue
+            restored.add(job["video"])
+            logger.info(f"[{job['cam_name']}] Spooled video {spooled_path} left by previous run queued again")
+            self._queue(job["cam_name"], job["priority"], spooled_path, videos[job["video"]], actions[0], actions[1], job["queued_ts"], job["metadata"])
+
+        for name in sorted(set(videos) - restored):
+            logger.error(f"[SYS] Spooled video {os.path.join(self.spool_path, name)} can't be restored ({videos[name] / (1024**2):.2f} MB "
+                         f"of spool), move it out of spool to free the space")
+
+    def _is_idle(self):
+        if not self.cameras_idle():
+            return False
+        cpu = psutil.cpu_percent(None)
+        if cpu > self.max_cpu_percent:
+            logger.debug(f"[SYS] Transcode postponed, CPU {cpu:.2f} %")
+            return False
+        temperature = _read_cpu_temperature_c_generic()
+        if temperature is not None and temperature > self.max_temperature_c:
+            logger.debug(f"[SYS] Transcode postponed, temperature {temperature:.2f} °C")
+            return False
+        return True
+
+    def _run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SCHEDULER_NICENESS) # Linux: per thread
+        except Exception as e:
+            logger.debug(f"[SYS] Failed to lower transcode scheduler priority ({repr(e)})")
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                if not self._jobs:
+                    self._cond.wait(self.poll_sec)
+                    continue
+
+            # when shutting down, remaining jobs are finished without transcode in shutdown()
+            if self.stop_event.is_set() or not self._is_idle():
+                with self._cond:
+                    self._cond.wait(self.poll_sec)
+                continue
+
+            with self._cond:
+                if not self._jobs:
+                    continue
+                _, _, job = heapq.heappop(self._jobs)
+
+            self._execute(job, job["run"])
+
+    def _execute(self, job, action):
+        try:
+            wait_ms = (dt.now().timestamp() - job["queued_ts"]) * 1000
+            logger.info(f"[{job['cam_name']}] Running deferred job for {job['path']} (waited {wait_ms:.3f} ms)")
+            action(job["path"])
+        except Exception as e:
+            logger.error(f"[{job['cam_name']}] Deferred job for {job['path']} failed ({repr(e)})")
+        finally:
+            self._remove_job_file(job["path"])
+            with self._cond:
+                self.spool_bytes -= job["size"]
+
+    def shutdown(self):
+        """
+        Stop scheduling. Queued videos stay in spool and are transcoded after next start (see start),
+        only videos without metadata (can't be restored) are finished without transcode now (nothing is lost)
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+        left = 0
+        while True:
+            with self._cond:
+                if not self._jobs:
+                    break
+                _, _, job = heapq.heappop(self._jobs)
+            if job["metadata"] is None:
+                self._execute(job, job["fallback"])
+            else:
+                left += 1
+        if left:
+            logger.info(f"[SYS] {left} video(s) left in transcode spool for next start")
@@ -0,0 +1,388 @@
+### LOGGING ###
+from logging_setup import get_logger
+logger = get_logger()
+
+### IMPORTS ###
+import os
+os.environ["OPENCV_LOG_LEVEL"] = "ERROR"
+import cv2
+import numpy as np
+import json
+import threading
+import time
+
+### CONF ###
+SOURCE_V4L2 = "V4L2"
+SOURCE_NETWORK = "NETWORK"  # RTSP/HTTP/... via FFmpeg backend
+SOURCE_FILE = "FILE"        # recorded clip, replayed in a loop
+
+NETWORK_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+# process wide env variable read by FFmpeg backend when capture is opened
+_ffmpeg_options_lock = threading.Lock()
+
+### FUNCTIONS ###
+
+def source_type(cam_config):
+    """SOURCE_TYPE from config, or guessed from DEVICE_PATH when missing/AUTO"""
+    configured = str(cam_config.get("SOURCE_TYPE", "AUTO")).upper()
+    if configured != "AUTO":
+        return configured
+
+    device_path = str(cam_config["DEVICE_PATH"])
+    if device_path.lower().startswith(NETWORK_PREFIXES):
+        return SOURCE_NETWORK
+    if device_path.startswith("/dev/") or device_path.isdigit():
+        return SOURCE_V4L2
+    return SOURCE_FILE
+
+
+def ffmpeg_capture_options(cam_config):
+    """OPENCV_FFMPEG_CAPTURE_OPTIONS string (key;value|key;value) for low latency network streams"""
+    options = {
+        "rtsp_transport": str(cam_config.get("STREAM_TRANSPORT", "tcp")).lower(),
+        "fflags": "nobuffer",
+        "flags": "low_delay",
+        "max_delay": "0",
+    }
+    if cam_config.get("STREAM_BUFFER_SIZE"):
+        options["buffer_size"] = str(int(cam_config["STREAM_BUFFER_SIZE"]))
+    return "|".join(f"{key};{value}" for key, value in options.items())
+
+
+def open_network_capture(cam_config):
+    with _ffmpeg_options_lock:
+        previous = os.environ.get("OPENCV_FFMPEG_CAPTURE_OPTIONS")
+        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = ffmpeg_capture_options(cam_config)
+        try:
+            params = [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(cam_config.get("STREAM_OPEN_TIMEOUT_MS", 5000)),
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(cam_config.get("STREAM_READ_TIMEOUT_MS", 5000)),
+            ]
+            return cv2.VideoCapture(cam_config["DEVICE_PATH"], cv2.CAP_FFMPEG, params)
+        finally:
+            if previous is None:
+                os.environ.pop("OPENCV_FFMPEG_CAPTURE_OPTIONS", None)
+            else:
+                os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = previous
+
+
+def open_backend(cam_config):
+    """Plain capture object for given camera config (no reconnect logic)"""
+    kind = source_type(cam_config)
+    if kind == SOURCE_V4L2:
+        return cv2.VideoCapture(cam_config["DEVICE_PATH"], cv2.CAP_V4L2)
+    if kind == SOURCE_NETWORK:
+        cap = open_network_capture(cam_config)
+        if cam_config.get("STREAM_DROP_LATE", True):
+            return LatestFrameCapture(cap, cam_config["NAME"])
+        return cap
+    if kind == SOURCE_FILE:
+        return FileCapture(cam_config["DEVICE_PATH"], realtime=cam_config.get("FILE_REALTIME", True))
+    raise ValueError(f"Unknown SOURCE_TYPE {kind}")
+
+### NEGOTIATION CACHE ###
+
+class NegotiationCache:
+    """
+    Capture settings the device actually accepted (resolution, FPS, fourcc, buffer size), persisted in JSON file and
+    keyed by DEVICE_PATH and requested settings, so restart skips buffer size probing and verification read.
+    Entry is dropped when first frame does not match it (different camera plugged into same device path).
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(path, "r") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"[SYS] Camera negotiation cache {path} ignored ({repr(e)})")
+
+    @staticmethod
+    def key(cam_config, passthrough):
+        return "|".join(str(part) for part in (
+            cam_config["DEVICE_PATH"], source_type(cam_config),
+            cam_config["FRAME_WIDTH"], cam_config["FRAME_HEIGHT"], cam_config["FPS"],
+            "MJPG-RAW" if passthrough else "MJPG"
+        ))
+
+    def get(self, cam_config, passthrough):
+        with self._lock:
+            entry = self._entries.get(self.key(cam_config, passthrough))
+        return dict(entry) if entry is not None else None
+
+    def put(self, cam_config, passthrough, settings):
+        with self._lock:
+            self._entries[self.key(cam_config, passthrough)] = dict(settings, saved=time.time())
+            self._save()
+
+    def invalidate(self, cam_config, passthrough):
+        with self._lock:
+            if self._entries.pop(self.key(cam_config, passthrough), None) is not None:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[SYS] Failed to save camera negotiation cache ({repr(e)})")
+
+### CAPTURES ###
+
+class FileCapture:
+    """
+    Replays recorded clip forever (optionally paced to clip FPS),
+    emulating raw MJPG payloads when CAP_PROP_CONVERT_RGB is disabled
+    """
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self.convert_rgb = True
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Failed to open {path}")
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self._frame_duration = 1.0 / fps if fps > 0 else 0.04
+        self._next_frame_ts = time.monotonic()
+
+    def read(self, image=None):
+        if self.realtime:
+            delay = self._next_frame_ts - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_ts = max(self._next_frame_ts + self._frame_duration, time.monotonic() - self._frame_duration)
+
+        ret, frame = self._cap.read(image) if image is not None else self._cap.read()
+        if not ret:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        if ret and not self.convert_rgb:
+            _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            return True, jpeg.reshape(1, -1)
+        return ret, frame
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert_rgb = bool(value)
+            return True
+        return False  # clip properties are fixed
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return cv2.VideoWriter_fourcc(*"MJPG")
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return 1
+        return self._cap.get(prop)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def release(self):
+        self._cap.release()
+
+
+class LatestFrameCapture:
+    """
+    Drains network stream in own thread and keeps only the newest frame,
+    so slow processing drops late frames instead of piling up latency in decoder/socket buffers.
+    """
+    def __init__(self, cap, name, read_timeout_sec=5.0):
+        self._cap = cap
+        self.name = name
+        self.read_timeout_sec = read_timeout_sec
+        self.dropped_frames = 0
+
+        self._frame = None
+        self._frame_seq = 0
+        self._read_seq = 0
+        self._failed = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        if cap.isOpened():
+            self._thread = threading.Thread(target=self._run, name=f"{name}-grabber", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            ret, frame = self._cap.read()
+            with self._cond:
+                if not ret:
+                    self._failed = True
+                    self._cond.notify_all()
+                    return
+                if self._frame_seq != self._read_seq:
+                    self.dropped_frames += 1  # previous frame was never read
+                self._frame = frame
+                self._frame_seq += 1
+                self._cond.notify_all()
+
+    def read(self, image=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._frame_seq != self._read_seq or self._failed, self.read_timeout_sec):
+                return False, None
+            if self._frame_seq == self._read_seq:
+                return False, None  # grabber failed
+            frame = self._frame
+            self._read_seq = self._frame_seq
+
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def set(self, prop, value):
+        return self._cap.set(prop, value)
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def isOpened(self):
+        return self._cap.isOpened() and not self._failed
+
+    def release(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.read_timeout_sec)
+        self._cap.release()
+
+
+class CaptureSource:
+    """
+    cv2.VideoCapture look-alike used by CameraManager.
+    Opens backend by source type and on read failure reconnects in place with exponential backoff
+    (properties set earlier are re-applied), so camera worker keeps its pre-buffer and detector state
+    across short drops. Read returns failure only when RECONNECT_WINDOW_SECONDS runs out.
+    """
+    def __init__(self, cam_config, stop_event=None, open_backend_fn=None):
+        self.cam_config = cam_config
+        self.name = cam_config["NAME"]
+        self.kind = source_type(cam_config)
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.open_backend_fn = open_backend_fn if open_backend_fn is not None else open_backend
+        self.reconnect_window_sec = float(cam_config.get("RECONNECT_WINDOW_SECONDS", 30))
+        self.reconnect_initial_delay_sec = float(cam_config.get("RECONNECT_INITIAL_DELAY_SECONDS", 0.5))
+        self.reconnect_max_delay_sec = float(cam_config.get("RECONNECT_MAX_DELAY_SECONDS", 8))
+
+        self._props = {}  # prop -> value, re-applied after reconnect
+        self._lock = threading.Lock()
+        self.stats = {
+            "state": "CONNECTING",
+            "frames": 0,
+            "read_failures": 0,
+            "reconnects": 0,
+            "reconnect_attempts": 0,
+            "dropped_frames": 0,
+            "outage_seconds": 0.0,
+            "last_frame_monotonic": None,
+            "opened_monotonic": time.monotonic(),
+        }
+        self._cap = self._open()
+
+    def _open(self):
+        try:
+            cap = self.open_backend_fn(self.cam_config)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to open {self.kind} source ({repr(e)})")
+            return None
+        for prop, value in self._props.items():
+            cap.set(prop, value)
+        return cap
+
+    def _reconnect(self):
+        """Reopen backend until first frame arrives, window expires or stop is requested"""
+        self.stats["state"] = "RECONNECTING"
+        outage_start = time.monotonic()
+        delay = self.reconnect_initial_delay_sec
+
+        while time.monotonic() - outage_start < self.reconnect_window_sec:
+            if self.stop_event.wait(delay):
+                break
+            self.stats["reconnect_attempts"] += 1
+            logger.warning(f"[{self.name}] Reconnecting {self.kind} source (attempt {self.stats['reconnect_attempts']}, waited {delay:.2f} s) ...")
+
+            with self._lock:
+                if self._cap is not None:
+                    self.stats["dropped_frames"] += getattr(self._cap, "dropped_frames", 0)
+                    try:
+                        self._cap.release()
+                    except Exception as e:
+                        logger.debug(f"[{self.name}] Failed to release source ({repr(e)})")
+                self._cap = self._open()
+                cap = self._cap
+
+            if cap is not None and cap.isOpened():
+                ret, frame = cap.read()
+                if ret:
+                    outage = time.monotonic() - outage_start
+                    self.stats["outage_seconds"] += outage
+                    self.stats["reconnects"] += 1
+                    self.stats["state"] = "CONNECTED"
+                    logger.info(f"[{self.name}] Source reconnected after {outage:.2f} s")
+                    return True, frame
+
+            delay = min(delay * 2, self.reconnect_max_delay_sec)
+
+        self.stats["outage_seconds"] += time.monotonic() - outage_start
+        self.stats["state"] = "FAILED"
+        return False, None
+
+    def read(self, image=None):
+        cap = self._cap
+        ret, frame = False, None
+        if cap is not None:
+            try:
+                ret, frame = cap.read(image) if image is not None else cap.read()
+            except cv2.error as e:
+                logger.warning(f"[{self.name}] Source read failed ({repr(e)})")
+
+        if not ret:
+            self.stats["read_failures"] += 1
+            if self.stop_event.is_set() or self.reconnect_window_sec <= 0:
+                return False, None
+            ret, frame = self._reconnect()
+            if not ret:
+                return False, None
+
+        self.stats["frames"] += 1
+        self.stats["last_frame_monotonic"] = time.monotonic()
+        self.stats["state"] = "CONNECTED"
+        return True, frame
+
+    def set(self, prop, value):
+        self._props[prop] = value
+        with self._lock:
+            return self._cap.set(prop, value) if self._cap is not None else False
+
+    def get(self, prop):
+        with self._lock:
+            return self._cap.get(prop) if self._cap is not None else 0
+
+    def isOpened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def release(self):
+        with self._lock:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+        self.stats["state"] = "CLOSED"
+
+    def health(self):
+        """Snapshot of source health statistics (JSON serializable)"""
+        now = time.monotonic()
+        stats = dict(self.stats)
+        last_frame = stats.pop("last_frame_monotonic")
+        opened = stats.pop("opened_monotonic")
+        stats["type"] = self.kind
+        stats["last_frame_age_seconds"] = None if last_frame is None else now - last_frame
+        stats["uptime_seconds"] = now - opened
+        stats["dropped_frames"] += getattr(self._cap, "dropped_frames", 0)
+        return stats
@@ -0,0 +1,251 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime as dt
+from pathlib import Path
+from logging_setup import get_logger
+
+logger = get_logger()
+
+INDEX_FILE_NAME = "index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    path        TEXT NOT NULL UNIQUE,
+    cam         TEXT NOT NULL,
+    start_ts    REAL NOT NULL,
+    duration    REAL NOT NULL,
+    size        INTEGER NOT NULL,
+    peak_motion REAL NOT NULL,
+    motion      INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS clips_start ON clips (start_ts);
+CREATE INDEX IF NOT EXISTS clips_cam_start ON clips (cam, start_ts);
+CREATE TABLE IF NOT EXISTS motion_ranges (
+    cam         TEXT NOT NULL,
+    since_ts    REAL NOT NULL,
+    until_ts    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS motion_ranges_cam_until ON motion_ranges (cam, until_ts);
+"""
+
+# created after migration (older indexes have no motion column)
+SCHEMA_INDEXES = """
+CREATE INDEX IF NOT EXISTS clips_motion_start ON clips (motion, start_ts);
+"""
+
+CLIP_COLUMNS = ("id", "path", "cam", "start_ts", "duration", "size", "peak_motion", "motion")
+
+# clip motion index sidecar (written by clipindex, defined here because clipindex imports this module)
+CLIP_INDEX_SUFFIX = ".motion.json"
+
+# files stored next to the clip and sharing its lifetime (thumbnail, ...)
+SIDECAR_SUFFIXES = (".jpg", CLIP_INDEX_SUFFIX)  # thumbnail, clip motion index
+
+MOTION_RANGE_MIN_KEEP_SECONDS = 24 * 3600  # pre-motion ranges are kept at least this long (segments finalised late are still tagged)
+
+
+def sidecar_path(path, suffix: str) -> str:
+    """Path of sidecar file belonging to given clip (same name, different suffix)"""
+    return os.path.splitext(str(path))[0] + suffix
+
+
+class StorageManager:
+    """
+    Keeps finished clips under VIDEO_PATH/CAMx/YYYY/MM/DD and indexes them in SQLite.
+    Eviction walks the start_ts index (oldest first), so the directory tree is never scanned.
+    Clips without motion (continuous recording segments) expire after untagged_max_age_seconds and go first when over quota.
+    """
+    def __init__(self, video_path, max_bytes=0, max_age_seconds=0, untagged_max_age_seconds=0):
+        self.video_path = Path(video_path)
+        self.max_bytes = int(max_bytes)              # 0 = unlimited
+        self.max_age_seconds = float(max_age_seconds) # 0 = unlimited
+        self.untagged_max_age_seconds = float(untagged_max_age_seconds) # 0 = same as tagged
+        self._lock = threading.Lock()
+
+        os.makedirs(self.video_path, exist_ok=True)
+        self._db = sqlite3.connect(self.video_path / INDEX_FILE_NAME, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(clips)")]
+        if "motion" not in columns:
+            self._db.execute("ALTER TABLE clips ADD COLUMN motion INTEGER NOT NULL DEFAULT 1")
+        self._db.executescript(SCHEMA_INDEXES)
+
+        # running total, so quota checks don't need to SUM() the table on every insert
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+        clip_count = self._db.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+        logger.info(f"[SYS] Storage index loaded ({clip_count} clips, {self.total_bytes / (1024**2):.2f} MB)")
+
+    def clip_dir(self, cam_name: str, start_ts: float) -> Path:
+        """Directory for a clip of given camera and start time (VIDEO_PATH/CAMx/YYYY/MM/DD)"""
+        YYYY, MM, DD = dt.fromtimestamp(start_ts).strftime("%Y %m %d").split()
+        return self.video_path / cam_name / YYYY / MM / DD
+
+    def add_clip(self, cam_name: str, full_file_path: str, start_ts: float, duration: float, peak_motion: float,
+                 motion: bool = True, tag_since: float | None = None, on_tagged=None) -> int:
+        """
+        Copy finished clip into storage layout, index it and enforce retention. Returns clip id.
+        tag_since marks clips of the camera overlapping [tag_since, start_ts) as motion too (pre-motion part of event),
+        the range is remembered, so clips stored later (finalised out of order) are tagged on insert.
+        on_tagged(paths) is called with paths of clips that were stored without motion and got tagged (this one included).
+        """
+        target_dir = self.clip_dir(cam_name, start_ts)
+        os.makedirs(target_dir, exist_ok=True)
+        target_path = target_dir / os.path.basename(full_file_path)
+
+        logger.info(f"[{cam_name}] Copying file {full_file_path} to {target_path} ...")
+        shutil.copy2(full_file_path, target_path)
+        size = os.path.getsize(target_path)
+
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(sidecar_path(full_file_path, suffix)):
+                shutil.copy2(sidecar_path(full_file_path, suffix), sidecar_path(target_path, suffix))
+
+        with self._lock:
+            # same file name copied again (e.g. re-run) updates the old row, clip keeps its id
+            previous = self._db.execute("SELECT size FROM clips WHERE path = ?", (str(target_path),)).fetchone()
+            if previous is not None:
+                self.total_bytes -= previous[0]
+
+            tagged = []
+            if tag_since is not None and tag_since < start_ts:
+                tagged = self._tag_motion_locked(cam_name, tag_since, start_ts)
+            if not motion and self._motion_covers_locked(cam_name, start_ts, duration):
+                motion = True
+                tagged.append(str(target_path))
+
+            self._db.execute(
+                "INSERT INTO clips (path, cam, start_ts, duration, size, peak_motion, motion) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET cam = excluded.cam, start_ts = excluded.start_ts, duration = excluded.duration, "
+                "size = excluded.size, peak_motion = excluded.peak_motion, motion = excluded.motion",
+                (str(target_path), cam_name, float(start_ts), float(duration), size, float(peak_motion), int(bool(motion)))
+            )
+            self.total_bytes += size
+            clip_id = self._db.execute("SELECT id FROM clips WHERE path = ?", (str(target_path),)).fetchone()[0]
+            self._evict_locked(keep_id=clip_id)
+
+        if tagged and on_tagged is not None:
+            on_tagged(tagged)
+        return clip_id
+
+    def tag_motion(self, cam_name: str, since_ts: float, until_ts: float) -> list[str]:
+        """Remember pre-motion range and tag stored clips of the camera overlapping it, returns paths of newly tagged clips"""
+        with self._lock:
+            return self._tag_motion_locked(cam_name, since_ts, until_ts)
+
+    def motion_covers(self, cam_name: str, start_ts: float, duration: float) -> bool:
+        """True when clip of the camera overlaps pre-motion range of some event (see tag_motion)"""
+        with self._lock:
+            return self._motion_covers_locked(cam_name, start_ts, duration)
+
+    def _tag_motion_locked(self, cam_name, since_ts, until_ts) -> list[str]:
+        keep_seconds = max(self.untagged_max_age_seconds or self.max_age_seconds, MOTION_RANGE_MIN_KEEP_SECONDS)
+        self._db.execute("DELETE FROM motion_ranges WHERE until_ts < ?", (time.time() - keep_seconds,))
+        self._db.execute("INSERT INTO motion_ranges (cam, since_ts, until_ts) VALUES (?, ?, ?)", (cam_name, float(since_ts), float(until_ts)))
+        rows = self._db.execute(
+            "SELECT id, path FROM clips WHERE cam = ? AND motion = 0 AND start_ts < ? AND start_ts + duration > ?",
+            (cam_name, float(until_ts), float(since_ts))
+        ).fetchall()
+        self._db.executemany("UPDATE clips SET motion = 1 WHERE id = ?", [(clip_id,) for clip_id, _ in rows])
+        return [path for _, path in rows]
+
+    def _motion_covers_locked(self, cam_name, start_ts, duration) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM motion_ranges WHERE cam = ? AND until_ts > ? AND since_ts < ? LIMIT 1",
+            (cam_name, float(start_ts), float(start_ts) + float(duration))
+        ).fetchone()
+        return row is not None
+
+    def evict(self) -> None:
+        """Enforce byte quota and max age"""
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self, keep_id=None) -> None:
+        """Evict clips over quota/age, keep_id (clip just added) is never evicted"""
+        keep_id = -1 if keep_id is None else int(keep_id)
+        while True:
+            # untagged clips are evicted first (shorter max age, and before any motion clip when over quota)
+            row = self._db.execute("SELECT id, path, size, start_ts FROM clips WHERE motion = 0 AND id != ? ORDER BY start_ts LIMIT 1", (keep_id,)).fetchone()
+            untagged_limit = self.untagged_max_age_seconds or self.max_age_seconds
+            if row is not None:
+                clip_id, path, size, start_ts = row
+                over_quota = self.max_bytes and self.total_bytes > self.max_bytes
+                too_old = untagged_limit and start_ts < time.time() - untagged_limit
+                if over_quota or too_old:
+                    self._evict_clip_locked(clip_id, path, size, "quota" if over_quota else "age, no motion")
+                    continue
+
+            row = self._db.execute("SELECT id, path, size, start_ts FROM clips WHERE id != ? ORDER BY start_ts LIMIT 1", (keep_id,)).fetchone()
+            if row is None:
+                if self.max_bytes and self.total_bytes > self.max_bytes:
+                    logger.warning(f"[SYS] Storage quota too small, newest clip alone takes {self.total_bytes / (1024**2):.2f} MB "
+                                   f"(MAX_STORAGE_GB {self.max_bytes / (1024**3):.2f})")
+                return
+
+            clip_id, path, size, start_ts = row
+            over_quota = self.max_bytes and self.total_bytes > self.max_bytes
+            too_old = self.max_age_seconds and start_ts < time.time() - self.max_age_seconds
+            if not over_quota and not too_old:
+                return
+            self._evict_clip_locked(clip_id, path, size, "quota" if over_quota else "age")
+
+    def _evict_clip_locked(self, clip_id, path, size, reason) -> None:
+        logger.info(f"[SYS] Evicting {path} ({reason})")
+        self._remove_clip_files(path)
+        self._db.execute("DELETE FROM clips WHERE id = ?", (clip_id,))
+        self.total_bytes -= size
+
+    def _remove_clip_files(self, path: str) -> None:
+        """Remove clip file (with sidecars) and prune day/month/year/cam directories that became empty"""
+        for file_path in [path] + [sidecar_path(path, suffix) for suffix in SIDECAR_SUFFIXES]:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"[SYS] Failed to remove {file_path} ({repr(e)})")
+
+        parent = Path(path).parent
+        while parent != self.video_path and self.video_path in parent.parents:
+            try:
+                parent.rmdir()  # only succeeds when empty
+            except OSError:
+                break
+            parent = parent.parent
+
+    def list_clips(self, cam_name=None, since=None, until=None, limit=100, offset=0, motion=None) -> list[dict]:
+        """List indexed clips, newest first (motion=True/False filters tagged/untagged)"""
+        query = "SELECT " + ", ".join(CLIP_COLUMNS) + " FROM clips WHERE 1 = 1"
+        params = []
+        if motion is not None:
+            query += " AND motion = ?"
+            params.append(int(bool(motion)))
+        if cam_name is not None:
+            query += " AND cam = ?"
+            params.append(cam_name)
+        if since is not None:
+            query += " AND start_ts >= ?"
+            params.append(float(since))
+        if until is not None:
+            query += " AND start_ts < ?"
+            params.append(float(until))
+        query += " ORDER BY start_ts DESC LIMIT ? OFFSET ?"
+        params += [int(limit), int(offset)]
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(zip(CLIP_COLUMNS, row)) for row in rows]
+
+    def get_clip(self, clip_id: int) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT " + ", ".join(CLIP_COLUMNS) + " FROM clips WHERE id = ?", (int(clip_id),)).fetchone()
+        return dict(zip(CLIP_COLUMNS, row)) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
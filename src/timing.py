@@ -0,0 +1,83 @@
+import time
+import cv2
+
+# capture timestamp further than this from time of read is treated as clock jump (file loop, reconnect, driver reset)
+CAPTURE_CLOCK_RESYNC_SECONDS = 1.0
+
+
+class FpsLimiter:
+    """
+    Deadline based frame pacing on time.monotonic: every frame has its own slot (start + n * period),
+    so oversleeping one frame is taken from the next sleep instead of adding up into drift.
+    """
+    def __init__(self, fps):
+        self.period = 1.0 / float(fps)
+        self._deadline = None
+
+    def wait(self) -> float:
+        """Sleep until next frame slot, returns slept time in seconds"""
+        now = time.monotonic()
+        if self._deadline is None or now - self._deadline > self.period:
+            # first frame, or late by more than one frame -> restart schedule instead of catching up with a burst
+            self._deadline = now
+        slept = 0.0
+        if self._deadline > now:
+            slept = self._deadline - now
+            time.sleep(slept)
+        self._deadline += self.period
+        return slept
+
+
+class CaptureClock:
+    """
+    Capture timestamps on time.monotonic scale. Uses CAP_PROP_POS_MSEC of backend when it is usable
+    (V4L2 buffer timestamp, stream PTS), mapped by smallest observed read latency, otherwise time of read.
+    """
+    def __init__(self):
+        self._offset = None     # monotonic - capture position (seconds)
+        self._last_pos = None
+
+    def timestamp(self, cap) -> float:
+        now = time.monotonic()
+        try:
+            pos = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        except Exception:
+            pos = 0.0
+        if pos <= 0 or (self._last_pos is not None and pos <= self._last_pos):
+            # backend has no timestamps (or restarted them)
+            self._offset = None
+            self._last_pos = pos if pos > 0 else None
+            return now
+        self._last_pos = pos
+
+        offset = now - pos
+        if self._offset is None or abs(offset - self._offset) > CAPTURE_CLOCK_RESYNC_SECONDS:
+            self._offset = offset
+        else:
+            self._offset = min(self._offset, offset)  # frame which waited least in queue is closest to true mapping
+        return pos + self._offset
+
+
+class FramePacer:
+    """
+    Keeps constant frame rate clip in real time: frame captured at timestamp ts is written as many times
+    as the video needs to reach ts (0 = dropped because camera delivers faster, >1 = duplicated to fill a gap).
+    Duplicates for one gap are limited to max_repeat frames, longer gaps are skipped in the clip.
+    """
+    def __init__(self, fps, start_ts, max_repeat=None):
+        self.fps = float(fps)
+        self.start_ts = start_ts
+        self.max_repeat = max_repeat if max_repeat is not None else max(1, int(round(self.fps)))
+        self.slots = 0          # video frames that should exist so far
+        self.duplicated = 0
+        self.dropped = 0
+
+    def repeat(self, ts) -> int:
+        due = int((ts - self.start_ts) * self.fps + 0.5) + 1  # nearest slot, capture jitter below half a frame is ignored
+        count = min(max(0, due - self.slots), self.max_repeat)
+        self.slots = max(self.slots, due)
+        if count == 0:
+            self.dropped += 1
+        elif count > 1:
+            self.duplicated += count - 1
+        return count
@@ -1,18 +1,14 @@
 import os
-import shutil
 import ftplib
-import json
 from datetime import date
 from pathlib import PurePosixPath
 from datetime import datetime as dt
 from logging_setup import get_logger
+from config import config
+from storage import SIDECAR_SUFFIXES, sidecar_path
 
 logger = get_logger()
 
-# Load config
-with open(os.path.join(os.path.dirname(__file__), "config.json"), "r") as f:
-    config = json.load(f)
-
 FTP_HOSTNAME = config["FTP_HOSTNAME"]
 FTP_USERNAME = config["FTP_USERNAME"]
 FTP_PASSWORD = config["FTP_PASSWORD"]
@@ -68,33 +64,61 @@ def _ftp_upload_file(cam_name: str, full_file_path: str) -> None:
             logger.info(f"[{cam_name}] Uploaded {remote_file} ({duration_ms:.3f} ms)")
 
 
-def _save_file_locally(cam_name: str, full_file_path: str, local_path: str) -> None:
-    """Copy file to local storage directory"""
-    logger.info(f"[{cam_name}] Copying file {full_file_path} to {local_path} ...")
-    shutil.copy2(full_file_path, os.path.join(local_path, os.path.basename(full_file_path)))
+def _remove_sidecars(full_file_path: str) -> None:
+    """Remove temporary sidecar files (thumbnail, ...) of given video"""
+    for suffix in SIDECAR_SUFFIXES:
+        try:
+            os.remove(sidecar_path(full_file_path, suffix))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to remove sidecar of {full_file_path} ({repr(e)})")
 
 
 def upload_and_cleanup(cam_name: str, full_file_path: str, 
-                      ftp_upload: bool, save_locally: bool, local_path: str) -> None:
-    """Handle FTP upload, local storage, and cleanup of video file"""
+                      ftp_upload: bool, save_locally: bool, storage, clip_info: dict) -> int | None:
+    """
+    Handle FTP upload, local storage, and cleanup of video file. Returns id of locally stored clip.
+    Clips without motion (continuous segments) are uploaded only once they get tagged as pre-motion part of an event,
+    which may happen later, when segment with the motion is finalised (see StorageManager.add_clip).
+    """
+    clip_id = None
     try:
+        motion = clip_info.get("motion", True)
+        if not save_locally:
+            # nothing is stored to be tagged later, only pre-motion ranges are recorded
+            if clip_info.get("tag_since") is not None:
+                storage.tag_motion(cam_name, clip_info["tag_since"], clip_info["start_ts"])
+            motion = motion or storage.motion_covers(cam_name, clip_info["start_ts"], clip_info["duration"])
+
         # FTP Upload
-        if ftp_upload:
+        if ftp_upload and motion: # continuous segments without motion stay local
             try:
                 _ftp_upload_file(cam_name, full_file_path)
             except Exception as e:
                 logger.error(f"[{cam_name}] Failed to upload file {full_file_path} ({repr(e)})")
 
+        def upload_tagged(paths):
+            for path in paths:
+                logger.info(f"[{cam_name}] {os.path.basename(path)} tagged as pre-motion part of event")
+                if ftp_upload:
+                    try:
+                        _ftp_upload_file(cam_name, path)
+                    except Exception as e:
+                        logger.error(f"[{cam_name}] Failed to upload file {path} ({repr(e)})")
+
         # Local Storage
         if save_locally:
             try:
-                _save_file_locally(cam_name, full_file_path, local_path)
+                clip_id = storage.add_clip(cam_name, full_file_path, clip_info["start_ts"], clip_info["duration"], clip_info["peak_motion"],
+                                           motion, clip_info.get("tag_since"), on_tagged=upload_tagged)
             except Exception as e:
                 logger.error(f"[{cam_name}] Failed to save file locally {full_file_path} ({repr(e)})")
         
         # Cleanup temp file
         logger.debug(f"[{cam_name}] Deleting file {full_file_path} ...")
         os.remove(full_file_path)
+        _remove_sidecars(full_file_path)
         
     except Exception as e:
         logger.error(f"[{cam_name}] Failed to process file {full_file_path} ({repr(e)})")
@@ -103,4 +127,8 @@ def upload_and_cleanup(cam_name: str, full_file_path: str,
             try:
                 os.remove(full_file_path)
             except:
-                pass
\ No newline at end of file
+                pass
+        if full_file_path:
+            _remove_sidecars(full_file_path)
+
+    return clip_id
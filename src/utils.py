@@ -1,11 +1,14 @@
 import os
 import shutil
-import psutil
 import glob
+import threading
+import time
 from logging_setup import get_logger
 
 logger = get_logger()
 
+_IMPORT_MONOTONIC = time.monotonic()  # fallback process start when /proc is not available
+
 
 def init_storage_in_ram(video_path_in_ram: str) -> None:
     """Initialize video storage in RAM by cleaning and creating directory"""
@@ -14,10 +17,23 @@ def init_storage_in_ram(video_path_in_ram: str) -> None:
     os.makedirs(video_path_in_ram, exist_ok=True)
 
 
+def process_uptime_seconds() -> float:
+    """Seconds since process was started by kernel (interpreter start and imports included)"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()  # process name may contain spaces
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")  # field 22: starttime in clock ticks after boot
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORT_MONOTONIC
+
+
 def _read_cpu_temperature_c_generic() -> float | None:
     """Read CPU temperature from various system sources"""
     # 1) psutil (works on Linux, some BSD/macOS; usually empty on Windows)
     try:
+        import psutil
         temps = psutil.sensors_temperatures(fahrenheit=False)
         if temps:
             candidates = []
@@ -57,6 +73,7 @@ def _read_cpu_temperature_c_generic() -> float | None:
 
 def monitor_resources_usages(stop_event, sample_sec: float = 10.0) -> None:
     """Monitor CPU and memory usage in a loop until stop_event is set"""
+    import psutil  # DEBUG logging only, not loaded otherwise
     proc = psutil.Process(os.getpid())
 
     # Prime CPU counters so next calls return a delta over the interval
@@ -85,4 +102,36 @@ def monitor_resources_usages(stop_event, sample_sec: float = 10.0) -> None:
 
         logger.debug("[SYS] RAM")
         logger.debug(f"  |-- process: {proc_rss_mb:.2f} MB")
-        logger.debug(f"  |-- system:  {sys_used_mib:.2f} MB")
\ No newline at end of file
+        logger.debug(f"  |-- system:  {sys_used_mib:.2f} MB")
+
+
+class StageStats:
+    """Thread-safe collector of per-stage durations (ms), used by benchmark"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, stage: str, duration_ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(stage, []).append(duration_ms)
+
+    def count(self, stage: str) -> int:
+        with self._lock:
+            return len(self._samples.get(stage, []))
+
+    def summary(self) -> dict:
+        """Per stage count, mean, p50, p95 and max (ms)"""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+
+        result = {}
+        for stage, values in samples.items():
+            n = len(values)
+            result[stage] = {
+                "count": n,
+                "mean_ms": sum(values) / n,
+                "p50_ms": values[int(0.50 * (n - 1))],
+                "p95_ms": values[int(0.95 * (n - 1))],
+                "max_ms": values[-1],
+            }
+        return result
@@ -0,0 +1,230 @@
+"""
+Second stage motion verification. MOG2 percentage starts a recording on any pixel change (lamp flicker, shadows,
+IR switch), so right after the recording started few downscaled frames (reference from before the motion
+and frames spread over VERIFY_WINDOW_SECONDS after it) are checked by heavier test in a process pool:
+- global illumination change (exposure, lamp, IR switch) is compensated before frames are compared to reference
+- changed pixels are split into blobs, blobs smaller than VERIFY_MIN_BLOB_PERCENT of frame are ignored
+- blobs keeping reference texture (shadow, light spot) or clipped to black/white are ignored
+- some blob has to be found in at least VERIFY_MIN_PERSISTENCE frames
+Camera then cancels the recording or keeps it as clip without motion (VERIFY_ACTION), see CameraManager.
+"""
+import os
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import cv2
+import numpy as np
+from logging_setup import get_logger
+
+logger = get_logger()
+
+VERIFY_WIDTH = 160  # frames are checked at this width (aspect ratio kept)
+DIFF_THRESHOLD = 25  # gray levels after illumination compensation
+TEXTURE_CORRELATION = 0.7  # blob correlating with reference at least this much is same surface in different light
+MIN_TEXTURE_STD = 4.0  # flat regions have no texture to compare, their blobs are always counted (unless saturated)
+SATURATED_LEVELS = (5, 250)  # blob mostly this dark/bright lost its texture to exposure, not to an object
+WORKER_NICE = 5  # pool processes yield to camera threads
+LATENCY_SAMPLES = 200
+
+
+def downscale_frame(frame, width=VERIFY_WIDTH):
+    """Small copy of frame for verification (aspect ratio kept)"""
+    h, w = frame.shape[:2]
+    height = max(1, int(round(h * width / float(w))))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def _compensate(current, reference):
+    """Match brightness and contrast of every channel to reference (exposure, lamp, IR switch)"""
+    current_mean, current_std = cv2.meanStdDev(current)
+    reference_mean, reference_std = cv2.meanStdDev(reference)
+    gain = (reference_std / np.maximum(current_std, 1.0)).reshape(-1).astype(np.float32)
+    offset = (reference_mean.reshape(-1) - current_mean.reshape(-1) * gain).astype(np.float32)
+    return current * gain + offset if current.ndim == 3 else current * gain[0] + offset[0]
+
+
+def _detail(image):
+    """High-pass of grayscale image: texture without shading (shadows and light spots are low frequency)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return gray - cv2.GaussianBlur(gray, (0, 0), 2.0)
+
+
+def _same_texture(current, reference):
+    """Zero-mean normalized correlation of blob detail, high = same surface only darker/brighter"""
+    current_std, reference_std = float(current.std()), float(reference.std())
+    if current_std < MIN_TEXTURE_STD or reference_std < MIN_TEXTURE_STD:
+        return False
+    correlation = float(((current - current.mean()) * (reference - reference.mean())).mean()) / (current_std * reference_std)
+    return correlation >= TEXTURE_CORRELATION
+
+
+def _saturated(region):
+    """Most of blob clipped to black or white (light switched on, IR cut filter, exposure jump)"""
+    levels = region.max(axis=2) if region.ndim == 3 else region
+    clipped = np.count_nonzero((levels <= SATURATED_LEVELS[0]) | (levels >= SATURATED_LEVELS[1]))
+    return clipped * 2 >= levels.size
+
+
+def verify_event(reference, frames, min_blob_percent=0.3, min_persistence=2):
+    """
+    Check frames (downscale_frame) against reference taken before the motion, runs in pool process.
+    Returns dict: real, reason, persistent_frames, frames, peak_blob_percent, illumination_percent, cpu_ms
+    """
+    cpu_start = time.process_time()
+    ref = reference.astype(np.float32)
+    ref_detail = _detail(ref)
+    pixels = reference.shape[0] * reference.shape[1]
+    min_area = pixels * min_blob_percent / 100.0
+    kernel = np.ones((3, 3), np.uint8)
+
+    persistent_frames = 0
+    peak_blob_percent = 0.0
+    illumination_percent = 0.0
+    small_blobs = 0
+    texture_blobs = 0
+    for frame in frames:
+        if frame.shape != reference.shape:
+            frame = cv2.resize(frame, (reference.shape[1], reference.shape[0]), interpolation=cv2.INTER_AREA)
+            if frame.ndim != reference.ndim:
+                continue  # color vs grayscale source, nothing to compare
+        current = frame.astype(np.float32)
+        diff = cv2.absdiff(current, ref)
+        raw_changed = np.count_nonzero((diff.max(axis=2) if diff.ndim == 3 else diff) > DIFF_THRESHOLD)
+
+        current = _compensate(current, ref)
+        diff = cv2.absdiff(current, ref)
+        mask = ((diff.max(axis=2) if diff.ndim == 3 else diff) > DIFF_THRESHOLD).astype(np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)  # sensor noise, edges shifted by a pixel
+        illumination_percent = max(illumination_percent, (raw_changed - np.count_nonzero(mask)) * 100.0 / pixels)
+
+        count, _, blob_stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        current_detail = None
+        found = False
+        for label in range(1, count):
+            x, y, w, h, area = blob_stats[label]
+            if area < min_area:
+                small_blobs += 1
+                continue
+            if current_detail is None:
+                current_detail = _detail(current)
+            if _same_texture(current_detail[y:y + h, x:x + w], ref_detail[y:y + h, x:x + w]) or _saturated(frame[y:y + h, x:x + w]):
+                texture_blobs += 1
+                continue
+            found = True
+            peak_blob_percent = max(peak_blob_percent, area * 100.0 / pixels)
+        persistent_frames += found
+
+    real = persistent_frames >= min(max(1, int(min_persistence)), len(frames))
+    if real:
+        reason = "object"
+    elif persistent_frames:
+        reason = "not persistent"
+    elif texture_blobs:
+        reason = "texture unchanged or saturated (shadow, light)"
+    elif small_blobs:
+        reason = "blobs too small"
+    elif illumination_percent > 0:
+        reason = "global illumination change"
+    else:
+        reason = "no change"
+
+    return {
+        "real": real,
+        "reason": reason,
+        "persistent_frames": persistent_frames,
+        "frames": len(frames),
+        "peak_blob_percent": round(float(peak_blob_percent), 3),
+        "illumination_percent": round(float(illumination_percent), 3),
+        "cpu_ms": round((time.process_time() - cpu_start) * 1000, 3),
+    }
+
+
+def _init_worker(nice):
+    os.nice(nice)
+    cv2.setNumThreads(1)  # one check per process, pool size sets parallelism
+
+
+class EventVerifier:
+    """
+    Process pool running verify_event (own processes: heavy check never holds GIL of camera threads).
+    Processes are spawned (camera threads are running, fork is not safe) and warmed up by start().
+    """
+    def __init__(self, workers=1, nice=WORKER_NICE):
+        self.workers = max(1, int(workers))
+        self.nice = nice
+        self._executor = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # submit -> result (ms)
+        self._cpu = deque(maxlen=LATENCY_SAMPLES)  # check CPU time in pool process (ms)
+        self.stats = {"checks": 0, "real": 0, "spurious": 0, "failed": 0}
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.nice,))
+
+    def start(self):
+        """Spawn pool processes now, so first verification does not wait for interpreter start and imports"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            executor = self._executor
+        blank = np.zeros((9, 16, 3), np.uint8)
+        try:
+            warmups = [executor.submit(verify_event, blank, [blank]) for _ in range(self.workers)]
+            for warmup in warmups:
+                warmup.result()
+        except Exception as e:
+            logger.warning(f"[SYS] Event verification pool failed to start ({repr(e)})")
+            return
+        logger.info(f"[SYS] Event verification pool started ({self.workers} process/-es)")
+
+    def submit(self, cam_name, reference, frames, min_blob_percent, min_persistence):
+        """Future with verify_event result"""
+        submitted = time.monotonic()
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            try:
+                future = self._executor.submit(verify_event, reference, frames, min_blob_percent, min_persistence)
+            except BrokenProcessPool:
+                logger.warning(f"[{cam_name}] Event verification pool broken, restarting it")
+                self._executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+                future = self._executor.submit(verify_event, reference, frames, min_blob_percent, min_persistence)
+
+        def done(future):
+            with self._lock:
+                self.stats["checks"] += 1
+                if future.cancelled() or future.exception() is not None:
+                    self.stats["failed"] += 1
+                    return
+                result = future.result()
+                self.stats["real" if result["real"] else "spurious"] += 1
+                self._cpu.append(result["cpu_ms"])
+                self._latencies.append((time.monotonic() - submitted) * 1000)
+
+        future.add_done_callback(done)
+        return future
+
+    def status(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            cpu = list(self._cpu)
+            stats = dict(self.stats)
+        latency = {}
+        if latencies:
+            latency = {
+                "avg_ms": round(sum(latencies) / len(latencies), 3),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                "max_ms": round(latencies[-1], 3),
+            }
+        return {"workers": self.workers, **stats, "cpu_ms_avg": round(sum(cpu) / len(cpu), 3) if cpu else None, "latency": latency}
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,9 +1,18 @@
 # view.py
+import os
+import io
 import time
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import datetime as dt
 from threading import Thread
 import cv2
-from flask import Flask, Response, render_template_string, abort
+from flask import Flask, Response, render_template_string, abort, request, jsonify, send_file
 from werkzeug.serving import make_server
+from storage import sidecar_path
+from clipindex import read_clip_index, highlight_segments, cut_segment
 
 INDEX_HTML = """
 <!doctype html>
@@ -21,6 +30,7 @@ INDEX_HTML = """
       grid-template-columns: repeat(auto-fit, minmax(640px, 1fr));
       gap:16px; padding:16px;
     }
+    .nav { padding:16px 16px 0; }
     .card { border-radius:12px; overflow:hidden; box-shadow:0 2px 10px rgba(0,0,0,.12); }
     .frame {
       display:block;
@@ -31,6 +41,7 @@ INDEX_HTML = """
   </style>
 </head>
 <body>
+  <nav class="nav"><a href="/browse">Recordings</a></nav>
   <main class="grid">
     {% for c in cams %}
       <div class="card">
@@ -45,52 +56,158 @@ INDEX_HTML = """
 </html>
 """
 
+BROWSE_HTML = """
+<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Purr View - Recordings</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1"/>
+  <style>
+    :root { color-scheme: light dark; }
+    body { margin:0; background:Canvas; color:CanvasText;
+           font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; }
+    .nav { padding:16px 16px 0; }
+    .grid {
+      display:grid;
+      grid-template-columns: repeat(auto-fill, minmax(320px, 1fr));
+      gap:16px; padding:16px;
+    }
+    .card { border-radius:12px; overflow:hidden; box-shadow:0 2px 10px rgba(0,0,0,.12); }
+    .card img, .card video { display:block; width:100%; height:auto; background:#111; }
+    .meta { padding:8px 12px; font-size:14px; }
+  </style>
+</head>
+<body>
+  <nav class="nav"><a href="/">Live</a></nav>
+  <main class="grid">
+    {% for c in clips %}
+      <div class="card">
+        <a href="/recordings/{{ c.id }}"><img src="/recordings/{{ c.id }}/thumbnail" alt="{{ c.name }}" loading="lazy"/></a>
+        <div class="meta">{{ c.cam }} | {{ c.started }} | {{ "%.1f"|format(c.duration) }} s | {{ "%.2f"|format(c.peak_motion) }} %</div>
+      </div>
+    {% endfor %}
+  </main>
+</body>
+</html>
+"""
+
+VIDEO_MIMETYPES = {
+    ".mp4": "video/mp4",
+    ".avi": "video/x-msvideo",
+    ".mkv": "video/x-matroska",
+}
+
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_EVENTS = 1000
+PREVIEW_JPEG_QUALITY = 80
+BURST_MAX_FRAMES = 100
+BURST_MAX_SECONDS = 60
+
+
+class JpegCache:
+    """
+    Newest preview JPEG of every camera, encoded once per camera frame and shared by all streams and snapshots.
+    Frames are recognised by camera frame sequence (frame_seq), without it every call encodes.
+    pin_frame(cam_idx) -> (frame, unpin()) keeps pooled frame from being recycled while it is encoded.
+    """
+    def __init__(self, current_frame, frame_seq=None, quality=PREVIEW_JPEG_QUALITY, pin_frame=None):
+        self.current_frame = current_frame
+        self.frame_seq = frame_seq
+        self.pin_frame = pin_frame if pin_frame is not None else lambda cam_idx: (self.current_frame[cam_idx], lambda: None)
+        self.quality = quality
+        self._entries = [None for _ in current_frame]  # (frame seq, JPEG bytes, wall clock time of encode)
+        self._locks = [threading.Lock() for _ in current_frame]
+        self.encodes = 0
+        self.hits = 0
+
+    def get(self, cam_idx: int):
+        """(frame seq, JPEG bytes, timestamp) of newest frame, None while camera has no frame"""
+        # read sequence before frame: worker sets frame first, so frame is never older than its sequence
+        seq = self.frame_seq[cam_idx] if self.frame_seq is not None else None
+        with self._locks[cam_idx]:
+            entry = self._entries[cam_idx]
+            if entry is not None and seq is not None and entry[0] == seq:
+                self.hits += 1
+                return entry
+            frame, unpin = self.pin_frame(cam_idx)
+            try:
+                if frame is None:
+                    return None
+                ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            finally:
+                unpin()
+            if not ok:
+                return None
+            if seq is None:
+                seq = entry[0] + 1 if entry is not None else 1
+            self.encodes += 1
+            entry = self._entries[cam_idx] = (seq, jpg.tobytes(), time.time())
+            return entry
+
 class Viewer:
-    def __init__(self, current_frame, cam_count, camera_configs, stop_event, host="0.0.0.0", port=5000, http_fps_limit=0):
+    def __init__(self, current_frame, cam_count, camera_configs, stop_event, storage=None, host="0.0.0.0", port=5000, http_fps_limit=0, use_x_sendfile=False, health_provider=None, analytics=None, governor=None, config_reloader=None, frame_seq=None, burst_provider=None, event_bus=None, verifier=None, frame_pinner=None):
         self.current_frame = current_frame
         self.cam_count = int(cam_count)
         self.camera_configs = camera_configs
         self.stop_event = stop_event
+        self.storage = storage  # None = recordings endpoints disabled
+        self.health_provider = health_provider  # callable -> list of per-camera source health, None = /health disabled
+        self.analytics = analytics  # None = analytics endpoints disabled
+        self.governor = governor  # optional governor.ResourceGovernor (preview throttling, /metrics)
+        self.config_reloader = config_reloader  # callable -> reload summary dict, None = /config/reload disabled
+        self.event_bus = event_bus  # optional events.EventBus, /events/stats
+        self.verifier = verifier  # optional verify.EventVerifier, /verify/stats
+        self.burst_provider = burst_provider  # callable(cam_idx, count, interval) -> [(timestamp, JPEG bytes)], None = /burst disabled
+        self.jpeg_cache = JpegCache(current_frame, frame_seq, pin_frame=frame_pinner)  # frame_pinner: CameraManager.pin_current_frame
+        self._etag_prefix = f"{int(time.time())}"  # snapshot ETags of previous run never match
         self.host = host
         self.port = port
         self.http_fps_limit = int(http_fps_limit)  # 0 = unlimited
 
         self.app = Flask(__name__)
+        # let a front proxy (nginx/lighttpd) do the file transfer with sendfile(2)
+        self.app.config["USE_X_SENDFILE"] = bool(use_x_sendfile)
         self._server = None
         self._thread = None
         self._bind_routes()
 
     def _mjpeg_gen(self, cam_idx: int):
         boundary = b"--frame"
-        # compute min_dt from limiter; if 0 or <1, treat as unlimited
-        target_fps = self.http_fps_limit if self.http_fps_limit and self.http_fps_limit > 0 else None
-        min_dt = (1.0 / float(target_fps)) if target_fps else 0.0
         last_sent = 0.0
+        last_seq = None
 
         try:
             while not self.stop_event.is_set():
-                frame = self.current_frame[cam_idx]
-                if frame is None:
-                    time.sleep(0.01)
+                # compute min_dt from limiter; if 0 or <1, treat as unlimited
+                target_fps = self.http_fps_limit if self.http_fps_limit and self.http_fps_limit > 0 else None
+                preview_factor = self.governor.preview_fps_factor(cam_idx) if self.governor is not None else 1.0
+                if preview_factor <= 0:
+                    time.sleep(0.5) # preview paused by resource governor, keep connection open
                     continue
+                if preview_factor < 1:
+                    target_fps = (target_fps or self.camera_configs[cam_idx]["FPS"]) * preview_factor
+                min_dt = (1.0 / float(target_fps)) if target_fps else 0.0
 
                 if target_fps:
-                    now = time.time()
-                    dt = now - last_sent
+                    dt = time.time() - last_sent
                     if dt < min_dt:
                         # sleep just enough to hit the target cadence
                         time.sleep(max(0.0, min_dt - dt))
                         continue
-                    last_sent = now
 
-                ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if not ok:
-                    time.sleep(0.01)
+                entry = self.jpeg_cache.get(cam_idx)
+                if entry is None or entry[0] == last_seq:
+                    time.sleep(0.005) # no new frame yet, never send the same one twice
                     continue
+                last_seq, data, _ = entry
+                last_sent = time.time()
 
+                # Content-Length lets relays (hub.py) cut parts without scanning JPEG data
                 yield (boundary + b"\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" +
-                    jpg.tobytes() + b"\r\n")
+                    b"Content-Type: image/jpeg\r\n"
+                    b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" +
+                    data + b"\r\n")
         except (GeneratorExit, BrokenPipeError):
             pass  # client closed
 
@@ -109,6 +226,248 @@ class Viewer:
             resp.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
             return resp
 
+        @app.get("/snapshot/<int:cam_idx>")
+        def snapshot(cam_idx: int):
+            if cam_idx < 0 or cam_idx >= self.cam_count:
+                abort(404)
+            entry = self.jpeg_cache.get(cam_idx)
+            if entry is None:
+                abort(503) # camera has no frame yet
+            seq, data, timestamp = entry
+            resp = Response(data, mimetype="image/jpeg")
+            resp.set_etag(f"{self._etag_prefix}-{cam_idx}-{seq}")
+            resp.headers["Cache-Control"] = "no-cache"
+            resp.headers["X-Frame-Seq"] = str(seq)
+            resp.headers["X-Frame-Timestamp"] = f"{timestamp:.3f}"
+            return resp.make_conditional(request) # unchanged frame -> 304 Not Modified
+
+        @app.get("/burst/<int:cam_idx>")
+        def burst(cam_idx: int):
+            if self.burst_provider is None or cam_idx < 0 or cam_idx >= self.cam_count:
+                abort(404)
+            count = request.args.get("n", 10, type=int)
+            interval = request.args.get("interval", 0.5, type=float)
+            output_format = request.args.get("format", "zip")
+            if not 1 <= count <= BURST_MAX_FRAMES or interval < 0 or (count - 1) * interval > BURST_MAX_SECONDS or output_format not in ("zip", "multipart"):
+                abort(400)
+            frames = self.burst_provider(cam_idx, count, interval)
+            if not frames:
+                abort(503)
+
+            cam_name = self.camera_configs[cam_idx]["NAME"]
+            names = [f"{cam_name}_{dt.fromtimestamp(ts).strftime('%Y-%m-%d_%H-%M-%S_%f')}.jpg" for ts, _ in frames]
+            if output_format == "zip":
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf: # JPEG doesn't compress any further
+                    for name, (_, data) in zip(names, frames):
+                        zf.writestr(name, data)
+                resp = Response(buf.getvalue(), mimetype="application/zip")
+                resp.headers["Content-Disposition"] = f"attachment; filename={names[0][:-4]}_burst.zip"
+                return resp
+
+            parts = []
+            for name, (ts, data) in zip(names, frames):
+                parts.append(b"--burst\r\n"
+                    b"Content-Type: image/jpeg\r\n"
+                    b"Content-Disposition: inline; filename=" + name.encode() + b"\r\n"
+                    b"X-Frame-Timestamp: " + f"{ts:.3f}".encode() + b"\r\n"
+                    b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" +
+                    data + b"\r\n")
+            parts.append(b"--burst--\r\n")
+            return Response(b"".join(parts), mimetype="multipart/mixed; boundary=burst")
+
+        @app.get("/api/cameras")
+        def api_cameras():
+            return jsonify([
+                {
+                    "idx": i,
+                    "name": cfg["NAME"],
+                    "width": int(cfg["FRAME_WIDTH"]),
+                    "height": int(cfg["FRAME_HEIGHT"]),
+                    "fps": cfg["FPS"],
+                    "stream_url": f"/stream/{i}",
+                    "online": self.current_frame[i] is not None,
+                }
+                for i, cfg in enumerate(self.camera_configs[:self.cam_count])
+            ])
+
+        def _get_clip_or_404(clip_id: int):
+            if self.storage is None:
+                abort(404)
+            clip = self.storage.get_clip(clip_id)
+            if clip is None or not os.path.exists(clip["path"]):
+                abort(404)
+            return clip
+
+        def _list_clips():
+            if self.storage is None:
+                abort(404)
+            args = request.args
+            try:
+                return self.storage.list_clips(
+                    cam_name=args.get("cam"),
+                    since=args.get("since", type=float),
+                    until=args.get("until", type=float),
+                    limit=min(args.get("limit", 100, type=int), 1000),
+                    offset=args.get("offset", 0, type=int),
+                    motion={"1": True, "0": False}.get(args.get("motion"))
+                )
+            except ValueError:
+                abort(400)
+
+        @app.post("/config/reload")
+        def config_reload():
+            if self.config_reloader is None:
+                abort(404)
+            summary = self.config_reloader()
+            return jsonify(summary), (200 if summary["ok"] else 400)
+
+        @app.get("/events/stats")
+        def events_stats():
+            if self.event_bus is None:
+                abort(404)
+            return jsonify({"sinks": self.event_bus.status()})
+
+        @app.get("/verify/stats")
+        def verify_stats():
+            if self.verifier is None:
+                abort(404)
+            return jsonify(self.verifier.status())
+
+        @app.get("/metrics")
+        def metrics():
+            if self.governor is None:
+                abort(404)
+            return Response(self.governor.prometheus_metrics(), mimetype="text/plain; version=0.0.4")
+
+        @app.get("/recordings")
+        def recordings():
+            clips = _list_clips()
+            for clip in clips:
+                clip["url"] = f"/recordings/{clip['id']}"
+                clip["thumbnail_url"] = f"/recordings/{clip['id']}/thumbnail"
+                clip["name"] = os.path.basename(clip.pop("path"))
+            return jsonify(clips)
+
+        @app.get("/recordings/<int:clip_id>")
+        def recording(clip_id: int):
+            clip = _get_clip_or_404(clip_id)
+            ext = os.path.splitext(clip["path"])[1].lower()
+            # conditional=True -> Range/If-Range/ETag handling (206 Partial Content), so browsers can seek
+            return send_file(clip["path"], mimetype=VIDEO_MIMETYPES.get(ext, "application/octet-stream"), conditional=True)
+
+        @app.get("/recordings/<int:clip_id>/thumbnail")
+        def recording_thumbnail(clip_id: int):
+            clip = _get_clip_or_404(clip_id)
+            thumbnail_path = sidecar_path(clip["path"], ".jpg")
+            if not os.path.exists(thumbnail_path):
+                abort(404)
+            resp = send_file(thumbnail_path, mimetype="image/jpeg", conditional=True)
+            resp.headers["Cache-Control"] = "max-age=86400"
+            return resp
+
+        def _clip_index_or_404(clip):
+            index = read_clip_index(clip["path"])
+            if index is None:
+                abort(404)
+            # default threshold is camera's own detection threshold
+            cam_config = next((c for c in self.camera_configs if c["NAME"] == clip["cam"]), {})
+            threshold = request.args.get("threshold", cam_config.get("MOTION_DETECTION_THRESHOLD_PERCENT", 0.25), type=float)
+            return index, highlight_segments(index, threshold)
+
+        @app.get("/recordings/<int:clip_id>/index")
+        def recording_index(clip_id: int):
+            clip = _get_clip_or_404(clip_id)
+            index, segments = _clip_index_or_404(clip)
+            for n, segment in enumerate(segments):
+                segment["url"] = f"/recordings/{clip_id}/highlights/{n}"
+            index["highlights"] = segments
+            index["peak_url"] = f"/recordings/{clip_id}#t={index['peak_second']}" # media fragment, browser seeks on its own
+            return jsonify(index)
+
+        @app.get("/recordings/<int:clip_id>/highlights/<int:segment_idx>")
+        def recording_highlight(clip_id: int, segment_idx: int):
+            clip = _get_clip_or_404(clip_id)
+            _, segments = _clip_index_or_404(clip)
+            if segment_idx >= len(segments):
+                abort(404)
+            segment = segments[segment_idx]
+            work_dir = tempfile.mkdtemp(prefix="purrview-cut-")
+            try:
+                name = f"{os.path.splitext(os.path.basename(clip['path']))[0]}_highlight{segment_idx}"
+                try:
+                    path = cut_segment(clip["path"], segment["start"], segment["end"], os.path.join(work_dir, name))
+                except RuntimeError:
+                    abort(501) # container can't be cut without ffmpeg
+                with open(path, "rb") as f:
+                    data = f.read()
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            ext = os.path.splitext(path)[1].lower()
+            resp = Response(data, mimetype=VIDEO_MIMETYPES.get(ext, "application/octet-stream"))
+            resp.headers["Content-Disposition"] = f"inline; filename={os.path.basename(path)}"
+            return resp
+
+        @app.get("/health")
+        def health():
+            if self.health_provider is None:
+                abort(404)
+            return jsonify({"cameras": self.health_provider()})
+
+        def _analytics_range():
+            if self.analytics is None:
+                abort(404)
+            args = request.args
+            cam = args.get("cam") or (self.camera_configs[0]["NAME"] if self.camera_configs else None)
+            until = args.get("until", time.time(), type=float)
+            since = args.get("since", until - ANALYTICS_DEFAULT_DAYS * 24 * 3600, type=float)
+            if cam is None or since >= until:
+                abort(400)
+            return cam, since, until
+
+        @app.get("/analytics/events")
+        def analytics_events():
+            cam, since, until = _analytics_range()
+            summary = self.analytics.event_summary(cam, since, until)
+            if request.args.get("details", 0, type=int):
+                events = self.analytics.events(cam, since, until)[-ANALYTICS_MAX_EVENTS:]
+                summary["events"] = [
+                    {"start_ts": float(e["start_ts"]), "end_ts": float(e["end_ts"]), "duration": float(e["duration"]),
+                     "peak_motion": float(e["peak_motion"]), "clip": e["clip"].decode()}
+                    for e in events
+                ]
+            return jsonify(summary)
+
+        @app.get("/analytics/heatmap")
+        def analytics_heatmap():
+            cam, since, until = _analytics_range()
+            hour_from = request.args.get("hour_from", 0, type=int)
+            hour_to = request.args.get("hour_to", 23, type=int)
+            if not 0 <= hour_from <= hour_to <= 23:
+                abort(400)
+            heat, frames = self.analytics.heatmap(cam, since, until, hour_from, hour_to)
+
+            if request.args.get("format") == "json":
+                return jsonify({"cam": cam, "since": since, "until": until, "frames": frames,
+                                "width": heat.shape[1], "height": heat.shape[0], "cells": heat.round(5).tolist()})
+
+            # normalised to hottest cell, so rarely moving areas are still visible
+            scale = 255.0 / heat.max() if heat.max() > 0 else 0.0
+            image = cv2.applyColorMap((heat * scale).astype("uint8"), cv2.COLORMAP_JET)
+            image = cv2.resize(image, (heat.shape[1] * 10, heat.shape[0] * 10), interpolation=cv2.INTER_NEAREST)
+            ok, png = cv2.imencode(".png", image)
+            if not ok:
+                abort(500)
+            return Response(png.tobytes(), mimetype="image/png")
+
+        @app.get("/browse")
+        def browse():
+            clips = _list_clips()
+            for clip in clips:
+                clip["name"] = os.path.basename(clip["path"])
+                clip["started"] = dt.fromtimestamp(clip["start_ts"]).strftime("%Y-%m-%d %H:%M:%S")
+            return render_template_string(BROWSE_HTML, clips=clips)
+
         @app.get("/")
         def index():
             cams = []